@@ -1,20 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
 
-from ...core.database import get_db
-from ...models.game_models import (
+from ....core.config import settings
+from ....core.database import get_db, get_async_db, User
+from ....core.query_budget import query_budget
+from ....core.rate_limit import limiter
+from ....core.response_cache import cached_response, response_cache
+from ....core.serialization import ListSerializer
+from ....models.game_models import (
     Constellation, ConstellationMembership, ConstellationBattle, 
-    ConstellationBattleParticipation, User, UserPrestige
+    ConstellationBattleParticipation, UserPrestige
 )
-from ...auth.auth import get_current_active_user as get_current_user
-from ...services.clan_trading_service import (
+from ....auth.auth import get_current_active_user as get_current_user
+from ....services.clan_trading_service import (
     clan_trading_service, start_battle_monitoring, 
     get_real_time_battle_scores, get_clan_trading_performance
 )
-from ...tasks.clan_battle_monitor import trigger_battle_update, get_monitor_status
+from ....tasks.clan_battle_monitor import trigger_battle_update, get_monitor_status
 
 router = APIRouter(prefix="/constellations", tags=["constellations"])
 
@@ -23,7 +30,7 @@ router = APIRouter(prefix="/constellations", tags=["constellations"])
 class ConstellationCreate(BaseModel):
     name: str = Field(..., min_length=3, max_length=100)
     description: Optional[str] = Field(None, max_length=1000)
-    constellation_color: str = Field("#7B2CBF", regex=r"^#[0-9A-Fa-f]{6}$")
+    constellation_color: str = Field("#7B2CBF", pattern=r"^#[0-9A-Fa-f]{6}$")
     constellation_emblem: str = Field("star", max_length=50)
     is_public: bool = True
     max_members: int = Field(50, ge=5, le=200)
@@ -31,7 +38,7 @@ class ConstellationCreate(BaseModel):
 
 class ConstellationUpdate(BaseModel):
     description: Optional[str] = Field(None, max_length=1000)
-    constellation_color: Optional[str] = Field(None, regex=r"^#[0-9A-Fa-f]{6}$")
+    constellation_color: Optional[str] = Field(None, pattern=r"^#[0-9A-Fa-f]{6}$")
     constellation_emblem: Optional[str] = Field(None, max_length=50)
     is_public: Optional[bool] = None
     max_members: Optional[int] = Field(None, ge=5, le=200)
@@ -76,9 +83,12 @@ class ConstellationMemberResponse(BaseModel):
         from_attributes = True
 
 
+member_list_serializer = ListSerializer(ConstellationMemberResponse)
+
+
 class ConstellationBattleCreate(BaseModel):
     defender_constellation_id: int
-    battle_type: str = Field(..., regex=r"^(trading_duel|stellar_supremacy|cosmic_conquest)$")
+    battle_type: str = Field(..., pattern=r"^(trading_duel|stellar_supremacy|cosmic_conquest)$")
     duration_hours: int = Field(24, ge=1, le=168)  # 1 hour to 1 week
     prize_pool: float = Field(0.0, ge=0.0)
 
@@ -159,26 +169,28 @@ async def create_constellation(
     
     db.add(owner_membership)
     db.commit()
+    await response_cache.invalidate("constellations")
     db.refresh(db_constellation)
     
     return db_constellation
 
 
 @router.get("/", response_model=List[ConstellationResponse])
+@cached_response("constellations", ttl=30, response_model=List[ConstellationResponse])
 async def list_constellations(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     search: Optional[str] = Query(None, min_length=1, max_length=100),
-    sort_by: str = Query("created_at", regex=r"^(name|member_count|constellation_level|battle_rating|created_at)$"),
-    sort_order: str = Query("desc", regex=r"^(asc|desc)$"),
-    db: Session = Depends(get_db)
+    sort_by: str = Query("created_at", pattern=r"^(name|member_count|constellation_level|battle_rating|created_at)$"),
+    sort_order: str = Query("desc", pattern=r"^(asc|desc)$"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all public constellations with search and sorting"""
-    query = db.query(Constellation).filter(Constellation.is_public == True)
+    query = select(Constellation).where(Constellation.is_public == True)
     
     # Apply search filter
     if search:
-        query = query.filter(
+        query = query.where(
             Constellation.name.ilike(f"%{search}%") | 
             Constellation.description.ilike(f"%{search}%")
         )
@@ -190,20 +202,19 @@ async def list_constellations(
         query = query.order_by(getattr(Constellation, sort_by).desc())
     
     # Apply pagination
-    constellations = query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
     
-    return constellations
+    return result.scalars().all()
 
 
 @router.get("/{constellation_id}", response_model=ConstellationResponse)
+@cached_response("constellations", ttl=30, response_model=ConstellationResponse)
 async def get_constellation(
     constellation_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get constellation details by ID"""
-    constellation = db.query(Constellation).filter(
-        Constellation.id == constellation_id
-    ).first()
+    constellation = await db.get(Constellation, constellation_id)
     
     if not constellation:
         raise HTTPException(status_code=404, detail="Constellation not found")
@@ -245,6 +256,7 @@ async def update_constellation(
     
     constellation.updated_at = datetime.utcnow()
     db.commit()
+    await response_cache.invalidate("constellations")
     db.refresh(constellation)
     
     return constellation
@@ -317,6 +329,7 @@ async def join_constellation(
     constellation.updated_at = datetime.utcnow()
     
     db.commit()
+    await response_cache.invalidate("constellations")
     
     return {"message": "Successfully joined constellation", "constellation_id": constellation_id}
 
@@ -358,6 +371,7 @@ async def leave_constellation(
     constellation.updated_at = datetime.utcnow()
     
     db.commit()
+    await response_cache.invalidate("constellations")
     
     return {"message": "Successfully left constellation"}
 
@@ -365,12 +379,10 @@ async def leave_constellation(
 @router.get("/{constellation_id}/members", response_model=List[ConstellationMemberResponse])
 async def get_constellation_members(
     constellation_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all members of a constellation"""
-    constellation = db.query(Constellation).filter(
-        Constellation.id == constellation_id
-    ).first()
+    constellation = await db.get(Constellation, constellation_id)
     
     if not constellation:
         raise HTTPException(status_code=404, detail="Constellation not found")
@@ -381,37 +393,37 @@ async def get_constellation_members(
             detail="This constellation is private"
         )
     
-    members = db.query(ConstellationMembership, User).join(
-        User, ConstellationMembership.user_id == User.id
-    ).filter(
-        ConstellationMembership.constellation_id == constellation_id,
-        ConstellationMembership.is_active == True
-    ).all()
+    # Project only the response columns and serialize the list in one pass
+    members = (await db.execute(
+        select(
+            ConstellationMembership.id,
+            User.id.label("user_id"),
+            User.username,
+            ConstellationMembership.role,
+            ConstellationMembership.contribution_score,
+            ConstellationMembership.stellar_shards_contributed,
+            ConstellationMembership.lumina_contributed,
+            ConstellationMembership.battles_participated,
+            ConstellationMembership.joined_at,
+            ConstellationMembership.last_active_at,
+        ).join(
+            User, ConstellationMembership.user_id == User.id
+        ).where(
+            ConstellationMembership.constellation_id == constellation_id,
+            ConstellationMembership.is_active == True
+        )
+    )).all()
     
-    # Format response
-    member_responses = []
-    for membership, user in members:
-        member_responses.append(ConstellationMemberResponse(
-            id=membership.id,
-            user_id=user.id,
-            username=user.username,
-            role=membership.role,
-            contribution_score=membership.contribution_score,
-            stellar_shards_contributed=membership.stellar_shards_contributed,
-            lumina_contributed=membership.lumina_contributed,
-            battles_participated=membership.battles_participated,
-            joined_at=membership.joined_at,
-            last_active_at=membership.last_active_at
-        ))
-    
-    return member_responses
+    return member_list_serializer.response(members)
 
 
 # Constellation battle endpoints
 @router.post("/{constellation_id}/battles", response_model=ConstellationBattleResponse)
+@limiter.shared_limit(settings.RATE_LIMIT_BATTLE, scope="battle")
 async def create_constellation_battle(
     constellation_id: int,
     battle: ConstellationBattleCreate,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -484,7 +496,7 @@ async def create_constellation_battle(
 @router.get("/{constellation_id}/battles", response_model=List[ConstellationBattleResponse])
 async def get_constellation_battles(
     constellation_id: int,
-    status: Optional[str] = Query(None, regex=r"^(pending|active|completed|cancelled)$"),
+    status: Optional[str] = Query(None, pattern=r"^(pending|active|completed|cancelled)$"),
     db: Session = Depends(get_db)
 ):
     """Get battles for a constellation"""
@@ -509,8 +521,10 @@ async def get_constellation_battles(
 
 
 @router.post("/battles/{battle_id}/join")
+@limiter.shared_limit(settings.RATE_LIMIT_BATTLE, scope="battle")
 async def join_constellation_battle(
     battle_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -574,8 +588,10 @@ async def join_constellation_battle(
 
 
 @router.post("/battles/{battle_id}/start")
+@limiter.shared_limit(settings.RATE_LIMIT_BATTLE, scope="battle")
 async def start_constellation_battle(
     battle_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -617,9 +633,11 @@ async def start_constellation_battle(
 
 
 @router.post("/battles/{battle_id}/update-score")
+@limiter.shared_limit(settings.RATE_LIMIT_BATTLE, scope="battle")
 async def update_battle_score(
     battle_id: int,
     trading_score: float,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -682,8 +700,11 @@ async def update_battle_score(
 
 
 @router.post("/battles/{battle_id}/complete")
+@limiter.shared_limit(settings.RATE_LIMIT_BATTLE, scope="battle")
+@query_budget(15)
 async def complete_constellation_battle(
     battle_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -773,6 +794,17 @@ async def _complete_battle(battle: ConstellationBattle, db: Session):
         ConstellationBattleParticipation.battle_id == battle.id
     ).all()
     
+    # Load every participant's membership in one query rather than one per participant
+    memberships = {}
+    if participations:
+        membership_rows = db.query(ConstellationMembership).filter(
+            ConstellationMembership.constellation_id.in_(
+                {p.constellation_id for p in participations}
+            ),
+            ConstellationMembership.user_id.in_({p.user_id for p in participations})
+        ).all()
+        memberships = {(m.constellation_id, m.user_id): m for m in membership_rows}
+    
     # Calculate total score for each constellation
     challenger_total_score = sum(p.individual_score for p in participations 
                                 if p.constellation_id == battle.challenger_constellation_id)
@@ -801,10 +833,7 @@ async def _complete_battle(battle: ConstellationBattle, db: Session):
             participation.bonus_xp = int(participation.bonus_xp * 1.5)  # 50% bonus for winners
         
         # Update constellation membership stats
-        membership = db.query(ConstellationMembership).filter(
-            ConstellationMembership.constellation_id == participation.constellation_id,
-            ConstellationMembership.user_id == participation.user_id
-        ).first()
+        membership = memberships.get((participation.constellation_id, participation.user_id))
         
         if membership:
             membership.battles_participated += 1
@@ -812,12 +841,15 @@ async def _complete_battle(battle: ConstellationBattle, db: Session):
             membership.contribution_score += int(participation.individual_score * 0.1)
     
     db.commit()
+    await response_cache.invalidate("constellations")
 
 
 # Real Trading Integration Endpoints
 @router.post("/battles/{battle_id}/start-trading")
+@limiter.shared_limit(settings.RATE_LIMIT_BATTLE, scope="battle")
 async def start_battle_trading_integration(
     battle_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -1050,8 +1082,10 @@ async def follow_trader(
 
 # Battle Monitoring Control Endpoints
 @router.post("/battles/{battle_id}/force-update")
+@limiter.shared_limit(settings.RATE_LIMIT_BATTLE, scope="battle")
 async def force_battle_update(
     battle_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -1110,7 +1144,9 @@ async def get_battle_monitor_status(
 
 
 @router.post("/battles/trigger-all-updates")
+@limiter.shared_limit(settings.RATE_LIMIT_BATTLE, scope="battle")
 async def trigger_all_battle_updates(
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """Trigger updates for all active battles (system admin only)."""
@@ -7,18 +7,21 @@ import json
 import hashlib
 import secrets
 
-from ...core.database import get_db
-from ...models.game_models import (
-    User, Artifact, UserGameStats, ConstellationMembership, ViralContent
+from ....core.database import get_db, User
+from ....core.response_cache import cached_response, response_cache
+from ....core.serialization import model_response
+from ....models.game_models import (
+    Artifact, UserGameStats, ConstellationMembership, ViralContent
 )
-from ...auth.auth import get_current_active_user as get_current_user
+from ....auth.auth import get_current_active_user as get_current_user
+from ....services.xp_ledger import xp_ledger
 
 router = APIRouter(prefix="/nft", tags=["nft_integration"])
 
 
 # Pydantic models
 class GenesisNFTRequest(BaseModel):
-    achievement_type: str = Field(..., regex=r"^(first_trade|level_milestone|constellation_founder|viral_legend|trading_master)$")
+    achievement_type: str = Field(..., pattern=r"^(first_trade|level_milestone|constellation_founder|viral_legend|trading_master)$")
     milestone_data: Dict[str, Any]
 
 
@@ -146,10 +149,11 @@ async def mint_genesis_nft(
             created_at=artifact.discovered_at
         )
         
-        # Award bonus XP for Genesis NFT
-        current_user.xp += points_earned
+        # Award bonus XP for Genesis NFT; the ranking follows once committed
+        xp_ledger.apply_sync(db, current_user.id, points_earned)
         
         db.commit()
+        await response_cache.invalidate("nft_stats")
         
         return genesis_nft
         
@@ -194,6 +198,7 @@ async def get_genesis_collection(
         
         # Calculate collection value
         collection_value = _calculate_collection_value(artifacts)
+        owner = db.query(User).filter(User.id == user_id).first()
         
         # Convert artifacts to Genesis NFT responses
         recent_nfts = []
@@ -207,7 +212,7 @@ async def get_genesis_collection(
                 achievement_type=achievement_type,
                 rarity=artifact.rarity,
                 points_earned=_calculate_genesis_points(achievement_type, artifact.rarity),
-                metadata=_create_nft_metadata(achievement_type, artifact.rarity, {}, None, {}),
+                metadata=_create_artifact_metadata(artifact, owner),
                 minting_transaction=f"tx_{artifact.id}",
                 minting_status="minted",
                 created_at=artifact.discovered_at
@@ -221,13 +226,13 @@ async def get_genesis_collection(
             achievement_type=featured_achievement_type,
             rarity=featured_artifact.rarity,
             points_earned=_calculate_genesis_points(featured_achievement_type, featured_artifact.rarity),
-            metadata=_create_nft_metadata(featured_achievement_type, featured_artifact.rarity, {}, None, {}),
+            metadata=_create_artifact_metadata(featured_artifact, owner),
             minting_transaction=f"tx_{featured_artifact.id}",
             minting_status="minted",
             created_at=featured_artifact.discovered_at
         )
         
-        return NFTCollectionResponse(
+        return model_response(NFTCollectionResponse(
             user_id=user_id,
             total_nfts=len(artifacts),
             unique_achievements=unique_achievements,
@@ -235,7 +240,7 @@ async def get_genesis_collection(
             featured_nft=featured_nft,
             recent_nfts=recent_nfts,
             collection_value=collection_value
-        )
+        ))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get collection: {str(e)}")
@@ -246,13 +251,13 @@ async def get_genesis_collection(
 async def get_marketplace_listings(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    rarity: Optional[str] = Query(None, regex=r"^(common|rare|epic|legendary)$"),
+    rarity: Optional[str] = Query(None, pattern=r"^(common|rare|epic|legendary)$"),
     achievement_type: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
-    currency: Optional[str] = Query("stellar_shards", regex=r"^(stellar_shards|lumina)$"),
-    sort_by: str = Query("listed_at", regex=r"^(price|rarity|listed_at)$"),
-    sort_order: str = Query("desc", regex=r"^(asc|desc)$"),
+    currency: Optional[str] = Query("stellar_shards", pattern=r"^(stellar_shards|lumina)$"),
+    sort_by: str = Query("listed_at", pattern=r"^(price|rarity|listed_at)$"),
+    sort_order: str = Query("desc", pattern=r"^(asc|desc)$"),
     db: Session = Depends(get_db)
 ):
     """Get NFT marketplace listings with filtering and sorting"""
@@ -302,7 +307,7 @@ async def get_marketplace_listings(
 async def list_nft_for_sale(
     nft_id: str,
     price: float = Query(..., gt=0),
-    currency: str = Query("stellar_shards", regex=r"^(stellar_shards|lumina)$"),
+    currency: str = Query("stellar_shards", pattern=r"^(stellar_shards|lumina)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -501,109 +506,6 @@ async def create_shareable_nft_content(
 
 
 # Helper functions
-async def _check_genesis_eligibility(user_id: int, achievement_type: str, milestone_data: Dict, db: Session) -> Dict:
-    """Check if user is eligible for Genesis NFT"""
-    user_stats = db.query(UserGameStats).filter(UserGameStats.user_id == user_id).first()
-    
-    eligibility = {"eligible": False, "reason": "", "stats": {}}
-    
-    if achievement_type == "first_trade":
-        # Check if user has made their first trade
-        if user_stats and user_stats.trades_executed > 0:
-            eligibility = {"eligible": True, "reason": "First trade completed", "stats": {"trades": user_stats.trades_executed}}
-    
-    elif achievement_type == "level_milestone":
-        required_level = milestone_data.get("level", 10)
-        if user_stats and user_stats.current_level >= required_level:
-            eligibility = {"eligible": True, "reason": f"Reached level {required_level}", "stats": {"level": user_stats.current_level}}
-    
-    elif achievement_type == "constellation_founder":
-        # Check if user founded a constellation
-        membership = db.query(ConstellationMembership).filter(
-            ConstellationMembership.user_id == user_id,
-            ConstellationMembership.role == "owner"
-        ).first()
-        if membership:
-            eligibility = {"eligible": True, "reason": "Founded a constellation", "stats": {"constellation_id": membership.constellation_id}}
-    
-    elif achievement_type == "viral_legend":
-        # Check viral content performance
-        viral_content = db.query(ViralContent).filter(ViralContent.user_id == user_id).all()
-        total_viral_score = sum(content.viral_score for content in viral_content)
-        if total_viral_score >= 1000:  # Threshold for viral legend
-            eligibility = {"eligible": True, "reason": "Achieved viral legend status", "stats": {"viral_score": total_viral_score}}
-    
-    elif achievement_type == "trading_master":
-        # Check trading performance
-        if user_stats and user_stats.stellar_shards_earned >= 100000:  # High earning threshold
-            eligibility = {"eligible": True, "reason": "Achieved trading master status", "stats": {"earnings": user_stats.stellar_shards_earned}}
-    
-    if not eligibility["eligible"]:
-        eligibility["reason"] = "Achievement requirements not met"
-    
-    return eligibility
-
-
-def _generate_nft_id(user_id: int, achievement_type: str) -> str:
-    """Generate unique NFT ID"""
-    timestamp = int(datetime.utcnow().timestamp())
-    data = f"{user_id}_{achievement_type}_{timestamp}"
-    hash_obj = hashlib.sha256(data.encode())
-    return f"genesis_{achievement_type}_{hash_obj.hexdigest()[:8]}"
-
-
-def _calculate_nft_rarity(achievement_type: str, stats: Dict) -> str:
-    """Calculate NFT rarity based on achievement and user stats"""
-    # Base rarity by achievement type
-    base_rarities = {
-        "first_trade": "common",
-        "level_milestone": "rare",
-        "constellation_founder": "epic",
-        "viral_legend": "legendary",
-        "trading_master": "legendary"
-    }
-    
-    base_rarity = base_rarities.get(achievement_type, "common")
-    
-    # Upgrade rarity based on stats (simplified logic)
-    if achievement_type == "level_milestone":
-        level = stats.get("level", 0)
-        if level >= 50:
-            return "legendary"
-        elif level >= 25:
-            return "epic"
-    
-    elif achievement_type == "viral_legend":
-        viral_score = stats.get("viral_score", 0)
-        if viral_score >= 5000:
-            return "legendary"
-    
-    return base_rarity
-
-
-def _calculate_genesis_points(achievement_type: str, rarity: str) -> int:
-    """Calculate points earned for Genesis NFT"""
-    base_points = {
-        "first_trade": 100,
-        "level_milestone": 250,
-        "constellation_founder": 500,
-        "viral_legend": 750,
-        "trading_master": 1000
-    }
-    
-    rarity_multiplier = {
-        "common": 1.0,
-        "rare": 1.5,
-        "epic": 2.0,
-        "legendary": 3.0
-    }
-    
-    base = base_points.get(achievement_type, 100)
-    multiplier = rarity_multiplier.get(rarity, 1.0)
-    
-    return int(base * multiplier)
-
-
 def _calculate_bonus_percentage(rarity: str) -> float:
     """Calculate bonus percentage for artifact"""
     bonus_map = {
@@ -615,79 +517,6 @@ def _calculate_bonus_percentage(rarity: str) -> float:
     return bonus_map.get(rarity, 5.0)
 
 
-def _create_nft_metadata(achievement_type: str, rarity: str, milestone_data: Dict, user: Optional[User], stats: Dict) -> Dict:
-    """Create NFT metadata"""
-    return {
-        "name": f"Genesis {achievement_type.replace('_', ' ').title()}",
-        "description": f"A {rarity} Genesis Seed NFT representing {achievement_type.replace('_', ' ')} achievement",
-        "image": f"https://api.astratrade.com/nft/image/genesis_{achievement_type}_{rarity}.png",
-        "attributes": [
-            {"trait_type": "Achievement", "value": achievement_type.replace('_', ' ').title()},
-            {"trait_type": "Rarity", "value": rarity.title()},
-            {"trait_type": "Power Level", "value": _calculate_bonus_percentage(rarity)},
-            {"trait_type": "Minted Date", "value": datetime.utcnow().isoformat()},
-        ],
-        "external_url": f"https://astratrade.com/nft/genesis/{achievement_type}",
-        "background_color": _get_rarity_color(rarity)
-    }
-
-
-async def _simulate_blockchain_minting(user_id: int, artifact_id: int, achievement_type: str, rarity: str, points: int, metadata: Dict) -> Dict:
-    """Simulate blockchain minting process"""
-    # In production, this would interact with actual Starknet contracts
-    tx_hash = f"0x{secrets.token_hex(32)}"
-    
-    return {
-        "tx_hash": tx_hash,
-        "block_number": 12345678,
-        "gas_used": 150000,
-        "status": "success"
-    }
-
-
-def _get_rarity_score(rarity: str) -> float:
-    """Get numeric rarity score"""
-    scores = {
-        "common": 1.0,
-        "rare": 2.5,
-        "epic": 5.0,
-        "legendary": 10.0
-    }
-    return scores.get(rarity, 1.0)
-
-
-def _calculate_collection_value(artifacts: List[Artifact]) -> Dict[str, float]:
-    """Calculate estimated collection value"""
-    total_stellar_shards = 0.0
-    total_lumina = 0.0
-    
-    for artifact in artifacts:
-        rarity_multiplier = _get_rarity_score(artifact.rarity)
-        base_value = 100.0  # Base value per NFT
-        
-        stellar_value = base_value * rarity_multiplier
-        lumina_value = stellar_value * 0.1  # 10% conversion rate
-        
-        total_stellar_shards += stellar_value
-        total_lumina += lumina_value
-    
-    return {
-        "stellar_shards": total_stellar_shards,
-        "lumina": total_lumina
-    }
-
-
-def _get_rarity_color(rarity: str) -> str:
-    """Get color code for rarity"""
-    colors = {
-        "common": "808080",  # Gray
-        "rare": "0099FF",    # Blue
-        "epic": "9966CC",    # Purple
-        "legendary": "FF6600" # Orange
-    }
-    return colors.get(rarity, "808080")
-
-
 def _get_mock_marketplace_listings() -> List[NFTMarketplaceItem]:
     """Get mock marketplace listings for development"""
     return [
@@ -731,13 +560,6 @@ def _get_mock_marketplace_listings() -> List[NFTMarketplaceItem]:
             is_featured=True
         )
     ]
-        
-        db.commit()
-        
-        return genesis_nft
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to mint Genesis NFT: {str(e)}")
 
 
 @router.get("/genesis/collection", response_model=NFTCollectionResponse)
@@ -783,7 +605,7 @@ async def get_user_nft_collection(
         if genesis_nfts:
             featured_nft = max(genesis_nfts, key=lambda x: (_get_rarity_score(x.rarity), x.created_at))
         
-        return NFTCollectionResponse(
+        return model_response(NFTCollectionResponse(
             user_id=current_user.id,
             total_nfts=len(genesis_nfts),
             unique_achievements=len(set(nft.achievement_type for nft in genesis_nfts)),
@@ -791,7 +613,7 @@ async def get_user_nft_collection(
             featured_nft=featured_nft,
             recent_nfts=genesis_nfts[:5],  # Most recent 5
             collection_value=collection_value
-        )
+        ))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get NFT collection: {str(e)}")
@@ -916,8 +738,8 @@ async def get_marketplace_items(
     min_price: Optional[float] = Query(None),
     max_price: Optional[float] = Query(None),
     currency: str = Query("stellar_shards"),
-    sort_by: str = Query("listed_at", regex=r"^(price|listed_at|rarity)$"),
-    sort_order: str = Query("desc", regex=r"^(asc|desc)$"),
+    sort_by: str = Query("listed_at", pattern=r"^(price|listed_at|rarity)$"),
+    sort_order: str = Query("desc", pattern=r"^(asc|desc)$"),
     limit: int = Query(20, ge=1, le=50),
     db: Session = Depends(get_db)
 ):
@@ -1017,6 +839,7 @@ async def create_shareable_nft_content(
 
 
 @router.get("/stats/global")
+@cached_response("nft_stats", ttl=60)
 async def get_global_nft_stats(
     db: Session = Depends(get_db)
 ):
@@ -1046,14 +869,16 @@ async def get_global_nft_stats(
             achievement_type = artifact_type.replace("genesis_", "")
             achievement_types[achievement_type] = achievement_types.get(achievement_type, 0) + 1
         
+        unique_holders = db.query(Artifact.user_id).filter(
+            Artifact.artifact_type.like("genesis_%")
+        ).distinct().count()
+        
         return {
             "total_genesis_nfts": total_genesis_nfts,
-            "unique_holders": db.query(Artifact.user_id).filter(
-                Artifact.artifact_type.like("genesis_%")
-            ).distinct().count(),
+            "unique_holders": unique_holders,
             "rarity_distribution": rarity_distribution,
             "popular_achievements": dict(sorted(achievement_types.items(), key=lambda x: x[1], reverse=True)),
-            "average_collection_size": total_genesis_nfts / max(1, len(set(artifact.user_id for artifact in artifacts))),
+            "average_collection_size": total_genesis_nfts / max(1, unique_holders),
             "daily_mints": _get_daily_mint_stats(db)
         }
         
@@ -1,12 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
 
-from ...core.database import get_db
-from ...models.game_models import User, UserPrestige, UserGameStats, ConstellationMembership
-from ...auth.auth import get_current_active_user as get_current_user
+from ....core.database import get_db, get_async_db, User
+from ....core.query_budget import query_budget
+from ....core.response_cache import cached_response, response_cache
+from ....models.game_models import (
+    UserPrestige, UserGameStats, ConstellationMembership, Constellation
+)
+from ....auth.auth import get_current_active_user as get_current_user
 
 router = APIRouter(prefix="/prestige", tags=["prestige"])
 
@@ -78,36 +84,40 @@ class VerificationRequest(BaseModel):
 
 class CustomizationUpdate(BaseModel):
     custom_title: Optional[str] = Field(None, max_length=100)
-    aura_color: Optional[str] = Field(None, regex=r"^#[0-9A-Fa-f]{6}$")
+    aura_color: Optional[str] = Field(None, pattern=r"^#[0-9A-Fa-f]{6}$")
 
 
 # Prestige system endpoints
 @router.get("/profile/{user_id}", response_model=UserPrestigeProfile)
 async def get_user_prestige_profile(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's prestige profile"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Get user's game stats
-    game_stats = db.query(UserGameStats).filter(
-        UserGameStats.user_id == user_id
-    ).first()
+    game_stats = (await db.execute(
+        select(UserGameStats).where(UserGameStats.user_id == user_id)
+    )).scalars().first()
     
     # Get user's prestige info
-    prestige = db.query(UserPrestige).filter(
-        UserPrestige.user_id == user_id
-    ).first()
-    
-    # Get constellation membership
-    constellation_membership = db.query(ConstellationMembership).filter(
-        ConstellationMembership.user_id == user_id,
-        ConstellationMembership.is_active == True
-    ).first()
+    prestige = (await db.execute(
+        select(UserPrestige).where(UserPrestige.user_id == user_id)
+    )).scalars().first()
+    
+    # Get constellation membership (constellation eagerly loaded for the name)
+    constellation_membership = (await db.execute(
+        select(ConstellationMembership).options(
+            selectinload(ConstellationMembership.constellation)
+        ).where(
+            ConstellationMembership.user_id == user_id,
+            ConstellationMembership.is_active == True
+        )
+    )).scalars().first()
     
     # Calculate win rate
     win_rate = 0.0
@@ -131,17 +141,20 @@ async def get_user_prestige_profile(
 
 
 @router.get("/leaderboard/dual", response_model=List[LeaderboardEntry])
+@cached_response("prestige_leaderboard", ttl=60, response_model=List[LeaderboardEntry])
+@query_budget(1)
 async def get_dual_leaderboard(
-    leaderboard_type: str = Query("stellar_shards", regex=r"^(stellar_shards|lumina)$"),
+    leaderboard_type: str = Query("stellar_shards", pattern=r"^(stellar_shards|lumina)$"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
     verified_only: bool = Query(False),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get dual leaderboard (Stellar Shards or Lumina)"""
-    # Base query joining necessary tables
-    query = db.query(
-        User, UserGameStats, UserPrestige, ConstellationMembership
+    # Base query joining necessary tables; the constellation name is joined in
+    # rather than lazy-loaded per row
+    query = select(
+        User, UserGameStats, UserPrestige, Constellation.name
     ).join(
         UserGameStats, User.id == UserGameStats.user_id
     ).outerjoin(
@@ -150,11 +163,13 @@ async def get_dual_leaderboard(
         ConstellationMembership, 
         (User.id == ConstellationMembership.user_id) & 
         (ConstellationMembership.is_active == True)
+    ).outerjoin(
+        Constellation, ConstellationMembership.constellation_id == Constellation.id
     )
     
     # Filter verified users only if requested
     if verified_only:
-        query = query.filter(UserPrestige.is_verified == True)
+        query = query.where(UserPrestige.is_verified == True)
     
     # Sort by the requested metric
     if leaderboard_type == "stellar_shards":
@@ -163,11 +178,11 @@ async def get_dual_leaderboard(
         query = query.order_by(UserGameStats.lumina.desc())
     
     # Apply pagination
-    results = query.offset(offset).limit(limit).all()
+    results = (await db.execute(query.offset(offset).limit(limit))).all()
     
     # Build leaderboard entries
     leaderboard = []
-    for rank, (user, game_stats, prestige, constellation_membership) in enumerate(results, start=offset + 1):
+    for rank, (user, game_stats, prestige, constellation_name) in enumerate(results, start=offset + 1):
         win_rate = 0.0
         if game_stats.total_trades > 0:
             win_rate = (game_stats.successful_trades / game_stats.total_trades) * 100
@@ -186,24 +201,25 @@ async def get_dual_leaderboard(
             verification_tier=prestige.verification_tier if prestige else 0,
             aura_color=prestige.aura_color if prestige else "#FFFFFF",
             custom_title=prestige.custom_title if prestige else None,
-            constellation_name=constellation_membership.constellation.name if constellation_membership else None
+            constellation_name=constellation_name
         ))
     
     return leaderboard
 
 
 @router.get("/spotlight", response_model=List[UserPrestigeProfile])
+@query_budget(3)
 async def get_spotlight_users(
     limit: int = Query(10, ge=1, le=20),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get users currently in spotlight"""
     # Get users eligible for spotlight, prioritizing by various factors
-    query = db.query(User, UserPrestige, UserGameStats).join(
+    query = select(User, UserPrestige, UserGameStats).join(
         UserPrestige, User.id == UserPrestige.user_id
     ).join(
         UserGameStats, User.id == UserGameStats.user_id
-    ).filter(
+    ).where(
         UserPrestige.spotlight_eligible == True,
         UserPrestige.is_verified == True
     )
@@ -217,15 +233,27 @@ async def get_spotlight_users(
         UserGameStats.stellar_shards.desc()
     )
     
-    results = query.limit(limit).all()
+    results = (await db.execute(query.limit(limit))).all()
+    
+    # Load active memberships for all spotlight users in one query
+    user_ids = [user.id for user, _, _ in results]
+    memberships = {}
+    if user_ids:
+        membership_rows = await db.execute(
+            select(ConstellationMembership).options(
+                selectinload(ConstellationMembership.constellation)
+            ).where(
+                ConstellationMembership.user_id.in_(user_ids),
+                ConstellationMembership.is_active == True
+            )
+        )
+        for membership in membership_rows.scalars():
+            memberships.setdefault(membership.user_id, membership)
     
     # Build spotlight profiles
     spotlight_users = []
     for user, prestige, game_stats in results:
-        constellation_membership = db.query(ConstellationMembership).filter(
-            ConstellationMembership.user_id == user.id,
-            ConstellationMembership.is_active == True
-        ).first()
+        constellation_membership = memberships.get(user.id)
         
         win_rate = 0.0
         if game_stats.total_trades > 0:
@@ -323,6 +351,7 @@ async def request_verification(
     prestige.social_rating = min(100.0, (win_rate * 50) + (game_stats.total_trades / 10))
     
     db.commit()
+    await response_cache.invalidate("prestige_leaderboard")
     
     return {
         "message": "Verification successful",
@@ -370,6 +399,7 @@ async def customize_profile(
     
     prestige.updated_at = datetime.utcnow()
     db.commit()
+    await response_cache.invalidate("prestige_leaderboard")
     
     return {"message": "Profile customization updated successfully"}
 
@@ -424,6 +454,7 @@ async def vote_for_spotlight(
 
 
 @router.get("/badges")
+@cached_response("prestige_badges", ttl=3600)
 async def get_available_badges(
     db: Session = Depends(get_db)
 ):
@@ -526,6 +557,7 @@ async def update_social_metrics(
         prestige.spotlight_eligible = True
     
     db.commit()
+    await response_cache.invalidate("prestige_leaderboard")
     
     return {
         "message": "Social metrics updated",
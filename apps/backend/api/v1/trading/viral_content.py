@@ -9,12 +9,13 @@ from io import BytesIO
 from PIL import Image
 import random
 
-from ...core.database import get_db
-from ...models.game_models import (
-    User, ViralContent, FOMOEvent, FOMOEventParticipation, 
+from ....core.database import get_db, User
+from ....core.response_cache import cached_response, response_cache
+from ....models.game_models import (
+    ViralContent, FOMOEvent, FOMOEventParticipation, 
     UserGameStats, ConstellationMembership
 )
-from ...auth.auth import get_current_active_user as get_current_user
+from ....auth.auth import get_current_active_user as get_current_user
 
 router = APIRouter(prefix="/viral", tags=["viral_content"])
 
@@ -45,7 +46,7 @@ class ViralContentResponse(BaseModel):
 
 
 class MemeGenerationRequest(BaseModel):
-    meme_type: str = Field(..., regex=r"^(trading_win|trading_loss|milestone|streak|constellation|nft)$")
+    meme_type: str = Field(..., pattern=r"^(trading_win|trading_loss|milestone|streak|constellation|nft)$")
     template_id: Optional[str] = None
     custom_text: Optional[str] = Field(None, max_length=200)
     trading_data: Optional[Dict[str, Any]] = None
@@ -140,6 +141,7 @@ async def generate_meme(
         
         db.add(viral_content)
         db.commit()
+        await response_cache.invalidate("social_proof")
         db.refresh(viral_content)
         
         return viral_content
@@ -149,6 +151,7 @@ async def generate_meme(
 
 
 @router.get("/memes/templates")
+@cached_response("meme_templates", ttl=3600)
 async def get_meme_templates():
     """Get available meme templates"""
     templates = {
@@ -257,6 +260,7 @@ async def share_meme(
         viral_content.engagement_rate = viral_content.share_count / hours_elapsed
         
         db.commit()
+        await response_cache.invalidate("social_proof")
         
         return {
             "message": "Meme shared successfully",
@@ -329,6 +333,7 @@ async def create_ecosystem_snapshot(
         
         db.add(viral_content)
         db.commit()
+        await response_cache.invalidate("social_proof")
         db.refresh(viral_content)
         
         return viral_content
@@ -427,6 +432,7 @@ async def participate_in_fomo_event(
         event.current_participants += 1
         
         db.commit()
+        await response_cache.invalidate("social_proof")
         db.refresh(participation)
         
         return participation
@@ -469,6 +475,7 @@ async def get_fomo_event_leaderboard(
 
 # Social proof endpoints
 @router.get("/social-proof")
+@cached_response("social_proof", ttl=30)
 async def get_social_proof_data(
     db: Session = Depends(get_db)
 ):
@@ -1,12 +1,24 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from ..core.database import get_db, User
 from ..core.config import settings
+from ..core.metrics import (
+    PASSWORD_HASH_IN_FLIGHT,
+    PASSWORD_HASH_QUEUE_DEPTH,
+    PASSWORD_HASH_SECONDS,
+)
+from ..core.tracing import traced
+from .principal_cache import user_principal_cache
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -16,6 +28,12 @@ security = HTTPBearer()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Dedicated, size-limited pool for bcrypt work
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_password_ops_pending = 0
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against its hash."""
@@ -27,6 +45,50 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _timed_password_op(operation: str, func: Callable, *args):
+    """Runs on the executor thread; tracks queue depth, in-flight count and duration."""
+    PASSWORD_HASH_QUEUE_DEPTH.dec()
+    PASSWORD_HASH_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        PASSWORD_HASH_SECONDS.labels(operation=operation).observe(time.perf_counter() - start)
+        PASSWORD_HASH_IN_FLIGHT.dec()
+
+
+async def _run_password_op(operation: str, func: Callable, *args):
+    """Run a bcrypt operation on the password executor, shedding load past the queue cap."""
+    global _password_ops_pending
+    if _password_ops_pending >= settings.PASSWORD_HASH_MAX_QUEUE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _password_ops_pending += 1
+    PASSWORD_HASH_QUEUE_DEPTH.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _password_executor, _timed_password_op, operation, func, *args
+        )
+    finally:
+        _password_ops_pending -= 1
+
+
+@traced("auth.bcrypt")
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bcrypt executor without blocking the event loop."""
+    return await _run_password_op("verify", verify_password, plain_password, hashed_password)
+
+
+@traced("auth.bcrypt")
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the bcrypt executor without blocking the event loop."""
+    return await _run_password_op("hash", get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -62,6 +124,17 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     return user
 
 
+async def authenticate_user_async(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    """Authenticate a user by username and password using an async session."""
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -77,15 +150,34 @@ def get_current_user(
     if username is None:
         raise credentials_exception
     
+    # Attach the cached snapshot to this request's session without a SELECT,
+    # so handlers can still modify and commit the user as usual
+    cached_user = user_principal_cache.get(username)
+    if cached_user is not None:
+        return db.merge(cached_user, load=False)
+    
     user = db.query(User).filter(User.username == username).first()
     if user is None:
         raise credentials_exception
     
+    user_principal_cache.set(username, user)
     return user
 
 
+def invalidate_cached_user(user_id: int):
+    """Evict a user from the auth cache after out-of-band changes (bulk updates, raw SQL)."""
+    user_principal_cache.invalidate_user(user_id)
+
+
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get the current active user."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    """Get the current user, who must be an active admin."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
@@ -0,0 +1,124 @@
+"""
+Authenticated User Cache
+Short-TTL, size-bounded cache of users resolved from JWT subjects so
+authenticated requests don't re-query the users table on every call.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached, object_session
+
+from ..core.config import settings
+from ..core.database import User, after_commit
+from ..core.metrics import register_cache
+
+# Changes to these columns make a cached principal unsafe to serve
+INVALIDATING_FIELDS = ("xp", "level", "is_active", "is_admin", "hashed_password", "username", "wallet_address", "email")
+
+
+class UserPrincipalCache:
+    """LRU + TTL cache of detached User snapshots keyed by token subject."""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_size: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._subjects_by_user_id: Dict[int, str] = {}
+        # get_current_user is a sync dependency and runs on the threadpool
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str) -> Optional[User]:
+        """Return the cached snapshot for a subject, or None if absent/expired."""
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, snapshot = entry
+            if expires_at < time.monotonic():
+                self._drop(subject)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            return snapshot
+
+    def set(self, subject: str, user: User):
+        """Cache a detached copy of a loaded user."""
+        snapshot = _snapshot(user)
+        with self._lock:
+            self._drop(subject)
+            self._entries[subject] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._subjects_by_user_id[snapshot.id] = subject
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            self._drop(subject)
+
+    def invalidate_user(self, user_id: int):
+        """Evict whichever subject currently maps to this user id."""
+        with self._lock:
+            subject = self._subjects_by_user_id.get(user_id)
+            if subject is not None:
+                self._drop(subject)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._subjects_by_user_id.clear()
+
+    def _drop(self, subject: str):
+        entry = self._entries.pop(subject, None)
+        if entry is not None and self._subjects_by_user_id.get(entry[1].id) == subject:
+            del self._subjects_by_user_id[entry[1].id]
+
+
+def _snapshot(user: User) -> User:
+    """Copy a user's column values into a detached instance safe to share across sessions."""
+    mapper = inspect(User)
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in mapper.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+user_principal_cache = UserPrincipalCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+)
+register_cache("user_principal", user_principal_cache)
+
+
+def _invalidate_now_and_after_commit(target: User):
+    """Evict at flush, and again once committed.
+
+    Until the commit, a concurrent request can still load and re-cache the old
+    row (e.g. a user being deactivated); the second eviction drops that copy.
+    """
+    user_id = target.id
+    user_principal_cache.invalidate_user(user_id)
+
+    async def evict():
+        user_principal_cache.invalidate_user(user_id)
+
+    after_commit(object_session(target), evict)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_update(mapper, connection, target):
+    """Evict a user whose XP/level, status or credentials change via the ORM."""
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in INVALIDATING_FIELDS):
+        _invalidate_now_and_after_commit(target)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(mapper, connection, target):
+    _invalidate_now_and_after_commit(target)
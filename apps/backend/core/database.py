@@ -1,15 +1,108 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean
-from sqlalchemy.orm import sessionmaker, relationship, declarative_base
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, Date, DateTime, Boolean, Index, false, JSON, Text, UniqueConstraint
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, relationship, declarative_base
 from datetime import datetime
+from typing import Awaitable, Callable, Optional, Set
+import asyncio
+import logging
 from .config import Settings
 
+logger = logging.getLogger(__name__)
+
 # Database setup
 settings = Settings()
-engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+
+
+def _pool_options(url: str) -> dict:
+    """Pool arguments from settings; SQLite's default pools don't take sizing."""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(
+    settings.DATABASE_URL, echo=settings.DEBUG, **_pool_options(settings.DATABASE_URL)
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def _async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching async driver (asyncpg/aiosqlite)."""
+    scheme, sep, rest = url.partition("://")
+    if scheme in ("postgresql", "postgres", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+
+# Async database setup, used by the hot request paths so DB waits don't block the loop
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or _async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, echo=settings.DEBUG, **_pool_options(ASYNC_DATABASE_URL)
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+# Callbacks deferred until a session's transaction commits (see after_commit)
+_AFTER_COMMIT = "after_commit_callbacks"
+_callback_loop: Optional[asyncio.AbstractEventLoop] = None
+_callback_tasks: Set[asyncio.Task] = set()
+
+
+def after_commit(session, callback: Callable[[], Awaitable[None]]):
+    """Run `callback()` on the event loop once `session`'s current transaction commits.
+
+    For read models (caches, rankings) that must not see uncommitted writes.
+    Takes a Session or an AsyncSession; on rollback the callbacks are dropped.
+    """
+    sync_session = getattr(session, "sync_session", session)
+    sync_session.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+
+async def _run_callback(callback: Callable[[], Awaitable[None]]):
+    try:
+        await callback()
+    except Exception as e:
+        logger.error(f"After-commit callback {getattr(callback, '__qualname__', callback)} failed: {e}")
+
+
+def _schedule(callback: Callable[[], Awaitable[None]]):
+    global _callback_loop
+    try:
+        _callback_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # A sync session committed on a threadpool worker; hand over to the app's loop
+        if _callback_loop is None or _callback_loop.is_closed():
+            logger.warning("No event loop for after-commit callback; dropped")
+            return
+        asyncio.run_coroutine_threadsafe(_run_callback(callback), _callback_loop)
+        return
+    task = _callback_loop.create_task(_run_callback(callback))
+    _callback_tasks.add(task)
+    task.add_done_callback(_callback_tasks.discard)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session):
+    for callback in session.info.pop(_AFTER_COMMIT, ()):
+        _schedule(callback)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_commit(session):
+    session.info.pop(_AFTER_COMMIT, None)
+
+
 # Database Models
 class User(Base):
     __tablename__ = "users"
@@ -21,7 +114,9 @@ class User(Base):
     xp = Column(Integer, default=0)
     level = Column(Integer, default=1)
     wallet_address = Column(String, nullable=True)
+    daily_streak = Column(Integer, default=0, nullable=False, server_default="0")
     is_active = Column(Boolean, default=True)
+    is_admin = Column(Boolean, default=False, nullable=False, server_default=false())
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -68,6 +163,75 @@ class Trade(Base):
         "ShieldProtectionEvent", back_populates="trade", uselist=False
     )
 
+    __table_args__ = (
+        # Trade history keyset pagination
+        Index("ix_trades_user_id_created_at", "user_id", "created_at"),
+    )
+
+
+class DailyReward(Base):
+    __tablename__ = "daily_rewards"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    reward_date = Column(Date, nullable=False)
+    xp_awarded = Column(Integer, nullable=False)
+    streak_bonus = Column(Integer, default=0)
+    activity_multiplier = Column(Float, default=1.0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # One reward per user per day; also makes job reruns idempotent
+        UniqueConstraint("user_id", "reward_date", name="uq_daily_rewards_user_date"),
+    )
+
+
+class PostTradeTask(Base):
+    """Outbox row for a post-trade side effect (services.post_trade_outbox)."""
+
+    __tablename__ = "post_trade_tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String, nullable=False)
+    task_type = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    # Next attempt time while pending; lease expiry while running
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # One row per side effect; enqueueing the same effect twice is a no-op
+        UniqueConstraint("idempotency_key", name="uq_post_trade_tasks_idempotency_key"),
+        # Worker claim scan
+        Index("ix_post_trade_tasks_status_available_at", "status", "available_at"),
+    )
+
+
+class TradeIdempotencyKey(Base):
+    """Result of a trade request submitted with an Idempotency-Key (core.idempotency)."""
+
+    __tablename__ = "trade_idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    idempotency_key = Column(String, nullable=False)
+    request_hash = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="in_progress")  # in_progress, completed
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Keys are scoped per user; the constraint is what serializes concurrent retries
+        UniqueConstraint("user_id", "idempotency_key", name="uq_trade_idempotency_keys_user_key"),
+        # Periodic purge: created_at < now - IDEMPOTENCY_KEY_TTL_SECONDS
+        Index("ix_trade_idempotency_keys_created_at", "created_at"),
+    )
+
 
 class ApiKey(Base):
     __tablename__ = "api_keys"
@@ -91,6 +255,12 @@ def get_db():
         db.close()
 
 
+# Dependency to get async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # Create tables
 def create_tables():
     Base.metadata.create_all(bind=engine)
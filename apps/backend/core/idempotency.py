@@ -0,0 +1,184 @@
+"""
+Idempotent Requests
+Idempotency-Key support for the trade endpoints. The first request with a key
+claims a (user, key) row, runs, and stores its response body. Retries with the
+same key and payload get that body back from the cache (or from the table
+after a cache miss) without executing again. While the first attempt is still
+running, retries get a 409. Reusing a key for a different payload is a 422.
+A failed attempt releases its key so the client can retry. An attempt that
+never finished (its worker died) is not re-run: mock trades have no
+exchange-side dedup, so its key keeps answering 409 until it expires.
+
+The key is also turned into a deterministic exchange clientOrderId, so even
+a retry that races past the table can't place a second exchange order.
+Keys expire after IDEMPOTENCY_KEY_TTL_SECONDS; a periodic purge deletes them.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .database import AsyncSessionLocal, TradeIdempotencyKey
+from .metrics import register_cache
+from .response_cache import ResponseCache, _create_backend
+from .serialization import model_response
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+_keys = TradeIdempotencyKey.__table__
+
+# (response body, request hash); same shape and backend as the response cache
+idempotency_cache = ResponseCache(_create_backend())
+register_cache("idempotency", idempotency_cache)
+
+
+def request_hash(scope: str, payload: Dict[str, Any]) -> str:
+    """Fingerprint of what the key was first used for."""
+    canonical = json.dumps({"scope": scope, "payload": payload}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def client_order_id(user_id: int, key: str) -> str:
+    """Exchange clientOrderId derived from the user's idempotency key."""
+    return f"astratrade_{hashlib.sha256(f'{user_id}:{key}'.encode()).hexdigest()[:24]}"
+
+
+def _cache_key(user_id: int, key: str) -> str:
+    return f"idempotency:{user_id}:{key}"
+
+
+def _replay(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json", headers={REPLAYED_HEADER: "true"})
+
+
+async def _claim(db: AsyncSession, user_id: int, key: str, fingerprint: str) -> Optional[bytes]:
+    """Claim the key. Returns a stored body to replay, or None if this request should run."""
+    try:
+        await db.execute(insert(_keys).values(
+            user_id=user_id,
+            idempotency_key=key,
+            request_hash=fingerprint,
+            status="in_progress",
+            created_at=datetime.utcnow(),
+        ))
+        await db.commit()
+        return None
+    except IntegrityError:
+        await db.rollback()
+
+    row = (await db.execute(
+        select(_keys.c.request_hash, _keys.c.status, _keys.c.response_body, _keys.c.created_at)
+        .where(_keys.c.user_id == user_id, _keys.c.idempotency_key == key)
+    )).first()
+    if row is None:
+        # Released by a failed attempt in the meantime
+        return await _claim(db, user_id, key, fingerprint)
+    age = datetime.utcnow() - row.created_at
+    if age > timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS):
+        await _release(db, user_id, key)
+        return await _claim(db, user_id, key, fingerprint)
+    if row.request_hash != fingerprint:
+        raise HTTPException(status_code=422, detail=f"{IDEMPOTENCY_HEADER} was already used for a different request")
+    if row.status != "completed":
+        # A stalled attempt may still have created its trade; running again could duplicate it
+        if age > timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT_SECONDS):
+            raise HTTPException(
+                status_code=409,
+                detail="The request with this Idempotency-Key did not finish; check trade history before retrying with a new key",
+            )
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+    return row.response_body.encode()
+
+
+async def _release(db: AsyncSession, user_id: int, key: str):
+    await db.execute(delete(_keys).where(_keys.c.user_id == user_id, _keys.c.idempotency_key == key))
+    await db.commit()
+
+
+async def run_idempotent(
+    db: AsyncSession,
+    user_id: int,
+    key: Optional[str],
+    scope: str,
+    payload: Dict[str, Any],
+    execute: Callable[[Optional[str]], Awaitable[BaseModel]],
+) -> Response:
+    """Run `execute(client_order_id)` at most once per (user, key) and replay its response."""
+    if key is None:
+        return model_response(await execute(None))
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+
+    fingerprint = request_hash(scope, payload)
+    cache_key = _cache_key(user_id, key)
+    cached = await idempotency_cache.get(scope, cache_key)
+    if cached is not None:
+        body, cached_fingerprint = cached
+        if cached_fingerprint != fingerprint:
+            raise HTTPException(status_code=422, detail=f"{IDEMPOTENCY_HEADER} was already used for a different request")
+        return _replay(body)
+
+    stored = await _claim(db, user_id, key, fingerprint)
+    if stored is not None:
+        await idempotency_cache.set(scope, cache_key, (stored, fingerprint), settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+        return _replay(stored)
+
+    try:
+        result = await execute(client_order_id(user_id, key))
+    except Exception:
+        await db.rollback()
+        await _release(db, user_id, key)
+        raise
+
+    body = result.model_dump_json().encode()
+    await db.execute(
+        update(_keys)
+        .where(_keys.c.user_id == user_id, _keys.c.idempotency_key == key)
+        .values(status="completed", response_body=body.decode(), completed_at=datetime.utcnow())
+    )
+    await db.commit()
+    await idempotency_cache.set(scope, cache_key, (body, fingerprint), settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+    return Response(content=body, media_type="application/json")
+
+
+async def purge_expired_keys(db: AsyncSession, ttl_seconds: Optional[float] = None, batch_size: int = 5000) -> int:
+    """Delete keys older than the TTL in batches, committing each. Returns how many were deleted."""
+    ttl_seconds = settings.IDEMPOTENCY_KEY_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    deleted = 0
+    while True:
+        # Bounded batches keep each delete's locks short
+        batch = select(_keys.c.id).where(_keys.c.created_at < cutoff).limit(batch_size)
+        result = await db.execute(delete(_keys).where(_keys.c.id.in_(batch)))
+        await db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+async def purge_expired_keys_periodically(interval: float, batch_size: int = 5000):
+    """Purge expired keys every `interval` seconds until cancelled."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                deleted = await purge_expired_keys(db, batch_size=batch_size)
+            if deleted:
+                logger.info(f"Purged {deleted} expired idempotency keys")
+        except Exception as e:
+            logger.error(f"Idempotency key purge failed: {e}")
+        await asyncio.sleep(interval)
+
@@ -1,78 +1,159 @@
-from fastapi import FastAPI, HTTPException, status, Depends, Request
+from fastapi import FastAPI, HTTPException, status, Depends, Header, Request, Response, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import timedelta, datetime
+from datetime import date, timedelta, datetime
+from sqlalchemy import select, or_, and_, null
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .database import (
     get_db,
-    create_tables,
+    get_async_db,
+    AsyncSessionLocal,
     User as DBUser,
     Trade as DBTrade,
 )
 from ..models import game_models
 from ..auth.auth import (
-    authenticate_user,
+    authenticate_user_async,
     create_access_token,
     get_current_active_user,
-    get_password_hash,
+    get_current_admin_user,
+    get_password_hash_async,
 )
 from ..services.trading_service import trading_service
+from ..services.leaderboard_service import xp_leaderboard
+from ..services.daily_rewards_service import DailyRewardsInProgress, create_daily_rewards_job, daily_reward_jobs
+from ..services.onchain_batcher import onchain_batcher
+from ..services.post_trade_outbox import post_trade_outbox, purge_finished_tasks_periodically
+from ..services.game_stats_service import (
+    ReconciliationInProgress,
+    create_reconciliation_job,
+    game_stats_jobs,
+    reconcile_periodically,
+)
+from ..services.xp_ledger import xp_ledger
 from .config import settings
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from .idempotency import IDEMPOTENCY_HEADER, purge_expired_keys_periodically, run_idempotent
+from .metrics import register_logger
+from .middleware import RequestLoggingMiddleware
+from .rate_limit import limiter
+from .serialization import ListSerializer
+from .startup import StartupTimer, prepare_app, start_after
+from .tracing import traces_sampler, before_send_transaction
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 from utils.logging import StructuredLogger
-import time
+from utils.pagination import (
+    decode_id_cursor,
+    decode_keyset_cursor,
+    encode_id_cursor,
+    encode_keyset_cursor,
+)
 import sentry_sdk
+from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
 from prometheus_fastapi_instrumentator import Instrumentator
 
 from contextlib import asynccontextmanager
+import asyncio
 from ..services.extended_exchange_client import ExtendedExchangeError
 
-# Import Phase 3 API routers
-from ..api.v1.constellations import router as constellations_router
-from ..api.v1.prestige import router as prestige_router
-from ..api.v1.viral_content import router as viral_content_router
-from ..api.v1.nft_integration import router as nft_router
 
-# Import clan battle monitor
-from ..tasks.clan_battle_monitor import start_battle_monitor, stop_battle_monitor
+async def _start_battle_monitor():
+    from ..tasks.clan_battle_monitor import start_battle_monitor
+    await start_battle_monitor()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_tables()
-    # Start clan battle monitoring
-    await start_battle_monitor()
+    timer = StartupTimer()
+    schema, routers = await prepare_app(
+        app, timer, settings.OPTIONAL_ROUTERS, settings.CACHE_WARM_ENDPOINTS
+    )
+
+    # Clan battle monitoring (and its exchange client imports) starts after the pod is ready
+    monitor_start = start_after(settings.BATTLE_MONITOR_START_DELAY_SECONDS, _start_battle_monitor)
+    # Post-trade side effects (XP, streaks, on-chain updates, events)
+    post_trade_outbox.start()
+    idempotency_purge = None
+    if settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS > 0:
+        purge_interval = settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS
+        idempotency_purge = start_after(
+            purge_interval,
+            lambda: purge_expired_keys_periodically(purge_interval, settings.IDEMPOTENCY_PURGE_BATCH_SIZE),
+        )
+    outbox_purge = None
+    if settings.POST_TRADE_PURGE_INTERVAL_SECONDS > 0:
+        outbox_purge_interval = settings.POST_TRADE_PURGE_INTERVAL_SECONDS
+        outbox_purge = start_after(
+            outbox_purge_interval,
+            lambda: purge_finished_tasks_periodically(outbox_purge_interval, settings.POST_TRADE_PURGE_BATCH_SIZE),
+        )
+    # Price path for mock trade fills
+    price_ticks = None
+    if settings.SIM_PRICE_TICK_SECONDS > 0:
+        market_data = trading_service.execution_engine.market_data
+        price_ticks = asyncio.create_task(market_data.run(settings.SIM_PRICE_TICK_SECONDS))
+    stats_reconcile = None
+    if settings.GAME_STATS_RECONCILE_INTERVAL_SECONDS > 0:
+        interval = settings.GAME_STATS_RECONCILE_INTERVAL_SECONDS
+        stats_reconcile = start_after(
+            interval,
+            lambda: reconcile_periodically(interval, settings.GAME_STATS_RECONCILE_CHUNK_SIZE),
+        )
     logger.log_structured(
         level="INFO", 
         event="app_startup", 
-        message="Clan battle monitor started"
+        message="Startup complete",
+        schema=schema,
+        routers=routers,
+        stage_ms=timer.stages,
+        total_ms=timer.total_ms,
     )
     yield
     # Stop clan battle monitoring
+    monitor_start.cancel()
+    if stats_reconcile:
+        stats_reconcile.cancel()
+    if price_ticks:
+        price_ticks.cancel()
+    if idempotency_purge:
+        idempotency_purge.cancel()
+    if outbox_purge:
+        outbox_purge.cancel()
+    # Send batched on-chain updates before their outbox workers go away
+    await onchain_batcher.close()
+    await post_trade_outbox.stop()
+    from ..tasks.clan_battle_monitor import stop_battle_monitor
     await stop_battle_monitor()
     logger.log_structured(
         level="INFO", 
         event="app_shutdown", 
         message="Clan battle monitor stopped"
     )
+    logger.close()
 
 
-app = FastAPI(title="AstraTrade Backend API", version="1.0.0", lifespan=lifespan)
+app = FastAPI(
+    title="AstraTrade Backend API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
-limiter = Limiter(key_func=get_remote_address)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # Initialize Sentry (replace the DSN with your real value in production)
 sentry_sdk.init(
     dsn=settings.sentry_dsn,  # Get DSN from settings
-    traces_sample_rate=1.0,  # Adjust in production
+    traces_sampler=traces_sampler,
+    before_send_transaction=before_send_transaction,
+    integrations=[SqlalchemyIntegration()],  # DB query spans
     environment=settings.environment,
 )
 
@@ -92,41 +173,16 @@ if settings.environment == "production":
 else:
     app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
 
-logger = StructuredLogger("AstraTradeAPI")
-
-# Include Phase 3 API routers
-app.include_router(constellations_router, prefix="/api/v1")
-app.include_router(prestige_router, prefix="/api/v1")
-app.include_router(viral_content_router, prefix="/api/v1")
-app.include_router(nft_router, prefix="/api/v1")
-
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    duration_ms = (time.time() - start_time) * 1000
-    logger.log_api_call(
-        endpoint=str(request.url.path),
-        method=request.method,
-        status_code=response.status_code,
-        duration_ms=duration_ms,
-    )
-    return response
+logger = StructuredLogger(
+    "AstraTradeAPI",
+    sample_rates=settings.LOG_SAMPLE_RATES,
+    queue_size=settings.LOG_QUEUE_SIZE,
+)
+register_logger("api", logger)
 
+# Timing, structured request logging and security headers in one ASGI layer
+app.add_middleware(RequestLoggingMiddleware, logger=logger)
 
-@app.middleware("http")
-async def security_headers_middleware(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["Strict-Transport-Security"] = (
-        "max-age=63072000; includeSubDomains; preload"
-    )
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Referrer-Policy"] = "same-origin"
-    response.headers["Permissions-Policy"] = "geolocation=(), microphone=()"
-    return response
 
 
 # --- Pydantic Models ---
@@ -183,6 +239,33 @@ class LeaderboardEntry(BaseModel):
     username: str
     xp: int
     level: int
+    rank: Optional[int] = None
+
+    model_config = {"from_attributes": True}
+
+
+class LeaderboardRank(BaseModel):
+    user_id: int
+    rank: Optional[int]
+    xp: int
+    level: int
+    total_ranked: int
+
+
+class TradeHistoryItem(BaseModel):
+    id: int
+    asset: str
+    direction: str
+    amount: float
+    entry_price: Optional[float] = None
+    exit_price: Optional[float] = None
+    profit_loss: Optional[float] = 0.0
+    profit_percentage: Optional[float] = 0.0
+    status: Optional[str] = None
+    xp_gained: Optional[int] = 0
+    is_real_trade: Optional[bool] = False
+    created_at: datetime
+    completed_at: Optional[datetime] = None
 
     model_config = {"from_attributes": True}
 
@@ -201,7 +284,7 @@ class AddXPRequest(BaseModel):
 
 # --- Endpoints ---
 @app.post("/register", summary="Register a new user", response_model=UserResponse)
-@limiter.limit("5/second")
+@limiter.limit(settings.RATE_LIMIT_REGISTER)
 async def register_user(
     req: UserRegisterRequest, db: Session = Depends(get_db), request: Request = None
 ):
@@ -217,7 +300,7 @@ async def register_user(
             raise HTTPException(status_code=400, detail="Email already exists")
 
     # Create new user
-    hashed_password = get_password_hash(req.password)
+    hashed_password = await get_password_hash_async(req.password)
     user = DBUser(
         username=req.username,
         email=req.email,
@@ -227,13 +310,18 @@ async def register_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    # Ranked from the start, instead of only after their first XP grant
+    await xp_leaderboard.update(user.id, user.xp or 0, user.level or 1, user.username)
 
     return UserResponse.model_validate(user)
 
 
 @app.post("/login", summary="Login a user", response_model=UserLoginResponse)
-async def login_user(req: UserLoginRequest, db: Session = Depends(get_db)):
-    user = authenticate_user(db, req.username, req.password)
+@limiter.limit(settings.RATE_LIMIT_LOGIN)
+async def login_user(
+    req: UserLoginRequest, request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    user = await authenticate_user_async(db, req.username, req.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -259,31 +347,137 @@ async def get_current_user_info(
     return UserResponse.model_validate(current_user)
 
 
-@app.get("/users", summary="List all users", response_model=List[UserResponse])
+user_list_serializer = ListSerializer(UserResponse)
+
+
+USER_LIST_COLUMNS = (
+    DBUser.id,
+    DBUser.username,
+    DBUser.email,
+    DBUser.xp,
+    DBUser.level,
+    DBUser.wallet_address,
+    DBUser.is_active,
+)
+
+# Non-admins get the same shape with email blanked
+PUBLIC_USER_LIST_COLUMNS = tuple(
+    null().label("email") if column is DBUser.email else column for column in USER_LIST_COLUMNS
+)
+
+USER_EXPORT_CHUNK_SIZE = 5000
+
+
+def _user_list_query(
+    columns,
+    is_active: Optional[bool],
+    min_level: Optional[int],
+    max_level: Optional[int],
+    created_after: Optional[datetime],
+    created_before: Optional[datetime],
+):
+    query = select(*columns)
+    if is_active is not None:
+        query = query.where(DBUser.is_active == is_active)
+    if min_level is not None:
+        query = query.where(DBUser.level >= min_level)
+    if max_level is not None:
+        query = query.where(DBUser.level <= max_level)
+    if created_after:
+        query = query.where(DBUser.created_at >= created_after)
+    if created_before:
+        query = query.where(DBUser.created_at < created_before)
+    return query
+
+
+async def _export_users_ndjson(query):
+    """Stream every matching user as NDJSON, in primary-key chunks."""
+    # The request's session is closed before a streaming body is sent; use our own
+    last_id = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            rows = (await db.execute(
+                query.where(DBUser.id > last_id).order_by(DBUser.id).limit(USER_EXPORT_CHUNK_SIZE)
+            )).all()
+            if not rows:
+                break
+            yield user_list_serializer.dump_ndjson(rows)
+            last_id = rows[-1].id
+
+
+@app.get("/users", summary="List users", response_model=List[UserResponse])
 async def get_users(
-    db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    min_level: Optional[int] = Query(None, ge=1),
+    max_level: Optional[int] = Query(None, ge=1),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+    output_format: str = Query("json", alias="format", pattern=r"^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: DBUser = Depends(get_current_active_user),
 ):
-    users = db.query(DBUser).all()
-    return [UserResponse.model_validate(user) for user in users]
+    """
+    Users ordered by id. Pages are keyset-paginated: pass the X-Next-Cursor
+    header back as `cursor`. `format=ndjson` streams every matching user
+    instead, ignoring `limit` and `cursor`.
+
+    Emails are only included for admins, and only admins can export.
+    """
+    columns = USER_LIST_COLUMNS if current_user.is_admin else PUBLIC_USER_LIST_COLUMNS
+    query = _user_list_query(columns, is_active, min_level, max_level, created_after, created_before)
+
+    if output_format == "ndjson":
+        if not current_user.is_admin:
+            raise HTTPException(status_code=403, detail="Admin privileges required")
+        return StreamingResponse(
+            _export_users_ndjson(query), media_type="application/x-ndjson"
+        )
+
+    if cursor:
+        try:
+            query = query.where(DBUser.id > decode_id_cursor(cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    rows = (await db.execute(query.order_by(DBUser.id).limit(limit + 1))).all()
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_id_cursor(rows[-1].id)
+
+    return user_list_serializer.response(rows, headers=headers)
 
 
 @app.post("/trade", summary="Place a trade", response_model=TradeResult)
+@limiter.shared_limit(settings.RATE_LIMIT_TRADE, scope="trade")
 async def place_trade(
     trade: TradeRequest,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: DBUser = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
 ):
     # Execute trade using the enhanced trading service
-    try:
+    async def execute(client_order_id: Optional[str]) -> TradeResult:
         result = await trading_service.execute_trade(
             db=db,
             user_id=current_user.id,
             asset=trade.asset,
             direction=trade.direction,
             amount=trade.amount,
+            client_order_id=client_order_id,
         )
         return TradeResult(**result)
+
+    try:
+        return await run_idempotent(
+            db, current_user.id, idempotency_key, request.url.path, trade.model_dump(), execute
+        )
+    except HTTPException:
+        raise
     except ExtendedExchangeError as e:
         raise HTTPException(status_code=400, detail=f"Exchange error: {e.message}")
     except Exception as e:
@@ -291,13 +485,16 @@ async def place_trade(
 
 
 @app.post("/trade/mock", summary="Place a mock trade", response_model=TradeResult)
+@limiter.shared_limit(settings.RATE_LIMIT_TRADE, scope="trade")
 async def place_mock_trade(
     trade: TradeRequest,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: DBUser = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
 ):
     # Execute mock trade (force simulated trading)
-    try:
+    async def execute(client_order_id: Optional[str]) -> TradeResult:
         result = await trading_service.execute_trade(
             db=db,
             user_id=current_user.id,
@@ -305,24 +502,35 @@ async def place_mock_trade(
             direction=trade.direction,
             amount=trade.amount,
             api_keys=None,  # Force simulated trading
+            client_order_id=client_order_id,
         )
         return TradeResult(**result)
+
+    try:
+        return await run_idempotent(
+            db, current_user.id, idempotency_key, request.url.path, trade.model_dump(), execute
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/trade/real", summary="Place a real trade", response_model=TradeResult)
+@limiter.shared_limit(settings.RATE_LIMIT_TRADE, scope="trade")
 async def place_real_trade(
     trade: TradeRequest,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: DBUser = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
 ):
     # Execute real trade (requires API configuration)
-    try:
-        # Get API keys from user's stored credentials
-        # For demo purposes, this will fall back to simulation if no API keys configured
-        api_keys = getattr(current_user, 'api_credentials', None)
-        
+    # Get API keys from user's stored credentials
+    # For demo purposes, this will fall back to simulation if no API keys configured
+    api_keys = getattr(current_user, 'api_credentials', None)
+
+    async def execute(client_order_id: Optional[str]) -> TradeResult:
         result = await trading_service.execute_trade(
             db=db,
             user_id=current_user.id,
@@ -330,8 +538,16 @@ async def place_real_trade(
             direction=trade.direction,
             amount=trade.amount,
             api_keys=api_keys,
+            client_order_id=client_order_id,
         )
         return TradeResult(**result)
+
+    try:
+        return await run_idempotent(
+            db, current_user.id, idempotency_key, request.url.path, trade.model_dump(), execute
+        )
+    except HTTPException:
+        raise
     except ExtendedExchangeError as e:
         raise HTTPException(status_code=400, detail=f"Exchange error: {e.message}")
     except Exception as e:
@@ -341,27 +557,42 @@ async def place_real_trade(
 @app.get(
     "/leaderboard", summary="Get leaderboard", response_model=List[LeaderboardEntry]
 )
-async def get_leaderboard(db: Session = Depends(get_db)):
-    users = db.query(DBUser).order_by(DBUser.xp.desc()).limit(100).all()
-    return [
-        LeaderboardEntry(
-            user_id=user.id, username=user.username, xp=user.xp, level=user.level
-        )
-        for user in users
-    ]
+async def get_leaderboard(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+):
+    try:
+        entries, next_cursor = await xp_leaderboard.get_page(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [LeaderboardEntry(**entry) for entry in entries]
+
+
+@app.get(
+    "/leaderboard/me", summary="Get current user's rank", response_model=LeaderboardRank
+)
+async def get_my_rank(current_user: DBUser = Depends(get_current_active_user)):
+    return LeaderboardRank(
+        user_id=current_user.id,
+        rank=await xp_leaderboard.get_rank(current_user.id),
+        xp=current_user.xp,
+        level=current_user.level,
+        total_ranked=await xp_leaderboard.size(),
+    )
 
 
 @app.post("/xp/add", summary="Add XP to current user")
 async def add_xp(
     req: AddXPRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: DBUser = Depends(get_current_active_user),
 ):
-    current_user.xp += req.amount
-    current_user.level = 1 + current_user.xp // 100
-    db.commit()
+    new_xp, new_level = await xp_ledger.apply(db, current_user.id, req.amount)
 
-    return {"status": "ok", "new_xp": current_user.xp, "new_level": current_user.level}
+    return {"status": "ok", "new_xp": new_xp, "new_level": new_level}
 
 
 @app.get(
@@ -378,18 +609,77 @@ async def get_portfolio_balance(
     )
 
 
-@app.get("/trades", summary="Get user's trade history")
+# Columns the app renders in trade history; avoids loading full ORM rows
+trade_history_serializer = ListSerializer(TradeHistoryItem)
+
+TRADE_HISTORY_COLUMNS = (
+    DBTrade.id,
+    DBTrade.asset,
+    DBTrade.direction,
+    DBTrade.amount,
+    DBTrade.entry_price,
+    DBTrade.exit_price,
+    DBTrade.profit_loss,
+    DBTrade.profit_percentage,
+    DBTrade.status,
+    DBTrade.xp_gained,
+    DBTrade.is_real_trade,
+    DBTrade.created_at,
+    DBTrade.completed_at,
+)
+
+
+@app.get(
+    "/trades",
+    summary="Get user's trade history",
+    response_model=List[TradeHistoryItem],
+)
 async def get_trades(
-    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    asset: Optional[str] = Query(None),
+    trade_status: Optional[str] = Query(None, alias="status"),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: DBUser = Depends(get_current_active_user),
 ):
-    trades = (
-        db.query(DBTrade)
-        .filter(DBTrade.user_id == current_user.id)
-        .order_by(DBTrade.created_at.desc())
-        .all()
+    # Keyset pagination on (created_at, id), served by ix_trades_user_id_created_at
+    query = select(*TRADE_HISTORY_COLUMNS).where(DBTrade.user_id == current_user.id)
+
+    if asset:
+        query = query.where(DBTrade.asset == asset)
+    if trade_status:
+        query = query.where(DBTrade.status == trade_status)
+    if start_date:
+        query = query.where(DBTrade.created_at >= start_date)
+    if end_date:
+        query = query.where(DBTrade.created_at < end_date)
+
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_keyset_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(
+            or_(
+                DBTrade.created_at < cursor_created_at,
+                and_(DBTrade.created_at == cursor_created_at, DBTrade.id < cursor_id),
+            )
+        )
+
+    result = await db.execute(
+        query.order_by(DBTrade.created_at.desc(), DBTrade.id.desc()).limit(limit + 1)
     )
-    return trades
+    rows = result.all()
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_keyset_cursor(last.created_at, last.id)
+
+    return trade_history_serializer.response(rows, headers=headers)
 
 
 Instrumentator().instrument(app).expose(app)
@@ -400,90 +690,70 @@ async def health_check():
     return {"status": "ok", "timestamp": datetime.utcnow()}
 # Daily rewards system for mobile gamification
 @app.post('/rewards/daily', summary="Award daily rewards to active users")
-async def award_daily_rewards(db: Session = Depends(get_db)):
+async def award_daily_rewards(
+    background_tasks: BackgroundTasks,
+    chunk_size: int = Query(5000, ge=100, le=50000),
+    admin: DBUser = Depends(get_current_admin_user),
+):
     """
     Award daily rewards to users based on their activity and streaks.
-    Mobile-first implementation for gamified trading experience.
+    Runs as a chunked background job; poll /rewards/daily/{job_id} for progress.
+    Progress lives in the worker that started the job (see services.job_registry).
+    Admin only; returns 409 while another daily rewards job is running.
     """
     try:
-        # Get all users who logged in today
-        today = date.today()
-        yesterday = today - timedelta(days=1)
-        
-        # Find users with activity in the last 24 hours
-        recent_trades = db.query(DBTrade).filter(
-            DBTrade.created_at >= yesterday
-        ).all()
-        
-        active_users = set(trade.user_id for trade in recent_trades)
-        
-        rewards_awarded = 0
-        total_xp_awarded = 0
-        
-        for user_id in active_users:
-            user = db.query(DBUser).filter(DBUser.id == user_id).first()
-            if not user:
-                continue
-                
-            # Calculate daily reward based on activity level
-            user_trades_today = [t for t in recent_trades if t.user_id == user_id]
-            base_daily_xp = 50  # Base daily login bonus
-            
-            # Activity multiplier based on number of trades
-            activity_multiplier = min(1.0 + (len(user_trades_today) * 0.1), 3.0)
-            
-            # Streak bonus calculation
-            current_streak = getattr(user, 'daily_streak', 0)
-            streak_bonus = min(current_streak * 5, 100)  # Max 100 XP streak bonus
-            
-            # Calculate total daily reward
-            daily_xp = int(base_daily_xp * activity_multiplier + streak_bonus)
-            
-            # Award the XP
-            user.xp = (user.xp or 0) + daily_xp
-            
-            # Update streak (simplified - in production would check actual daily activity)
-            user.daily_streak = current_streak + 1
-            
-            # Add daily reward record (if table exists)
-            try:
-                daily_reward = DailyReward(
-                    user_id=user_id,
-                    reward_date=today,
-                    xp_awarded=daily_xp,
-                    streak_bonus=streak_bonus,
-                    activity_multiplier=activity_multiplier
-                )
-                db.add(daily_reward)
-            except:
-                # Table might not exist, skip record keeping
-                pass
-            
-            rewards_awarded += 1
-            total_xp_awarded += daily_xp
-        
-        # Commit all changes
-        db.commit()
-        
-        return {
-            "status": "success",
-            "rewards_awarded": rewards_awarded,
-            "total_xp_awarded": total_xp_awarded,
-            "active_users": len(active_users),
-            "reward_date": today.isoformat(),
-            "message": f"Daily rewards awarded to {rewards_awarded} active mobile users"
-        }
-        
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Daily rewards error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to award daily rewards: {str(e)}")
+        job = create_daily_rewards_job(chunk_size=chunk_size)
+    except DailyRewardsInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    background_tasks.add_task(job.run)
+    return {
+        "status": "scheduled",
+        "job_id": job.job_id,
+        "reward_date": job.reward_date.isoformat(),
+        "message": "Daily rewards job scheduled for active mobile users"
+    }
+
+
+@app.get('/rewards/daily/{job_id}', summary="Get daily rewards job progress")
+async def get_daily_rewards_progress(job_id: str, admin: DBUser = Depends(get_current_admin_user)):
+    # Process-local registry: 404 on workers other than the one running the job
+    job = daily_reward_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Daily rewards job not found")
+    return job.progress()
+
+
+@app.post('/stats/reconcile', summary="Recompute user game stats from trades")
+async def reconcile_game_stats(
+    background_tasks: BackgroundTasks,
+    chunk_size: int = Query(1000, ge=100, le=50000),
+    admin: DBUser = Depends(get_current_admin_user),
+):
+    """
+    Repair drift in the denormalized user_game_stats counters.
+    Runs as a chunked background job; poll /stats/reconcile/{job_id} for progress.
+    Admin only; returns 409 while another reconciliation is running.
+    """
+    try:
+        job = create_reconciliation_job(chunk_size=chunk_size)
+    except ReconciliationInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    background_tasks.add_task(job.run)
+    return {"status": "scheduled", "job_id": job.job_id}
+
+
+@app.get('/stats/reconcile/{job_id}', summary="Get game stats reconciliation progress")
+async def get_reconcile_progress(job_id: str, admin: DBUser = Depends(get_current_admin_user)):
+    job = game_stats_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Reconciliation job not found")
+    return job.progress()
 
 # Mobile-specific gamification endpoint
 @app.post('/mobile/daily-check-in', summary="Mobile daily check-in for bonus XP")
 async def mobile_daily_checkin(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Mobile-optimized daily check-in system for consistent engagement.
@@ -512,22 +782,17 @@ async def mobile_daily_checkin(
             checkin_xp += 25  # 3-day bonus
             
         # Update user
-        user = db.query(DBUser).filter(DBUser.id == user_id).first()
-        if user:
-            user.xp = (user.xp or 0) + checkin_xp
-            user.last_checkin = today
-            user.consecutive_checkins = consecutive_days
-            db.commit()
+        total_xp, _ = await xp_ledger.apply(db, user_id, checkin_xp)
         
         return {
             "status": "success",
             "xp_awarded": checkin_xp,
             "consecutive_days": consecutive_days,
-            "total_xp": (user.xp or 0),
+            "total_xp": total_xp,
             "message": f"Daily check-in complete! +{checkin_xp} XP"
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Mobile check-in error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Check-in failed: {str(e)}")
@@ -0,0 +1,270 @@
+"""
+Application Metrics
+Prometheus collectors exposed on the Instrumentator's /metrics endpoint
+"""
+
+import functools
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .database import engine, async_engine
+
+
+# Password hashing executor (auth.auth)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "astratrade_password_hash_queue_depth", "bcrypt operations waiting for a worker"
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "astratrade_password_hash_in_flight", "bcrypt operations currently running"
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "astratrade_password_hash_seconds",
+    "bcrypt hash/verify duration",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0),
+)
+
+
+# Startup pipeline (core.startup), last boot's duration per stage
+STARTUP_STAGE_SECONDS = Gauge(
+    "astratrade_startup_stage_seconds", "Duration of each startup stage", ["stage"]
+)
+
+
+# Trade execution (services.trading_service.execute_trade), one series per phase
+TRADE_PHASE_SECONDS = Histogram(
+    "astratrade_trade_phase_seconds",
+    "Duration of each trade execution phase",
+    ["phase", "mode"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+# Extended Exchange API calls, labelled by endpoint template
+EXCHANGE_REQUEST_SECONDS = Histogram(
+    "astratrade_exchange_request_seconds",
+    "Extended Exchange API call latency",
+    ["method", "endpoint", "status"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+# Post-trade outbox workers (services.post_trade_outbox)
+POST_TRADE_TASKS = Counter(
+    "astratrade_post_trade_tasks_total",
+    "Post-trade task attempts by outcome (done, retry, failed, lease_lost)",
+    ["task_type", "outcome"],
+)
+POST_TRADE_TASK_LAG_SECONDS = Histogram(
+    "astratrade_post_trade_task_lag_seconds",
+    "Time from enqueue to successful completion",
+    ["task_type"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 15.0, 60.0, 300.0),
+)
+
+
+# Batched Starknet updates (services.onchain_batcher)
+STARKNET_BATCH_CALLS = Histogram(
+    "astratrade_starknet_batch_calls",
+    "Contract calls per submitted multicall",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+STARKNET_FLUSH_SECONDS = Histogram(
+    "astratrade_starknet_flush_seconds",
+    "Multicall submission latency",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+STARKNET_MULTICALLS = Counter(
+    "astratrade_starknet_multicalls_total", "Multicall submissions by outcome", ["outcome"]
+)
+
+
+# Clan battles (services.clan_trading_service)
+BATTLE_SCORE_UPDATE_SECONDS = Histogram(
+    "astratrade_battle_score_update_seconds",
+    "Duration of a full battle score recomputation",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+# Database statements issued while serving one request
+DB_QUERIES_PER_REQUEST = Histogram(
+    "astratrade_db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+
+_STATIC_SEGMENT = re.compile(r"[a-z_]+|v\d+")
+
+
+def endpoint_label(path: str) -> str:
+    """Collapse ids, symbols and assets in an API path so labels stay low-cardinality."""
+    return "/".join(
+        segment if not segment or _STATIC_SEGMENT.fullmatch(segment) else ":param"
+        for segment in path.split("/")
+    )
+
+
+def observe_duration(histogram: Histogram) -> Callable:
+    """Record a coroutine's wall-clock duration in `histogram`."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class RequestQueryStats:
+    """Statements executed on behalf of the current request."""
+
+    def __init__(self, track_statements: bool = False):
+        self.count = 0
+        # Statement texts, kept only when the N+1 detector (core.query_budget) is on
+        self.statements: Optional[List[str]] = [] if track_statements else None
+        self._token = None
+
+
+_request_queries: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_queries", default=None)
+
+
+def begin_request_queries(track_statements: bool = False) -> RequestQueryStats:
+    """Start counting statements for the current request context."""
+    stats = RequestQueryStats(track_statements)
+    stats._token = _request_queries.set(stats)
+    return stats
+
+
+def end_request_queries(stats: RequestQueryStats):
+    """Stop counting into `stats`, restoring any enclosing counter."""
+    _request_queries.reset(stats._token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_request_query(conn, cursor, statement, parameters, context, executemany):
+    # Fires for the sync engine and for the async engine's underlying sync engine
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.count += 1
+        if stats.statements is not None:
+            stats.statements.append(statement)
+
+
+class CacheStatsCollector:
+    """Reads hit/miss counters off registered caches at scrape time, so lookups pay nothing."""
+
+    def __init__(self):
+        self._caches: Dict[str, Any] = {}
+
+    def register(self, name: str, cache: Any):
+        self._caches[name] = cache
+
+    def collect(self):
+        hits = CounterMetricFamily("astratrade_cache_hits", "Cache lookups served from cache", labels=["cache"])
+        misses = CounterMetricFamily("astratrade_cache_misses", "Cache lookups that missed", labels=["cache"])
+        ratio = GaugeMetricFamily("astratrade_cache_hit_ratio", "Lifetime cache hit ratio", labels=["cache"])
+        for name, cache in self._caches.items():
+            total = cache.hits + cache.misses
+            hits.add_metric([name], cache.hits)
+            misses.add_metric([name], cache.misses)
+            ratio.add_metric([name], cache.hits / total if total else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+
+
+cache_stats = CacheStatsCollector()
+REGISTRY.register(cache_stats)
+
+
+def register_cache(name: str, cache: Any):
+    """Expose a cache's `hits`/`misses` attributes on /metrics."""
+    cache_stats.register(name, cache)
+
+
+class LoggerStatsCollector:
+    """Reads StructuredLogger queue depth and drop/sampling counters at scrape time."""
+
+    def __init__(self):
+        self._loggers: Dict[str, Any] = {}
+
+    def register(self, name: str, logger: Any):
+        self._loggers[name] = logger
+
+    def collect(self):
+        queued = GaugeMetricFamily(
+            "astratrade_log_queue_depth", "Log records waiting for the listener thread", labels=["logger"]
+        )
+        dropped = CounterMetricFamily(
+            "astratrade_log_records_dropped", "Log records dropped because the queue was full", labels=["logger"]
+        )
+        sampled_out = CounterMetricFamily(
+            "astratrade_log_records_sampled_out", "Log records skipped by LOG_SAMPLE_RATES", labels=["logger"]
+        )
+        for name, logger in self._loggers.items():
+            stats = logger.stats()
+            queued.add_metric([name], stats["queued"])
+            dropped.add_metric([name], stats["dropped"])
+            sampled_out.add_metric([name], stats["sampled_out"])
+        yield queued
+        yield dropped
+        yield sampled_out
+
+
+logger_stats = LoggerStatsCollector()
+REGISTRY.register(logger_stats)
+
+
+def register_logger(name: str, logger: Any):
+    """Expose a StructuredLogger's `stats()` on /metrics."""
+    logger_stats.register(name, logger)
+
+
+class PoolStatsCollector:
+    """Reads connection pool counters at scrape time, labelled by engine ("sync" / "async").
+
+    Values are current even while every request is blocked waiting on an
+    exhausted pool.
+    """
+
+    def __init__(self, engines: Dict[str, Engine]):
+        self._engines = engines
+
+    def collect(self):
+        size = GaugeMetricFamily("astratrade_db_pool_size", "Configured connection pool size", labels=["engine"])
+        checked_out = GaugeMetricFamily(
+            "astratrade_db_pool_checked_out", "Connections currently checked out", labels=["engine"]
+        )
+        idle = GaugeMetricFamily("astratrade_db_pool_idle", "Idle connections held in the pool", labels=["engine"])
+        overflow = GaugeMetricFamily(
+            "astratrade_db_pool_overflow", "Connections opened beyond pool_size", labels=["engine"]
+        )
+        for label, db_engine in self._engines.items():
+            # Read per scrape: dispose() swaps the engine's pool
+            pool = db_engine.pool
+            # Pools without sizing (SQLite's NullPool/StaticPool) have nothing to report
+            if not hasattr(pool, "checkedout"):
+                continue
+            size.add_metric([label], pool.size())
+            checked_out.add_metric([label], pool.checkedout())
+            idle.add_metric([label], pool.checkedin())
+            overflow.add_metric([label], max(0, pool.overflow()))
+        yield size
+        yield checked_out
+        yield idle
+        yield overflow
+
+
+REGISTRY.register(PoolStatsCollector({"sync": engine, "async": async_engine.sync_engine}))
@@ -0,0 +1,76 @@
+"""
+Request Middleware
+Pure-ASGI middleware that times requests, counts their SQL statements, writes
+the structured API log and adds security headers in a single pass. It wraps `send` rather than the
+response body, so streaming responses pass through untouched.
+"""
+
+import time
+
+from .config import settings
+from .metrics import DB_QUERIES_PER_REQUEST, begin_request_queries, end_request_queries
+from .query_budget import check_query_budget, route_budget
+
+SECURITY_HEADERS = [
+    (b"strict-transport-security", b"max-age=63072000; includeSubDomains; preload"),
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"same-origin"),
+    (b"permissions-policy", b"geolocation=(), microphone=()"),
+]
+_SECURITY_HEADER_NAMES = {name for name, _ in SECURITY_HEADERS}
+
+
+def route_name(scope) -> str:
+    """Matched route template (e.g. /api/v1/constellations/{constellation_id})."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RequestLoggingMiddleware:
+    """Timing, query counting, structured logging and security headers for HTTP requests."""
+
+    def __init__(self, app, logger):
+        self.app = app
+        self.logger = logger
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+        queries = begin_request_queries(track_statements=settings.QUERY_DETECTOR_ENABLED)
+
+        async def send_with_headers(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Security headers replace any the route set itself
+                headers = [
+                    (name, value)
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in _SECURITY_HEADER_NAMES
+                ]
+                headers.extend(SECURITY_HEADERS)
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            # Logged once the response has fully streamed, so duration covers the body too
+            end_request_queries(queries)
+            route = route_name(scope)
+            DB_QUERIES_PER_REQUEST.labels(route=route).observe(queries.count)
+            self.logger.log_api_call(
+                endpoint=scope["path"],
+                method=scope["method"],
+                status_code=status_code,
+                duration_ms=(time.perf_counter() - start_time) * 1000,
+                db_queries=queries.count,
+            )
+        if settings.QUERY_DETECTOR_ENABLED:
+            check_query_budget(queries, f'{scope["method"]} {route}', route_budget(scope))
@@ -0,0 +1,83 @@
+"""
+Query Budget
+Opt-in N+1 detection for development and tests. With QUERY_DETECTOR_ENABLED,
+every request records the shape of each SQL statement it runs. Shapes that
+repeat QUERY_REPEAT_THRESHOLD times or more are logged with the route name, as
+are routes that exceed the budget declared with @query_budget. With
+QUERY_BUDGET_STRICT set, an over-budget request raises QueryBudgetExceeded.
+That exception reaches the test client and fails the test.
+"""
+
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Tuple
+
+from .config import settings
+from .metrics import RequestQueryStats, begin_request_queries, end_request_queries
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request or block ran more SQL statements than its declared budget."""
+
+
+def query_budget(max_queries: int) -> Callable:
+    """Declare the most statements a route may run. Place below the router decorator."""
+    def decorator(func: Callable) -> Callable:
+        func.__query_budget__ = max_queries
+        return func
+    return decorator
+
+
+def statement_shape(statement: str) -> str:
+    """Statements are already parameterized; collapsing whitespace is enough to group them."""
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def repeated_statements(stats: RequestQueryStats, threshold: int) -> List[Tuple[str, int]]:
+    """Statement shapes executed at least `threshold` times, most frequent first."""
+    if not stats.statements:
+        return []
+    counts = Counter(statement_shape(s) for s in stats.statements)
+    return [(shape, n) for shape, n in counts.most_common() if n >= threshold]
+
+
+def check_query_budget(stats: RequestQueryStats, route: str, budget: Optional[int]):
+    """Log N+1 candidates and enforce `budget` for a finished request or block."""
+    for shape, count in repeated_statements(stats, settings.QUERY_REPEAT_THRESHOLD):
+        logger.warning(f"Possible N+1 on {route}: {count}x {shape[:200]}")
+
+    if budget is None or stats.count <= budget:
+        return
+    message = f"{route} ran {stats.count} queries, budget is {budget}"
+    logger.warning(message)
+    if settings.QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+
+
+def route_budget(scope) -> Optional[int]:
+    """Budget declared on the matched endpoint, else QUERY_BUDGET_DEFAULT."""
+    endpoint = scope.get("endpoint")
+    return getattr(endpoint, "__query_budget__", settings.QUERY_BUDGET_DEFAULT)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, label: str = "block"):
+    """
+    Fail if the enclosed code runs more than `max_queries` statements, e.g.
+    around a service call in a unit test. Always strict.
+    """
+    stats = begin_request_queries(track_statements=True)
+    try:
+        yield stats
+    finally:
+        end_request_queries(stats)
+    for shape, count in repeated_statements(stats, settings.QUERY_REPEAT_THRESHOLD):
+        logger.warning(f"Possible N+1 in {label}: {count}x {shape[:200]}")
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(f"{label} ran {stats.count} queries, budget is {max_queries}")
@@ -0,0 +1,37 @@
+"""
+Rate Limiting
+Shared slowapi limiter. Counters live in Redis when configured, so limits
+hold across workers and restarts, with an in-memory fallback if Redis is
+unreachable. The moving-window strategy counts a true sliding window in one
+Redis round-trip. Authenticated requests are keyed by user, anonymous ones by
+client address.
+"""
+
+from fastapi import Request
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from ..auth.auth import verify_token
+from .config import settings
+
+
+def rate_limit_key(request: Request) -> str:
+    """Bearer token subject when present and valid, else the client address."""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        subject = verify_token(token)
+        if subject:
+            return f"user:{subject}"
+    return f"ip:{get_remote_address(request)}"
+
+
+limiter = Limiter(
+    key_func=rate_limit_key,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI or settings.REDIS_URL or "memory://",
+    strategy="moving-window",
+    in_memory_fallback_enabled=True,
+    key_prefix="ratelimit",
+    # Count per endpoint rather than per URL, so path params share one limit
+    key_style="endpoint",
+)
@@ -0,0 +1,267 @@
+"""
+Response Cache
+Caches serialized JSON bodies of public GET endpoints with per-route TTLs,
+ETag/If-None-Match revalidation and namespace invalidation on writes.
+In-memory LRU by default, Redis when REDIS_URL is configured.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import Request, Response, params
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from .config import settings
+from .metrics import register_cache
+
+logger = logging.getLogger(__name__)
+
+# (body, etag)
+CachedBody = Tuple[bytes, str]
+
+
+class MemoryResponseCache:
+    """Process-local LRU cache with per-entry expiry.
+
+    Every stored key is in exactly one namespace set, and leaves it when the
+    entry expires, is evicted or is invalidated, so memory stays bounded by
+    `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        # key -> (expires_at, namespace, value)
+        self._entries: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+        self._namespaces: Dict[str, Set[str]] = {}
+
+    def _discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        namespace = entry[1]
+        keys = self._namespaces.get(namespace)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._namespaces[namespace]
+
+    async def get(self, namespace: str, key: str) -> Optional[CachedBody]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, namespace: str, key: str, value: CachedBody, ttl: int):
+        self._discard(key)
+        self._entries[key] = (time.monotonic() + ttl, namespace, value)
+        self._namespaces.setdefault(namespace, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._discard(next(iter(self._entries)))
+
+    async def invalidate(self, namespace: str):
+        for key in self._namespaces.pop(namespace, set()):
+            self._entries.pop(key, None)
+
+
+class RedisResponseCache:
+    """Cache shared across workers; entries expire via Redis TTLs."""
+
+    def __init__(self, redis_url: str):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(redis_url)
+
+    async def get(self, namespace: str, key: str) -> Optional[CachedBody]:
+        cached = await self.redis.hmget(key, "body", "etag")
+        if cached[0] is None:
+            return None
+        return cached[0], cached[1].decode()
+
+    async def set(self, namespace: str, key: str, value: CachedBody, ttl: int):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={"body": value[0], "etag": value[1]})
+            pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def invalidate(self, namespace: str):
+        cursor = 0
+        while True:
+            cursor, keys = await self.redis.scan(cursor, match=f"respcache:{namespace}:*", count=100)
+            if keys:
+                await self.redis.delete(*keys)
+            if cursor == 0:
+                break
+
+
+class ResponseCache:
+    """Front for the configured backend, tracking hit/miss counts."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, namespace: str, key: str) -> Optional[CachedBody]:
+        try:
+            value = await self.backend.get(namespace, key)
+        except Exception as e:
+            logger.error(f"Response cache read failed for {key}: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, namespace: str, key: str, value: CachedBody, ttl: int):
+        try:
+            await self.backend.set(namespace, key, value, ttl)
+        except Exception as e:
+            logger.error(f"Response cache write failed for {key}: {e}")
+
+    async def invalidate(self, *namespaces: str):
+        """Drop every cached response in the given namespaces."""
+        for namespace in namespaces:
+            try:
+                await self.backend.invalidate(namespace)
+            except Exception as e:
+                logger.error(f"Response cache invalidation failed for {namespace}: {e}")
+
+
+def _create_backend():
+    if settings.REDIS_URL:
+        try:
+            return RedisResponseCache(settings.REDIS_URL)
+        except Exception as e:
+            logger.error(f"Redis response cache unavailable, using in-memory cache: {e}")
+    return MemoryResponseCache()
+
+
+response_cache = ResponseCache(_create_backend())
+register_cache("response", response_cache)
+
+
+def _key_parameters(signature: inspect.Signature) -> List[str]:
+    """The endpoint's own path/query parameters; dependencies and the request don't vary the body."""
+    return [
+        name for name, parameter in signature.parameters.items()
+        if name != "request" and not isinstance(parameter.default, params.Depends)
+    ]
+
+
+def _cache_key(namespace: str, endpoint: str, values: Dict[str, Any]) -> str:
+    # Only declared, already-validated parameters: unknown query strings can't mint new keys
+    query = "&".join(f"{name}={value}" for name, value in values.items())
+    return f"respcache:{namespace}:{endpoint}?{query}"
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def _parameter_default(parameter: inspect.Parameter) -> Any:
+    default = parameter.default
+    return default.default if isinstance(default, params.Param) else default
+
+
+async def _resolve_dependency(stack: AsyncExitStack, dependency: Callable) -> Any:
+    """Enter a plain (sub-dependency free) FastAPI dependency outside a request."""
+    if inspect.isasyncgenfunction(dependency):
+        return await stack.enter_async_context(asynccontextmanager(dependency)())
+    if inspect.isgeneratorfunction(dependency):
+        return stack.enter_context(contextmanager(dependency)())
+    if inspect.iscoroutinefunction(dependency):
+        return await dependency()
+    return dependency()
+
+
+def cached_response(namespace: str, ttl: int, response_model: Any = None) -> Callable:
+    """
+    Cache a public GET endpoint's JSON body for `ttl` seconds under `namespace`.
+
+    Place it below the router decorator. Pass `response_model` when the
+    endpoint returns ORM objects so they are serialized the same way the
+    route's own response_model would.
+
+    The wrapped endpoint gets a `warm(**values)` coroutine that fills the entry
+    for the given parameters (the rest take their defaults) without a request.
+    """
+    adapter = TypeAdapter(response_model) if response_model is not None else None
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        endpoint = f"{func.__module__}.{func.__qualname__}"
+        key_parameters = _key_parameters(signature)
+        has_request = "request" in signature.parameters
+        parameters = list(signature.parameters.values())
+        if not has_request:
+            parameters.append(inspect.Parameter(
+                "request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+            ))
+
+        async def render(key: str, kwargs: Dict[str, Any]) -> Any:
+            """Run the endpoint and cache its body. Returns (body, etag), or a Response to pass through."""
+            result = await func(**kwargs)
+            if isinstance(result, Response):
+                return result
+            if adapter is not None:
+                body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+            else:
+                body = json.dumps(jsonable_encoder(result)).encode()
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            await response_cache.set(namespace, key, (body, etag), ttl)
+            return body, etag
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            request: Request = kwargs["request"] if has_request else kwargs.pop("request")
+            key = _cache_key(namespace, endpoint, {name: kwargs.get(name) for name in key_parameters})
+
+            cached = await response_cache.get(namespace, key)
+            if cached is None:
+                cached = await render(key, kwargs)
+                if isinstance(cached, Response):
+                    return cached
+
+            body, etag = cached
+            headers = {"ETag": etag, "Cache-Control": f"public, max-age={ttl}"}
+            if _etag_matches(request, etag):
+                return Response(status_code=304, headers=headers)
+            return Response(content=body, media_type="application/json", headers=headers)
+
+        async def warm(**values):
+            if has_request:
+                raise TypeError(f"{endpoint} takes the request and can't be warmed outside one")
+            async with AsyncExitStack() as stack:
+                kwargs = {}
+                for name, parameter in signature.parameters.items():
+                    if name in values:
+                        kwargs[name] = values[name]
+                    elif isinstance(parameter.default, params.Depends):
+                        kwargs[name] = await _resolve_dependency(stack, parameter.default.dependency)
+                    else:
+                        kwargs[name] = _parameter_default(parameter)
+                await render(_cache_key(namespace, endpoint, {name: kwargs[name] for name in key_parameters}), kwargs)
+
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        wrapper.warm = warm
+        return wrapper
+
+    return decorator
@@ -0,0 +1,73 @@
+"""
+Serialization
+Fast JSON paths for large responses. ORJSONResponse is the app's default
+response class. List endpoints that select a column projection go further with
+ListSerializer: one TypeAdapter(List[Model]) validates the whole page and dumps
+it to JSON in pydantic-core, instead of a model_validate call per row plus
+FastAPI's response_model pass.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+
+def _accepts_none(annotation: Any) -> bool:
+    try:
+        TypeAdapter(annotation).validate_python(None)
+        return True
+    except ValidationError:
+        return False
+
+
+class ListSerializer:
+    """Bulk serializer for projected rows shaped like `item_type`.
+
+    Rows must come from a select whose column labels match the model's fields.
+    Every page is validated against `item_type`, so the output has exactly the
+    model's fields and types. A NULL in a field that doesn't accept None is
+    replaced by the field's default before validation.
+    """
+
+    def __init__(self, item_type: Type[BaseModel]):
+        self.adapter = TypeAdapter(List[item_type])
+        self.names = list(item_type.model_fields)
+        self.null_defaults = [
+            (name, field.get_default())
+            for name, field in item_type.model_fields.items()
+            if not field.is_required() and not _accepts_none(field.annotation)
+        ]
+
+    def _with_defaults(self, row: Any) -> Any:
+        """The row as is, or as a dict with its NULLs defaulted if it has any."""
+        for name, _ in self.null_defaults:
+            if getattr(row, name) is None:
+                item = {name: getattr(row, name) for name in self.names}
+                for field, default in self.null_defaults:
+                    if item[field] is None:
+                        item[field] = default
+                return item
+        return row
+
+    def validate(self, rows: Iterable[Any]) -> List[BaseModel]:
+        """Rows -> validated models, in one pydantic-core call."""
+        if self.null_defaults:
+            rows = [self._with_defaults(row) for row in rows]
+        return self.adapter.validate_python(rows, from_attributes=True)
+
+    def dump_json(self, rows: Iterable[Any]) -> bytes:
+        """Row tuples (or objects) with matching attribute names -> JSON array bytes."""
+        return self.adapter.dump_json(self.validate(rows))
+
+    def dump_ndjson(self, rows: Iterable[Any]) -> bytes:
+        """Same rows as newline-delimited JSON, one object per line."""
+        return b"".join(model.model_dump_json().encode() + b"\n" for model in self.validate(rows))
+
+    def response(self, rows: Iterable[Any], headers: Optional[Dict[str, str]] = None) -> Response:
+        return Response(content=self.dump_json(rows), media_type="application/json", headers=headers)
+
+
+def model_response(model: BaseModel, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Serialize an already-built response model without FastAPI re-validating it."""
+    return Response(content=model.model_dump_json(), media_type="application/json", headers=headers)
@@ -0,0 +1,163 @@
+"""
+Startup Pipeline
+Staged startup run from the application lifespan:
+- schema: skips DDL when Alembic migrations are current
+- routers: imports only the enabled optional routers; one that fails to
+  import is logged and skipped along with its cache warmers
+- warm_caches: rebuilds the leaderboard and primes cached public reads
+  concurrently, calling the endpoints in-process
+Stage timings are logged and exported so slow pod readiness can be traced to
+a stage. Background services start after readiness.
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterable, List, Tuple
+
+from fastapi import FastAPI
+
+from .database import AsyncSessionLocal, create_tables, engine
+from .metrics import STARTUP_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Optional router name -> module, relative to this package; imported only when enabled
+OPTIONAL_ROUTERS = {
+    "constellations": "..api.v1.trading.constellations",
+    "prestige": "..api.v1.trading.prestige",
+    "viral_content": "..api.v1.trading.viral_content",
+    "nft": "..api.v1.trading.nft_integration",
+}
+
+# Warm-up name -> (optional router, @cached_response endpoint in its module)
+CACHE_WARMERS = {
+    "constellations": ("constellations", "list_constellations"),
+    "prestige_leaderboard": ("prestige", "get_dual_leaderboard"),
+    "prestige_badges": ("prestige", "get_available_badges"),
+}
+
+
+class StartupTimer:
+    """Records the wall-clock duration of each startup stage."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = round(elapsed * 1000, 1)
+            STARTUP_STAGE_SECONDS.labels(stage=name).set(elapsed)
+
+    @property
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.started_at) * 1000, 1)
+
+
+def migrations_current() -> bool:
+    """True when the database is stamped at every Alembic head."""
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with engine.connect() as conn:
+        current = set(MigrationContext.configure(conn).get_current_heads())
+    return current == heads
+
+
+async def ensure_schema() -> str:
+    """Run create_all only for databases Alembic isn't managing (or hasn't caught up)."""
+    try:
+        if await asyncio.to_thread(migrations_current):
+            return "migrations_current"
+        logger.warning("Database is not at the Alembic head; run `alembic upgrade head`")
+    except Exception as e:
+        logger.warning(f"Could not read migration state, falling back to create_all: {e}")
+    await asyncio.to_thread(create_tables)
+    return "create_all"
+
+
+def include_optional_routers(app: FastAPI, names: Iterable[str]) -> List[str]:
+    """Import and mount the enabled optional routers under /api/v1.
+
+    A router whose module can't be imported (e.g. a missing optional
+    dependency) is skipped so the rest of the app still starts. Returns the
+    names that were mounted.
+    """
+    mounted = []
+    for name in names:
+        try:
+            module = importlib.import_module(OPTIONAL_ROUTERS[name], package=__package__)
+        except Exception as e:
+            logger.error(f"Optional router {name} not mounted: {e}")
+            continue
+        app.include_router(module.router, prefix="/api/v1")
+        mounted.append(name)
+    return mounted
+
+
+async def _warm_endpoint(name: str, endpoint):
+    try:
+        await endpoint.warm()
+    except Exception as e:
+        logger.warning(f"Cache warm-up for {name} failed: {e}")
+
+
+async def warm_caches(routers: Iterable[str], names: Iterable[str]):
+    """Load the leaderboard (unless another worker already has) and prime cached GET endpoints at the same time.
+
+    Endpoints are called directly with their default parameters, so no request
+    goes through the middleware stack. Warmers whose router is disabled are skipped.
+    """
+    from ..services.leaderboard_service import rebuild_leaderboard
+
+    async def leaderboard():
+        async with AsyncSessionLocal() as db:
+            await rebuild_leaderboard(db, only_if_missing=True)
+
+    enabled = set(routers)
+    endpoints = []
+    for name in names:
+        router, attribute = CACHE_WARMERS[name]
+        if router in enabled:
+            module = importlib.import_module(OPTIONAL_ROUTERS[router], package=__package__)
+            endpoints.append(_warm_endpoint(name, getattr(module, attribute)))
+
+    await asyncio.gather(leaderboard(), *endpoints)
+
+
+async def prepare_app(
+    app: FastAPI, timer: StartupTimer, routers: Iterable[str], warm_endpoints: Iterable[str]
+) -> Tuple[str, List[str]]:
+    """Run the schema, routers and warm_caches stages; returns (schema, mounted routers)."""
+    with timer.stage("schema"):
+        schema = await ensure_schema()
+    # Phase 3 routers are imported here, and only when enabled
+    with timer.stage("routers"):
+        mounted = include_optional_routers(app, routers)
+    with timer.stage("warm_caches"):
+        await warm_caches(mounted, warm_endpoints)
+    return schema, mounted
+
+
+def start_after(delay: float, start: Callable[[], Awaitable[None]]) -> asyncio.Task:
+    """Start a background service once startup has finished and `delay` has passed."""
+    async def runner():
+        await asyncio.sleep(delay)
+        await start()
+
+    return asyncio.create_task(runner())
@@ -0,0 +1,98 @@
+"""
+Tracing
+Sentry sampling policy and span helpers. Transactions are head-sampled per
+route by `traces_sampler`; `before_send_transaction` then keeps every failed
+or slow transaction from that sample and only a fraction of the fast,
+successful ones. `traced` wraps hot-path coroutines in explicit spans.
+"""
+
+import functools
+import random
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import sentry_sdk
+
+from .config import settings
+
+# Never worth a trace: probes and scrapes
+UNTRACED_PATHS = ("/health", "/metrics")
+
+
+def _under(path: str, prefix: str) -> bool:
+    """Whether `path` is `prefix` or below it; "/trade" covers "/trade/mock" but not "/trades"."""
+    prefix = prefix.rstrip("/")
+    return path == prefix or path.startswith(prefix + "/")
+
+
+def _route_rate(path: str) -> float:
+    """Longest-prefix match against SENTRY_ROUTE_SAMPLE_RATES, falling back to the default rate."""
+    if any(_under(path, untraced) for untraced in UNTRACED_PATHS):
+        return 0.0
+    best = None
+    for prefix, rate in settings.SENTRY_ROUTE_SAMPLE_RATES.items():
+        if _under(path, prefix) and (best is None or len(prefix) > len(best[0])):
+            best = (prefix, rate)
+    return best[1] if best else settings.SENTRY_TRACES_SAMPLE_RATE
+
+
+def traces_sampler(sampling_context: Dict[str, Any]) -> float:
+    """Route-driven head sampling; distributed traces keep their parent's decision."""
+    parent_sampled = sampling_context.get("parent_sampled")
+    if parent_sampled is not None:
+        return float(parent_sampled)
+    scope = sampling_context.get("asgi_scope") or {}
+    if scope.get("type") not in (None, "http"):
+        return 0.0
+    return _route_rate(scope.get("path", ""))
+
+
+def _duration_ms(event: Dict[str, Any]) -> Optional[float]:
+    start, end = event.get("start_timestamp"), event.get("timestamp")
+    if start is None or end is None:
+        return None
+    if isinstance(start, str):
+        start, end = datetime.fromisoformat(start.rstrip("Z")), datetime.fromisoformat(end.rstrip("Z"))
+    if isinstance(start, datetime):
+        return (end - start).total_seconds() * 1000
+    return (end - start) * 1000
+
+
+def _is_error(event: Dict[str, Any]) -> bool:
+    contexts = event.get("contexts", {})
+    status_code = contexts.get("response", {}).get("status_code")
+    if status_code is not None:
+        return status_code >= 500
+    return contexts.get("trace", {}).get("status") not in (None, "ok")
+
+
+def before_send_transaction(event: Dict[str, Any], hint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Keep errors and slow transactions; thin out the fast, successful rest."""
+    if _is_error(event):
+        return event
+    duration = _duration_ms(event)
+    if duration is not None and duration >= settings.SENTRY_SLOW_TRANSACTION_MS:
+        return event
+    if random.random() < settings.SENTRY_FAST_TRANSACTION_KEEP_RATE:
+        return event
+    return None
+
+
+def request_span_name(client, method: str, endpoint: str, *args, **kwargs) -> str:
+    """Span name for API clients' `_make_request(method, endpoint, ...)`."""
+    return f"{method.upper()} {endpoint}"
+
+
+def traced(op: str, describe: Optional[Callable[..., str]] = None) -> Callable:
+    """
+    Run a coroutine inside a Sentry span. `describe` receives the call's
+    arguments and returns the span name; defaults to the function's qualname.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            name = describe(*args, **kwargs) if describe else func.__qualname__
+            with sentry_sdk.start_span(op=op, name=name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
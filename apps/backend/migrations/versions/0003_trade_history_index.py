@@ -0,0 +1,23 @@
+"""Trade history keyset index
+
+Revision ID: 0003_trade_history_index
+Revises: 0002_phase3_social_features
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers
+revision = '0003_trade_history_index'
+down_revision = '0002_phase3_social_features'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves GET /trades keyset pagination: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+    op.create_index('ix_trades_user_id_created_at', 'trades', ['user_id', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_trades_user_id_created_at', table_name='trades')
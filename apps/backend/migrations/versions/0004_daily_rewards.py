@@ -0,0 +1,39 @@
+"""Daily rewards records and streak column
+
+Revision ID: 0004_daily_rewards
+Revises: 0003_trade_history_index
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0004_daily_rewards'
+down_revision = '0003_trade_history_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('daily_streak', sa.Integer(), nullable=False, server_default='0'))
+
+    op.create_table(
+        'daily_rewards',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('reward_date', sa.Date(), nullable=False),
+        sa.Column('xp_awarded', sa.Integer(), nullable=False),
+        sa.Column('streak_bonus', sa.Integer(), default=0),
+        sa.Column('activity_multiplier', sa.Float(), default=1.0),
+        sa.Column('created_at', sa.DateTime(), default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'reward_date', name='uq_daily_rewards_user_date')
+    )
+    op.create_index(op.f('ix_daily_rewards_id'), 'daily_rewards', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_daily_rewards_id'), table_name='daily_rewards')
+    op.drop_table('daily_rewards')
+    op.drop_column('users', 'daily_streak')
@@ -0,0 +1,48 @@
+"""Indexes for hot query predicates
+
+Revision ID: 0005_hot_query_indexes
+Revises: 0004_daily_rewards
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers
+revision = '0005_hot_query_indexes'
+down_revision = '0004_daily_rewards'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, dialect kwargs); trades(user_id, created_at) already exists from 0003
+INDEXES = [
+    # Active membership lookups by user (leaderboards, spotlight, join checks)
+    ('ix_constellation_memberships_user_id_is_active', 'constellation_memberships',
+     ['user_id', 'is_active'], {}),
+    # Active member listings per constellation
+    ('ix_constellation_memberships_constellation_id_is_active', 'constellation_memberships',
+     ['constellation_id', 'is_active'], {}),
+    # Score updates and battle completion load all participations of a battle
+    ('ix_constellation_battle_participations_battle_id_constellation_id',
+     'constellation_battle_participations', ['battle_id', 'constellation_id'], {}),
+    # Joined to users on nearly every leaderboard/profile query
+    ('ix_user_game_stats_user_id', 'user_game_stats', ['user_id'], {}),
+    # NFT collections: user_id = ? AND artifact_type LIKE 'genesis_%'
+    ('ix_artifacts_user_id_artifact_type', 'artifacts', ['user_id', 'artifact_type'],
+     {'postgresql_ops': {'artifact_type': 'text_pattern_ops'}}),
+    # Public feeds: is_public = ? AND moderation_status = ? AND created_at >= ?
+    ('ix_viral_content_public_moderation_created_at', 'viral_content',
+     ['is_public', 'moderation_status', 'created_at'], {}),
+]
+
+
+def upgrade():
+    # Build concurrently on Postgres so live tables aren't write-locked
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
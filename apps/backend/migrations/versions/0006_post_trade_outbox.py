@@ -0,0 +1,43 @@
+"""Post-trade side effect outbox
+
+Revision ID: 0006_post_trade_outbox
+Revises: 0005_hot_query_indexes
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0006_post_trade_outbox'
+down_revision = '0005_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'post_trade_tasks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(), nullable=False),
+        sa.Column('task_type', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('available_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), default=sa.func.now()),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('idempotency_key', name='uq_post_trade_tasks_idempotency_key')
+    )
+    op.create_index(op.f('ix_post_trade_tasks_id'), 'post_trade_tasks', ['id'], unique=False)
+    op.create_index(
+        'ix_post_trade_tasks_status_available_at', 'post_trade_tasks', ['status', 'available_at'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_post_trade_tasks_status_available_at', table_name='post_trade_tasks')
+    op.drop_index(op.f('ix_post_trade_tasks_id'), table_name='post_trade_tasks')
+    op.drop_table('post_trade_tasks')
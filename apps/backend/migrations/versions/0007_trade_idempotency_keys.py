@@ -0,0 +1,37 @@
+"""Trade idempotency keys
+
+Revision ID: 0007_trade_idempotency_keys
+Revises: 0006_post_trade_outbox
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0007_trade_idempotency_keys'
+down_revision = '0006_post_trade_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'trade_idempotency_keys',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(), nullable=False),
+        sa.Column('request_hash', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False, server_default='in_progress'),
+        sa.Column('response_body', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), default=sa.func.now()),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'idempotency_key', name='uq_trade_idempotency_keys_user_key')
+    )
+    op.create_index(op.f('ix_trade_idempotency_keys_id'), 'trade_idempotency_keys', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_trade_idempotency_keys_id'), table_name='trade_idempotency_keys')
+    op.drop_table('trade_idempotency_keys')
@@ -0,0 +1,95 @@
+"""Unique user_game_stats.user_id
+
+Revision ID: 0008_game_stats_unique_user
+Revises: 0007_trade_idempotency_keys
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0008_game_stats_unique_user'
+down_revision = '0007_trade_idempotency_keys'
+branch_labels = None
+depends_on = None
+
+# How each column of a user's duplicate rows folds into the one kept
+MERGED_COLUMNS = {
+    'SUM': (
+        'stellar_shards', 'lumina', 'stardust',
+        'total_trades', 'successful_trades', 'total_profit_loss',
+        'total_artifacts_discovered', 'total_anomalies_participated', 'total_lottery_tickets_bought',
+    ),
+    'MAX': (
+        'best_trade_profit', 'current_streak', 'best_streak', 'last_trade_date', 'cosmic_tier',
+        'total_xp_multiplier', 'total_earning_multiplier', 'total_luck_multiplier',
+    ),
+    'MIN': ('worst_trade_loss',),
+}
+
+KEPT_ROWS = "SELECT MIN(id) FROM user_game_stats GROUP BY user_id HAVING COUNT(*) > 1"
+
+UNIQUE_INDEX = 'ix_user_game_stats_user_id'
+# Built alongside the old non-unique index, then renamed over it
+NEW_UNIQUE_INDEX = 'ix_user_game_stats_user_id_unique'
+BUILD_ATTEMPTS = 3
+
+
+def merge_duplicates():
+    """Fold every duplicate into the user's oldest row, then delete it, so no balance is lost."""
+    if op.get_bind().dialect.name == 'postgresql':
+        # Until the merge commits, so a row inserted between the UPDATE and the
+        # DELETE can't be deleted unmerged; reads continue
+        op.execute("LOCK TABLE user_game_stats IN EXCLUSIVE MODE")
+    assignments = ", ".join(
+        f"{column} = (SELECT {func}(dup.{column}) FROM user_game_stats dup "
+        f"WHERE dup.user_id = user_game_stats.user_id)"
+        for func, columns in MERGED_COLUMNS.items()
+        for column in columns
+    )
+    op.execute(f"UPDATE user_game_stats SET {assignments} WHERE id IN ({KEPT_ROWS})")
+    op.execute(
+        "DELETE FROM user_game_stats WHERE id NOT IN "
+        "(SELECT MIN(id) FROM user_game_stats GROUP BY user_id)"
+    )
+
+
+def upgrade():
+    # Concurrent first trades could each insert a row for the same user
+    if op.get_bind().dialect.name != 'postgresql':
+        merge_duplicates()
+        op.drop_index(UNIQUE_INDEX, table_name='user_game_stats')
+        op.create_index(UNIQUE_INDEX, 'user_game_stats', ['user_id'], unique=True)
+        return
+
+    # Writes continue while the unique index builds without locking the table,
+    # so a duplicate can still slip in after the merge. The build then fails
+    # and leaves an INVALID index; drop it, merge again and retry.
+    for attempt in range(1, BUILD_ATTEMPTS + 1):
+        merge_duplicates()
+        with op.get_context().autocommit_block():
+            try:
+                op.create_index(
+                    NEW_UNIQUE_INDEX, 'user_game_stats', ['user_id'],
+                    unique=True, postgresql_concurrently=True,
+                )
+                break
+            except sa.exc.IntegrityError:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {NEW_UNIQUE_INDEX}")
+                if attempt == BUILD_ATTEMPTS:
+                    raise RuntimeError(
+                        f"New duplicate user_game_stats rows appeared during each of {BUILD_ATTEMPTS} "
+                        "unique index builds; pause trade writes and rerun this migration"
+                    )
+
+    # Lookups keep an index throughout: the old one goes only once the new one is valid
+    with op.get_context().autocommit_block():
+        op.drop_index(UNIQUE_INDEX, table_name='user_game_stats', postgresql_concurrently=True)
+        op.execute(f"ALTER INDEX {NEW_UNIQUE_INDEX} RENAME TO {UNIQUE_INDEX}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(UNIQUE_INDEX, table_name='user_game_stats', postgresql_concurrently=True)
+        op.create_index(UNIQUE_INDEX, 'user_game_stats', ['user_id'], unique=False, postgresql_concurrently=True)
@@ -0,0 +1,22 @@
+"""Index trade idempotency keys by created_at for the expiry purge
+
+Revision ID: 0009_idempotency_key_expiry
+Revises: 0008_game_stats_unique_user
+Create Date: 2026-10-16 19:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers
+revision = '0009_idempotency_key_expiry'
+down_revision = '0008_game_stats_unique_user'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_trade_idempotency_keys_created_at', 'trade_idempotency_keys', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_trade_idempotency_keys_created_at', table_name='trade_idempotency_keys')
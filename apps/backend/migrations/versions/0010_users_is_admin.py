@@ -0,0 +1,23 @@
+"""Add users.is_admin
+
+Revision ID: 0010_users_is_admin
+Revises: 0009_idempotency_key_expiry
+Create Date: 2026-10-16 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0010_users_is_admin'
+down_revision = '0009_idempotency_key_expiry'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('is_admin', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    op.drop_column('users', 'is_admin')
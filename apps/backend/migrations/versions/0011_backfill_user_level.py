@@ -0,0 +1,30 @@
+"""Recompute users.level with the XP ledger's formula
+
+Revision ID: 0011_backfill_user_level
+Revises: 0010_users_is_admin
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers
+revision = '0011_backfill_user_level'
+down_revision = '0010_users_is_admin'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Level is 1 + xp // 100 (services.xp_ledger.level_for_xp), as /add-xp
+    # always wrote it; rows written with UserRepository's retired
+    # floor(sqrt(xp / 100)) formula are brought in line. Leaderboard entries
+    # pick up the new level on the user's next XP change.
+    op.execute(
+        "UPDATE users SET level = 1 + COALESCE(xp, 0) / 100 "
+        "WHERE level IS NULL OR level <> 1 + COALESCE(xp, 0) / 100"
+    )
+
+
+def downgrade():
+    # The previous levels were inconsistent with XP; nothing to restore
+    pass
@@ -0,0 +1,55 @@
+"""Partial indexes for active memberships, approved feeds and Genesis artifacts
+
+Revision ID: 0012_partial_hot_indexes
+Revises: 0011_backfill_user_level
+Create Date: 2026-10-16 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0012_partial_hot_indexes'
+down_revision = '0011_backfill_user_level'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, predicate); each query repeats the predicate, so
+# only the rows it can match are indexed
+PARTIAL_INDEXES = [
+    ('ix_constellation_memberships_active_user_id', 'constellation_memberships',
+     ['user_id'], "is_active"),
+    ('ix_constellation_memberships_active_constellation_id', 'constellation_memberships',
+     ['constellation_id'], "is_active"),
+    ('ix_viral_content_approved_public_created_at', 'viral_content',
+     ['created_at'], "is_public AND moderation_status = 'approved'"),
+    # Global Genesis stats; per-user collections keep ix_artifacts_user_id_artifact_type
+    ('ix_artifacts_genesis', 'artifacts',
+     ['artifact_type', 'user_id'], "artifact_type LIKE 'genesis_%'"),
+]
+
+# 0005 indexes the partial ones above replace: (name, table, columns)
+REPLACED_INDEXES = [
+    ('ix_constellation_memberships_user_id_is_active', 'constellation_memberships', ['user_id', 'is_active']),
+    ('ix_constellation_memberships_constellation_id_is_active', 'constellation_memberships',
+     ['constellation_id', 'is_active']),
+    ('ix_viral_content_public_moderation_created_at', 'viral_content',
+     ['is_public', 'moderation_status', 'created_at']),
+]
+
+
+def upgrade():
+    # New indexes are built before the old ones go, so lookups are never unindexed
+    with op.get_context().autocommit_block():
+        for name, table, columns, predicate in PARTIAL_INDEXES:
+            op.create_index(name, table, columns, postgresql_where=sa.text(predicate), postgresql_concurrently=True)
+        for name, table, _ in REPLACED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+        for name, table, _, _ in reversed(PARTIAL_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -11,6 +11,15 @@ except ImportError:
 # NFT Artifact System Models
 class Artifact(Base):
     __tablename__ = "artifacts"
+    __table_args__ = (
+        # Collection lookups: user_id = ? AND artifact_type LIKE 'genesis_%'
+        Index("ix_artifacts_user_id_artifact_type", "user_id", "artifact_type",
+              postgresql_ops={"artifact_type": "text_pattern_ops"}),
+        # Global Genesis stats scan only genesis rows; partial, so it stays small
+        Index("ix_artifacts_genesis", "artifact_type", "user_id",
+              postgresql_where=text("artifact_type LIKE 'genesis_%'"),
+              sqlite_where=text("artifact_type LIKE 'genesis_%'")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -237,6 +246,10 @@ class UserCosmicProgress(Base):
 # Enhanced User Model Extensions
 class UserGameStats(Base):
     __tablename__ = "user_game_stats"
+    __table_args__ = (
+        # One row per user; record_trade_completion upserts on it
+        Index("ix_user_game_stats_user_id", "user_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -325,6 +338,13 @@ class Constellation(Base):
 
 class ConstellationMembership(Base):
     __tablename__ = "constellation_memberships"
+    __table_args__ = (
+        # Every membership lookup filters is_active = true; left members aren't indexed
+        Index("ix_constellation_memberships_active_user_id", "user_id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+        Index("ix_constellation_memberships_active_constellation_id", "constellation_id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     constellation_id = Column(Integer, ForeignKey("constellations.id"), nullable=False)
@@ -388,6 +408,10 @@ class ConstellationBattle(Base):
 
 class ConstellationBattleParticipation(Base):
     __tablename__ = "constellation_battle_participations"
+    __table_args__ = (
+        Index("ix_constellation_battle_participations_battle_id_constellation_id",
+              "battle_id", "constellation_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     battle_id = Column(Integer, ForeignKey("constellation_battles.id"), nullable=False)
@@ -453,6 +477,12 @@ class UserPrestige(Base):
 # Viral Content System Models
 class ViralContent(Base):
     __tablename__ = "viral_content"
+    __table_args__ = (
+        # Public feeds: is_public AND moderation_status = 'approved' AND created_at >= ?
+        Index("ix_viral_content_approved_public_created_at", "created_at",
+              postgresql_where=text("is_public AND moderation_status = 'approved'"),
+              sqlite_where=text("is_public = 1 AND moderation_status = 'approved'")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -6,8 +6,9 @@ import redis.asyncio as redis
 from datetime import datetime, timedelta
 import json
 
-from models.user import User
-from core.cache import CacheKeys, cache_key_builder
+from ..models.user import User
+from ..core.cache import CacheKeys, cache_key_builder
+from ..services.xp_ledger import xp_ledger
 
 class UserRepository:
     def __init__(self, db: AsyncSession, cache: redis.Redis):
@@ -69,24 +70,19 @@ class UserRepository:
         return user
     
     async def update_xp(self, user_id: int, xp_delta: int) -> User:
-        """Update user XP with level calculation"""
-        user = await self.get_by_id(user_id)
-        if not user:
-            raise ValueError(f"User {user_id} not found")
-        
-        # Update XP and calculate new level
-        user.xp += xp_delta
-        user.level = self._calculate_level(user.xp)
-        user.updated_at = datetime.utcnow()
-        
-        await self.db.commit()
-        await self.db.refresh(user)
+        """Update user XP with level calculation
+
+        Level follows the XP ledger's 1 + xp // 100; migration
+        0011_backfill_user_level realigned rows from the old sqrt formula.
+        """
+        # Atomic increment in SQL; raises ValueError if the user doesn't exist
+        await xp_ledger.apply(self.db, user_id, xp_delta)
         
-        # Update cache
-        await self._cache_user(user)
+        # Drop the stale cached copy so the reload below reflects the new XP
+        await self.cache.delete(cache_key_builder(CacheKeys.USER_BY_ID, user_id))
         await self._invalidate_leaderboard_cache()
         
-        return user
+        return await self.get_by_id(user_id)
     
     async def get_leaderboard(
         self,
@@ -195,10 +191,3 @@ class UserRepository:
             
             if cursor == 0:
                 break
-    
-    @staticmethod
-    def _calculate_level(xp: int) -> int:
-        """Calculate level based on XP"""
-        # Level formula: level = floor(sqrt(xp / 100))
-        import math
-        return int(math.sqrt(xp / 100))
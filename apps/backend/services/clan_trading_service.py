@@ -13,11 +13,13 @@ from sqlalchemy import and_, or_
 
 from ..models.game_models import (
     ConstellationBattle, ConstellationBattleParticipation, 
-    ConstellationMembership, User, Constellation
+    ConstellationMembership, Constellation
 )
-from ..core.database import get_db
+from ..core.database import get_db, User
 from .extended_exchange_client import ExtendedExchangeClient, ExtendedExchangeError
 from ..core.config import settings
+from ..core.metrics import BATTLE_SCORE_UPDATE_SECONDS, observe_duration
+from ..core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -140,6 +142,8 @@ class ClanTradingService:
                 "avg_trade_size": 0.0
             }
     
+    @traced("clan.score_recompute")
+    @observe_duration(BATTLE_SCORE_UPDATE_SECONDS)
     async def update_battle_scores(self, battle_id: int, db: Session) -> Dict[str, Any]:
         """
         Update scores for all participants in an active battle.
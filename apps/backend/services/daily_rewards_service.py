@@ -0,0 +1,192 @@
+"""
+Daily Rewards Service
+Set-based daily XP rewards: per-user trade counts come from one grouped
+query per chunk, and XP/streak updates and reward records are written in bulk.
+"""
+
+import logging
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, exists, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.database import AsyncSessionLocal, DailyReward, Trade, User
+from .job_registry import create_job_registry
+from .xp_ledger import xp_increment_values, xp_ledger
+
+logger = logging.getLogger(__name__)
+
+BASE_DAILY_XP = 50
+MAX_ACTIVITY_MULTIPLIER = 3.0
+MAX_STREAK_BONUS = 100
+
+
+def calculate_daily_reward(trade_count: int, current_streak: int) -> Dict[str, Any]:
+    """XP for one user's day: base bonus scaled by activity, plus a capped streak bonus."""
+    activity_multiplier = min(1.0 + (trade_count * 0.1), MAX_ACTIVITY_MULTIPLIER)
+    streak_bonus = min(current_streak * 5, MAX_STREAK_BONUS)
+    return {
+        "xp_awarded": int(BASE_DAILY_XP * activity_multiplier + streak_bonus),
+        "streak_bonus": streak_bonus,
+        "activity_multiplier": activity_multiplier,
+    }
+
+
+class DailyRewardsJob:
+    """Chunked daily rewards run with progress reporting."""
+
+    def __init__(self, reward_date: Optional[date] = None, chunk_size: int = 5000):
+        self.job_id = uuid.uuid4().hex
+        self.reward_date = reward_date or date.today()
+        self.chunk_size = chunk_size
+        self.status = "pending"
+        self.rewards_awarded = 0
+        self.total_xp_awarded = 0
+        self.chunks_completed = 0
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "reward_date": self.reward_date.isoformat(),
+            "rewards_awarded": self.rewards_awarded,
+            "total_xp_awarded": self.total_xp_awarded,
+            "chunks_completed": self.chunks_completed,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+        }
+
+    async def run(self):
+        """Run the job to completion in its own session."""
+        self.status = "running"
+        self.started_at = datetime.utcnow()
+        try:
+            async with AsyncSessionLocal() as db:
+                last_user_id = 0
+                while True:
+                    last_user_id = await self._process_chunk(db, last_user_id)
+                    if last_user_id is None:
+                        break
+            self.status = "completed"
+            logger.info(
+                f"Daily rewards {self.reward_date}: {self.rewards_awarded} users, "
+                f"{self.total_xp_awarded} XP in {self.chunks_completed} chunks"
+            )
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            logger.error(f"Daily rewards job {self.job_id} failed: {e}")
+        finally:
+            self.finished_at = datetime.utcnow()
+
+    async def _process_chunk(self, db: AsyncSession, after_user_id: int) -> Optional[int]:
+        """Reward the next chunk of active users. Returns the last user id, or None when done."""
+        since = datetime.combine(self.reward_date - timedelta(days=1), datetime.min.time())
+        already_rewarded = exists().where(
+            DailyReward.user_id == User.id,
+            DailyReward.reward_date == self.reward_date,
+        )
+
+        # Per-user trade counts for the chunk in a single grouped query
+        result = await db.execute(
+            select(User.id, User.daily_streak, func.count(Trade.id).label("trade_count"))
+            .join(Trade, Trade.user_id == User.id)
+            .where(
+                Trade.created_at >= since,
+                User.id > after_user_id,
+                User.is_active == True,
+                ~already_rewarded,
+            )
+            .group_by(User.id, User.daily_streak)
+            .order_by(User.id)
+            .limit(self.chunk_size)
+        )
+        rows = result.all()
+        if not rows:
+            return None
+
+        user_updates: List[Dict[str, Any]] = []
+        reward_records: List[Dict[str, Any]] = []
+        for row in rows:
+            streak = row.daily_streak or 0
+            reward = calculate_daily_reward(row.trade_count, streak)
+            user_updates.append({
+                "b_user_id": row.id,
+                "b_xp": reward["xp_awarded"],
+                "b_streak": streak + 1,
+            })
+            reward_records.append({
+                "user_id": row.id,
+                "reward_date": self.reward_date,
+                "created_at": datetime.utcnow(),
+                **reward,
+            })
+
+        users = User.__table__
+        await db.execute(
+            update(users)
+            .where(users.c.id == bindparam("b_user_id"))
+            .values(
+                **xp_increment_values(bindparam("b_xp")),
+                daily_streak=bindparam("b_streak"),
+            ),
+            user_updates,
+        )
+        await db.execute(insert(DailyReward), reward_records)
+        await db.commit()
+
+        # Bulk updates bypass ORM events, so refresh the leaderboard and auth cache explicitly
+        updated = await db.execute(
+            select(User.id, User.xp, User.level, User.username, User.is_active)
+            .where(User.id.in_([row.id for row in rows]))
+        )
+        await xp_ledger.refresh_read_models([tuple(row) for row in updated])
+
+        self.rewards_awarded += len(rows)
+        self.total_xp_awarded += sum(record["xp_awarded"] for record in reward_records)
+        self.chunks_completed += 1
+        return rows[-1].id
+
+
+class DailyRewardsInProgress(RuntimeError):
+    """Another daily rewards job is still pending or running."""
+
+    def __init__(self, job: DailyRewardsJob):
+        super().__init__(f"Daily rewards job {job.job_id} is already {job.status}")
+        self.job = job
+
+
+# Jobs by id, for progress polling
+daily_reward_jobs = create_job_registry()
+
+# Only one job per worker scans the users table at a time. A run started on
+# another worker can overlap, but uq_daily_rewards_user_date rolls back any
+# chunk that would reward a user twice.
+_active_job: Optional[DailyRewardsJob] = None
+
+
+def active_daily_rewards_job() -> Optional[DailyRewardsJob]:
+    if _active_job is not None and _active_job.status in ("pending", "running"):
+        return _active_job
+    return None
+
+
+def create_daily_rewards_job(reward_date: Optional[date] = None, chunk_size: int = 5000) -> DailyRewardsJob:
+    """Register a new job; the caller schedules job.run().
+
+    Raises DailyRewardsInProgress while another job is pending or running.
+    """
+    global _active_job
+    active = active_daily_rewards_job()
+    if active is not None:
+        raise DailyRewardsInProgress(active)
+    job = DailyRewardsJob(reward_date=reward_date, chunk_size=chunk_size)
+    _active_job = job
+    daily_reward_jobs.add(job)
+    return job
@@ -14,6 +14,8 @@ import httpx
 import json
 from datetime import datetime, timezone
 from ..core.config import settings
+from ..core.metrics import EXCHANGE_REQUEST_SECONDS, endpoint_label
+from ..core.tracing import request_span_name, traced
 import logging
 from starkex_crypto import StarkExOrderSigner
 
@@ -113,6 +115,7 @@ class ExtendedExchangeClient:
         
         self._rate_limits["last_request_time"] = time.time()
     
+    @traced("http.client.exchange", describe=request_span_name)
     async def _make_request(
         self, 
         method: str, 
@@ -127,6 +130,8 @@ class ExtendedExchangeClient:
         url = f"{self.api_url}{endpoint}"
         body = json.dumps(data) if data else ""
         headers = self._get_headers(method, endpoint, body)
+        start = time.perf_counter()
+        status = "error"
         try:
             if method.upper() == "GET":
                 response = await self.session.get(url, headers=headers, params=params)
@@ -136,6 +141,7 @@ class ExtendedExchangeClient:
                 response = await self.session.delete(url, headers=headers, params=params)
             else:
                 raise ExtendedExchangeError(f"Unsupported HTTP method: {method}")
+            status = str(response.status_code)
             response_data = response.json()
             if response.status_code != 200:
                 logger.error(f"Exchange API error: {response.status_code} {response_data}")
@@ -152,6 +158,10 @@ class ExtendedExchangeClient:
         except json.JSONDecodeError:
             logger.error(f"Exchange API returned invalid JSON response.")
             raise ExtendedExchangeError("Invalid JSON response from API")
+        finally:
+            EXCHANGE_REQUEST_SECONDS.labels(
+                method=method.upper(), endpoint=endpoint_label(endpoint), status=status
+            ).observe(time.perf_counter() - start)
     
     # Market Data Methods
     async def get_ticker(self, symbol: str) -> Dict[str, Any]:
@@ -0,0 +1,281 @@
+"""
+Game Stats Service
+Keeps the denormalized trading counters on user_game_stats (total/successful
+trades, profit totals, best/worst trade, win streaks) in step with `trades`.
+Each completed trade is folded in with one upsert inside the caller's
+transaction, so prestige, viral and NFT eligibility checks read O(1) counters
+instead of aggregating trade history. A chunked reconciliation job recomputes
+the counters from `trades` to repair any drift.
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.database import AsyncSessionLocal, Trade
+from ..models.game_models import UserGameStats
+from .job_registry import create_job_registry
+
+logger = logging.getLogger(__name__)
+
+COMPLETED_STATUS = "completed"
+
+_stats = UserGameStats.__table__
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def trade_stats_values(profit_loss: float, traded_at: datetime) -> Dict[str, Any]:
+    """UPDATE (or ON CONFLICT DO UPDATE) values folding one completed trade into the counters.
+
+    SET expressions read the pre-update row, so best_streak compares against
+    the old current_streak. The win streak counts consecutive profitable trades.
+    """
+    best_profit = func.coalesce(_stats.c.best_trade_profit, 0.0)
+    worst_loss = func.coalesce(_stats.c.worst_trade_loss, 0.0)
+    values = {
+        "total_trades": func.coalesce(_stats.c.total_trades, 0) + 1,
+        "total_profit_loss": func.coalesce(_stats.c.total_profit_loss, 0.0) + profit_loss,
+        "best_trade_profit": case((best_profit < profit_loss, profit_loss), else_=best_profit),
+        "worst_trade_loss": case((worst_loss > profit_loss, profit_loss), else_=worst_loss),
+        "last_trade_date": traded_at,
+    }
+    if profit_loss > 0:
+        next_streak = func.coalesce(_stats.c.current_streak, 0) + 1
+        best_streak = func.coalesce(_stats.c.best_streak, 0)
+        values.update(
+            successful_trades=func.coalesce(_stats.c.successful_trades, 0) + 1,
+            current_streak=next_streak,
+            best_streak=case((next_streak > best_streak, next_streak), else_=best_streak),
+        )
+    else:
+        values["current_streak"] = 0
+    return values
+
+
+def initial_stats(user_id: int, profit_loss: float, traded_at: datetime) -> Dict[str, Any]:
+    """Insert values for a user's first counted trade."""
+    won = profit_loss > 0
+    return {
+        "user_id": user_id,
+        "total_trades": 1,
+        "successful_trades": 1 if won else 0,
+        "total_profit_loss": profit_loss,
+        "best_trade_profit": max(profit_loss, 0.0),
+        "worst_trade_loss": min(profit_loss, 0.0),
+        "current_streak": 1 if won else 0,
+        "best_streak": 1 if won else 0,
+        "last_trade_date": traded_at,
+    }
+
+
+async def record_trade_completion(
+    db: AsyncSession,
+    user_id: int,
+    profit_loss: float,
+    traded_at: Optional[datetime] = None,
+):
+    """Fold a completed trade into the user's counters.
+
+    Doesn't commit: call it in the same transaction that marks the trade
+    completed, so the counters and `trades` commit or roll back together.
+    """
+    profit_loss = float(profit_loss or 0.0)
+    traded_at = traded_at or datetime.utcnow()
+    # Single upsert on the unique user_id, so concurrent first trades can't both insert
+    insert = _INSERTS[db.get_bind().dialect.name]
+    await db.execute(
+        insert(_stats)
+        .values(**initial_stats(user_id, profit_loss, traded_at))
+        .on_conflict_do_update(index_elements=["user_id"], set_=trade_stats_values(profit_loss, traded_at))
+    )
+
+
+def fold_trades(profits: Iterable[float]) -> Dict[str, Any]:
+    """Counters for one user's completed trades, oldest first."""
+    stats = {
+        "total_trades": 0,
+        "successful_trades": 0,
+        "total_profit_loss": 0.0,
+        "best_trade_profit": 0.0,
+        "worst_trade_loss": 0.0,
+        "current_streak": 0,
+        "best_streak": 0,
+    }
+    for profit in profits:
+        profit = float(profit or 0.0)
+        stats["total_trades"] += 1
+        stats["total_profit_loss"] += profit
+        stats["best_trade_profit"] = max(stats["best_trade_profit"], profit)
+        stats["worst_trade_loss"] = min(stats["worst_trade_loss"], profit)
+        if profit > 0:
+            stats["successful_trades"] += 1
+            stats["current_streak"] += 1
+            stats["best_streak"] = max(stats["best_streak"], stats["current_streak"])
+        else:
+            stats["current_streak"] = 0
+    return stats
+
+
+class GameStatsReconciliationJob:
+    """Chunked recompute of user_game_stats counters from `trades`."""
+
+    def __init__(self, chunk_size: int = 1000):
+        self.job_id = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.status = "pending"
+        self.users_reconciled = 0
+        self.rows_created = 0
+        self.chunks_completed = 0
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "users_reconciled": self.users_reconciled,
+            "rows_created": self.rows_created,
+            "chunks_completed": self.chunks_completed,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+        }
+
+    async def run(self):
+        """Run the job to completion in its own session."""
+        self.status = "running"
+        self.started_at = datetime.utcnow()
+        try:
+            async with AsyncSessionLocal() as db:
+                last_user_id = 0
+                while True:
+                    last_user_id = await self._process_chunk(db, last_user_id)
+                    if last_user_id is None:
+                        break
+            self.status = "completed"
+            logger.info(
+                f"Game stats reconciliation: {self.users_reconciled} users "
+                f"({self.rows_created} new rows) in {self.chunks_completed} chunks"
+            )
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            logger.error(f"Game stats reconciliation {self.job_id} failed: {e}")
+        finally:
+            self.finished_at = datetime.utcnow()
+
+    async def _process_chunk(self, db: AsyncSession, after_user_id: int) -> Optional[int]:
+        """Recompute the next chunk of traders. Returns the last user id, or None when done."""
+        completed = Trade.status == COMPLETED_STATUS
+        user_ids = (await db.execute(
+            select(Trade.user_id)
+            .where(completed, Trade.user_id > after_user_id)
+            .group_by(Trade.user_id)
+            .order_by(Trade.user_id)
+            .limit(self.chunk_size)
+        )).scalars().all()
+        if not user_ids:
+            return None
+
+        # One ordered pass over the chunk's trades; streaks need trade order
+        traded_at = func.coalesce(Trade.completed_at, Trade.created_at)
+        result = await db.stream(
+            select(Trade.user_id, Trade.profit_loss, traded_at.label("traded_at"))
+            .where(completed, Trade.user_id.between(user_ids[0], user_ids[-1]))
+            .order_by(Trade.user_id, traded_at, Trade.id)
+        )
+        profits: Dict[int, List[float]] = {}
+        last_traded: Dict[int, datetime] = {}
+        async for row in result:
+            profits.setdefault(row.user_id, []).append(row.profit_loss)
+            last_traded[row.user_id] = row.traded_at
+
+        existing = set((await db.execute(
+            select(_stats.c.user_id).where(_stats.c.user_id.in_(user_ids))
+        )).scalars().all())
+
+        updates: List[Dict[str, Any]] = []
+        inserts: List[Dict[str, Any]] = []
+        for user_id, user_profits in profits.items():
+            stats = {**fold_trades(user_profits), "last_trade_date": last_traded[user_id]}
+            if user_id in existing:
+                updates.append({"b_user_id": user_id, **{f"b_{key}": value for key, value in stats.items()}})
+            else:
+                inserts.append({"user_id": user_id, **stats})
+
+        if updates:
+            columns = [key[2:] for key in updates[0] if key != "b_user_id"]
+            await db.execute(
+                update(_stats)
+                .where(_stats.c.user_id == bindparam("b_user_id"))
+                .values(**{column: bindparam(f"b_{column}") for column in columns}),
+                updates,
+            )
+        if inserts:
+            # A first trade may have created the row since `existing` was read; the next run covers it
+            upsert = _INSERTS[db.get_bind().dialect.name]
+            await db.execute(upsert(_stats).on_conflict_do_nothing(index_elements=["user_id"]), inserts)
+        await db.commit()
+
+        self.users_reconciled += len(profits)
+        self.rows_created += len(inserts)
+        self.chunks_completed += 1
+        return user_ids[-1]
+
+
+class ReconciliationInProgress(RuntimeError):
+    """Another reconciliation job is still pending or running."""
+
+    def __init__(self, job: GameStatsReconciliationJob):
+        super().__init__(f"Game stats reconciliation {job.job_id} is already {job.status}")
+        self.job = job
+
+
+# Jobs by id, for progress polling
+game_stats_jobs = create_job_registry()
+
+# Requested or scheduled, only one job recomputes the counters at a time
+_active_job: Optional[GameStatsReconciliationJob] = None
+
+
+def active_reconciliation_job() -> Optional[GameStatsReconciliationJob]:
+    if _active_job is not None and _active_job.status in ("pending", "running"):
+        return _active_job
+    return None
+
+
+def create_reconciliation_job(chunk_size: int = 1000, register: bool = True) -> GameStatsReconciliationJob:
+    """Create the next job; the caller schedules job.run().
+
+    Raises ReconciliationInProgress while another job is pending or running.
+    """
+    global _active_job
+    active = active_reconciliation_job()
+    if active is not None:
+        raise ReconciliationInProgress(active)
+    job = GameStatsReconciliationJob(chunk_size=chunk_size)
+    _active_job = job
+    if register:
+        game_stats_jobs.add(job)
+    return job
+
+
+async def reconcile_periodically(interval: float, chunk_size: int = 1000):
+    """Reconcile every `interval` seconds until cancelled."""
+    while True:
+        try:
+            # Not registered in game_stats_jobs, so scheduled runs don't accumulate there
+            job = create_reconciliation_job(chunk_size=chunk_size, register=False)
+        except ReconciliationInProgress as e:
+            logger.info(f"Skipping scheduled reconciliation: {e}")
+        else:
+            await job.run()
+        await asyncio.sleep(interval)
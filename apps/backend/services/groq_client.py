@@ -11,6 +11,7 @@ from typing import Dict, List, Optional, Any, Union
 import httpx
 from datetime import datetime
 from ..core.config import settings
+from ..core.tracing import request_span_name, traced
 import logging
 
 logger = logging.getLogger(__name__)
@@ -85,6 +86,7 @@ class GroqClient:
         }
         return headers
     
+    @traced("http.client.groq", describe=request_span_name)
     async def _make_request(
         self, 
         method: str, 
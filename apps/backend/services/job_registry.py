@@ -0,0 +1,42 @@
+"""
+Job Registry
+Jobs by id for progress polling (daily rewards, game stats reconciliation).
+Finished jobs are kept for a while so clients can read their final progress,
+then expire; the number of finished jobs kept is also capped.
+
+Registries are process-local: a job's progress can only be read from the
+worker that started it. Behind a multi-worker deployment, polling from any
+other worker returns 404, so route progress polls to the starting worker
+(e.g. sticky sessions) or run a single worker for these admin jobs.
+"""
+
+from datetime import datetime, timedelta
+
+from ..core.config import settings
+
+
+class JobRegistry(dict):
+    """Dict of job_id -> job. Jobs need `job_id` and `finished_at` attributes."""
+
+    def __init__(self, ttl_seconds: float = 3600, max_finished: int = 100):
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+
+    def add(self, job):
+        self.prune()
+        self[job.job_id] = job
+
+    def prune(self):
+        """Drop finished jobs past their TTL, then the oldest beyond `max_finished`."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        finished = sorted(
+            (job.finished_at, job_id) for job_id, job in self.items() if job.finished_at is not None
+        )
+        for index, (finished_at, job_id) in enumerate(finished):
+            if finished_at < cutoff or index < len(finished) - self.max_finished:
+                del self[job_id]
+
+
+def create_job_registry() -> JobRegistry:
+    return JobRegistry(ttl_seconds=settings.JOB_RESULT_TTL_SECONDS, max_finished=settings.JOB_RESULT_MAX_KEPT)
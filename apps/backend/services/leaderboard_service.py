@@ -0,0 +1,343 @@
+"""
+XP Leaderboard Service
+Materialized, incrementally maintained XP ranking so leaderboard reads
+don't scan the users table. In-process by default, Redis-backed when
+REDIS_URL is configured so every worker shares one ranking.
+
+Every update bumps the ranking's version. A rebuild loads its users-table
+snapshot only if the version didn't move while the snapshot was read, so
+concurrent updates are never overwritten with older values.
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import object_session
+
+from ..core.config import settings
+from ..core.database import User, after_commit
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(xp: int, user_id: int) -> str:
+    """Opaque cursor pointing just after the given leaderboard position."""
+    return f"{xp}:{user_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """Parse a cursor produced by encode_cursor."""
+    try:
+        xp, user_id = cursor.split(":", 1)
+        return int(xp), int(user_id)
+    except ValueError:
+        raise ValueError(f"Invalid leaderboard cursor: {cursor!r}")
+
+
+class InMemoryLeaderboard:
+    """
+    Sorted XP ranking held in process memory.
+
+    Entries are kept in a SortedList ordered by (-xp, user_id), so rank
+    lookups, cursor seeks and an XP change (remove + add) are all O(log n).
+    """
+
+    def __init__(self):
+        self._keys: SortedList = SortedList()
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        self._version = 0
+        self._loaded = False
+
+    async def is_loaded(self) -> bool:
+        return self._loaded
+
+    async def version(self) -> int:
+        return self._version
+
+    @asynccontextmanager
+    async def rebuild_lock(self) -> AsyncIterator[bool]:
+        """Yields whether this caller may rebuild; the ranking is process-local, so always."""
+        yield True
+
+    async def load(self, rows: List[Dict[str, Any]], expected_version: Optional[int] = None) -> bool:
+        """Replace the ranking wholesale, unless it changed since `expected_version`.
+
+        Returns whether the rows were loaded.
+        """
+        async with self._lock:
+            if expected_version is not None and expected_version != self._version:
+                return False
+            self._entries = {row["user_id"]: dict(row) for row in rows}
+            self._keys = SortedList((-row["xp"], row["user_id"]) for row in rows)
+            self._loaded = True
+            return True
+
+    async def update(self, user_id: int, xp: int, level: int, username: Optional[str] = None):
+        """Apply a user's new XP/level, moving them to their new position."""
+        async with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._keys.discard((-entry["xp"], user_id))
+            else:
+                entry = {"user_id": user_id, "username": username}
+                self._entries[user_id] = entry
+
+            entry["xp"] = xp
+            entry["level"] = level
+            if username is not None:
+                entry["username"] = username
+            self._keys.add((-xp, user_id))
+            self._version += 1
+
+    async def remove(self, user_id: int):
+        """Drop a user from the ranking (e.g. on deactivation)."""
+        async with self._lock:
+            entry = self._entries.pop(user_id, None)
+            if entry is not None:
+                self._keys.discard((-entry["xp"], user_id))
+            self._version += 1
+
+    async def get_rank(self, user_id: int) -> Optional[int]:
+        """1-based rank of a user, or None if they aren't ranked."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        return self._keys.bisect_left((-entry["xp"], user_id)) + 1
+
+    async def get_page(
+        self, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return up to `limit` entries after `cursor` and the next cursor."""
+        start = 0
+        if cursor:
+            xp, user_id = decode_cursor(cursor)
+            start = self._keys.bisect_right((-xp, user_id))
+
+        page = []
+        for rank, (neg_xp, user_id) in enumerate(self._keys.islice(start, start + limit), start=start + 1):
+            entry = self._entries[user_id]
+            page.append({**entry, "rank": rank})
+
+        next_cursor = None
+        if page and start + len(page) < len(self._keys):
+            next_cursor = encode_cursor(page[-1]["xp"], page[-1]["user_id"])
+        return page, next_cursor
+
+    async def size(self) -> int:
+        return len(self._keys)
+
+
+# Scores pack (-xp, user_id) so the sorted set orders ties by ascending user
+# id, like InMemoryLeaderboard. Exact while user ids < 2**26 and xp < 2**27.
+USER_ID_SPACE = 2 ** 26
+
+
+def _score(xp: int, user_id: int) -> int:
+    return user_id - xp * USER_ID_SPACE
+
+
+def _xp_from_score(score: float) -> int:
+    return -(int(score) // USER_ID_SPACE)
+
+
+class RedisLeaderboard:
+    """XP ranking stored in a Redis sorted set, shared across workers.
+
+    Ascending score is leaderboard order; see _score.
+    """
+
+    SCORES_KEY = "leaderboard:xp"
+    PROFILES_KEY = "leaderboard:xp:profiles"
+    # Bumped by every update/remove; a rebuild WATCHes it
+    VERSION_KEY = "leaderboard:xp:version"
+    # Set by the first completed rebuild, so later workers reuse the ranking
+    LOADED_KEY = "leaderboard:xp:loaded"
+    REBUILD_LOCK_KEY = "leaderboard:xp:rebuild-lock"
+    REBUILD_LOCK_SECONDS = 300
+
+    def __init__(self, redis_url: str):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+
+    async def is_loaded(self) -> bool:
+        return bool(await self.redis.exists(self.LOADED_KEY))
+
+    async def version(self) -> int:
+        return int(await self.redis.get(self.VERSION_KEY) or 0)
+
+    @asynccontextmanager
+    async def rebuild_lock(self) -> AsyncIterator[bool]:
+        """SET NX lock so only one worker rebuilds; yields whether it was acquired."""
+        from redis.exceptions import LockError
+
+        lock = self.redis.lock(self.REBUILD_LOCK_KEY, timeout=self.REBUILD_LOCK_SECONDS, blocking=False)
+        acquired = await lock.acquire()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    await lock.release()
+                except LockError:
+                    logger.warning("Leaderboard rebuild outlived its lock")
+
+    async def load(self, rows: List[Dict[str, Any]], expected_version: Optional[int] = None) -> bool:
+        """Replace the ranking wholesale, unless it changed since `expected_version`.
+
+        Returns whether the rows were loaded.
+        """
+        from redis.exceptions import WatchError
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self.VERSION_KEY)
+                if expected_version is not None and int(await pipe.get(self.VERSION_KEY) or 0) != expected_version:
+                    return False
+                pipe.multi()
+                pipe.delete(self.SCORES_KEY, self.PROFILES_KEY)
+                if rows:
+                    pipe.zadd(self.SCORES_KEY, {str(row["user_id"]): _score(row["xp"], row["user_id"]) for row in rows})
+                    pipe.hset(self.PROFILES_KEY, mapping={
+                        str(row["user_id"]): json.dumps({"username": row["username"], "level": row["level"]})
+                        for row in rows
+                    })
+                pipe.set(self.LOADED_KEY, 1)
+                await pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+    async def update(self, user_id: int, xp: int, level: int, username: Optional[str] = None):
+        """Apply a user's new XP/level, moving them to their new position."""
+        member = str(user_id)
+        if username is None:
+            profile = await self.redis.hget(self.PROFILES_KEY, member)
+            username = json.loads(profile)["username"] if profile else None
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.SCORES_KEY, {member: _score(xp, user_id)})
+            pipe.hset(self.PROFILES_KEY, member, json.dumps({"username": username, "level": level}))
+            pipe.incr(self.VERSION_KEY)
+            await pipe.execute()
+
+    async def remove(self, user_id: int):
+        """Drop a user from the ranking (e.g. on deactivation)."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.SCORES_KEY, str(user_id))
+            pipe.hdel(self.PROFILES_KEY, str(user_id))
+            pipe.incr(self.VERSION_KEY)
+            await pipe.execute()
+
+    async def get_rank(self, user_id: int) -> Optional[int]:
+        """1-based rank of a user, or None if they aren't ranked."""
+        rank = await self.redis.zrank(self.SCORES_KEY, str(user_id))
+        return None if rank is None else rank + 1
+
+    async def get_page(
+        self, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return up to `limit` entries after `cursor` and the next cursor."""
+        start, min_score = 0, "-inf"
+        if cursor:
+            # Seek by position, so the cursor holds even if that user moved or left
+            bound = _score(*decode_cursor(cursor))
+            start = await self.redis.zcount(self.SCORES_KEY, "-inf", bound)
+            min_score = f"({bound}"
+
+        scored = await self.redis.zrangebyscore(
+            self.SCORES_KEY, min_score, "+inf", start=0, num=limit, withscores=True
+        )
+        if not scored:
+            return [], None
+
+        profiles = await self.redis.hmget(self.PROFILES_KEY, [member for member, _ in scored])
+        page = []
+        for rank, ((member, score), profile) in enumerate(zip(scored, profiles), start=start + 1):
+            profile = json.loads(profile) if profile else {}
+            page.append({
+                "user_id": int(member),
+                "username": profile.get("username"),
+                "xp": _xp_from_score(score),
+                "level": profile.get("level", 1),
+                "rank": rank,
+            })
+
+        next_cursor = None
+        if len(page) == limit and start + limit < await self.redis.zcard(self.SCORES_KEY):
+            next_cursor = encode_cursor(page[-1]["xp"], page[-1]["user_id"])
+        return page, next_cursor
+
+    async def size(self) -> int:
+        return await self.redis.zcard(self.SCORES_KEY)
+
+
+async def rebuild_leaderboard(
+    db: AsyncSession, leaderboard=None, only_if_missing: bool = False, attempts: int = 3
+) -> Optional[int]:
+    """Rebuild the ranking from the users table.
+
+    With `only_if_missing` (startup), a ranking some worker already loaded is
+    kept as is, since it has been maintained incrementally since. Returns the
+    number of users loaded, or None when the rebuild was skipped.
+    """
+    leaderboard = leaderboard or xp_leaderboard
+    if only_if_missing and await leaderboard.is_loaded():
+        logger.info("XP leaderboard already loaded; rebuild skipped")
+        return None
+    async with leaderboard.rebuild_lock() as acquired:
+        if not acquired:
+            logger.info("XP leaderboard is being rebuilt by another worker")
+            return None
+        for _ in range(attempts):
+            version = await leaderboard.version()
+            result = await db.execute(
+                select(User.id, User.username, User.xp, User.level).where(User.is_active == True)
+            )
+            rows = [
+                {"user_id": row.id, "username": row.username, "xp": row.xp or 0, "level": row.level or 1}
+                for row in result
+            ]
+            if await leaderboard.load(rows, expected_version=version):
+                logger.info(f"XP leaderboard rebuilt with {len(rows)} users")
+                return len(rows)
+        logger.warning(f"XP leaderboard changed during each of {attempts} rebuild attempts; kept the live ranking")
+        return None
+
+
+def _create_leaderboard():
+    if settings.REDIS_URL:
+        try:
+            return RedisLeaderboard(settings.REDIS_URL)
+        except Exception as e:
+            logger.error(f"Redis leaderboard unavailable, using in-memory ranking: {e}")
+    return InMemoryLeaderboard()
+
+
+# Global leaderboard instance
+xp_leaderboard = _create_leaderboard()
+
+
+@event.listens_for(User, "after_update")
+def _sync_on_status_change(mapper, connection, target):
+    """Deactivated users leave the ranking and reactivated ones rejoin, once committed."""
+    if not inspect(target).attrs.is_active.history.has_changes():
+        return
+    if target.is_active:
+        change = partial(xp_leaderboard.update, target.id, target.xp or 0, target.level or 1, target.username)
+    else:
+        change = partial(xp_leaderboard.remove, target.id)
+    after_commit(object_session(target), change)
+
+
+@event.listens_for(User, "after_delete")
+def _remove_on_delete(mapper, connection, target):
+    after_commit(object_session(target), partial(xp_leaderboard.remove, target.id))
+
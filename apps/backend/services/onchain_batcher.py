@@ -0,0 +1,165 @@
+"""
+On-Chain Batcher
+Coalesces leaderboard point updates and achievement mints per user over a
+short window and submits them as Starknet multicall transactions, instead of
+one transaction per call per trade.
+
+Submitters await their batch: `submit` returns once the multicall carrying
+the user's calls has been accepted, and raises if it failed, so the outbox
+task behind it is retried. A user's calls are never split across multicalls,
+so one failed multicall only fails the users it carried.
+
+The client needs one method, `async multicall(calls)`, where each call is an
+(entrypoint, user_address, value) tuple. RecordingStarknetClient implements
+it in memory for tests and for running without a devnet.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..core.config import settings
+from ..core.metrics import STARKNET_BATCH_CALLS, STARKNET_FLUSH_SECONDS, STARKNET_MULTICALLS
+
+logger = logging.getLogger(__name__)
+
+# (entrypoint, user_address, value)
+ContractCall = Tuple[str, str, Any]
+
+
+class _PendingUser:
+    __slots__ = ("points", "achievement_ids", "waiters")
+
+    def __init__(self):
+        self.points = 0
+        self.achievement_ids: List[str] = []
+        self.waiters: List[asyncio.Future] = []
+
+    def calls(self, user_address: str) -> List[ContractCall]:
+        calls = []
+        if self.points:
+            calls.append(("update_user_points", user_address, self.points))
+        calls.extend(("mint_achievement", user_address, a) for a in self.achievement_ids)
+        return calls
+
+
+class OnChainBatcher:
+    """Per-user accumulation with time- and size-triggered multicall flushes."""
+
+    def __init__(self, client=None, window_seconds: float = 2.0, max_batch_calls: int = 100):
+        self.client = client
+        self.window_seconds = window_seconds
+        self.max_batch_calls = max_batch_calls
+        self._pending: Dict[str, _PendingUser] = {}
+        self._pending_calls = 0
+        self._timer: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    def bind(self, client):
+        self.client = client
+
+    async def submit(self, user_address: str, points_delta: int = 0, achievement_ids=()):
+        """Queue a user's updates and wait for the multicall that carries them."""
+        entry = self._pending.get(user_address)
+        if entry is None:
+            entry = self._pending[user_address] = _PendingUser()
+        if points_delta:
+            if not entry.points:
+                self._pending_calls += 1
+            entry.points += points_delta
+        for achievement_id in achievement_ids:
+            if achievement_id not in entry.achievement_ids:
+                entry.achievement_ids.append(achievement_id)
+                self._pending_calls += 1
+        waiter = asyncio.get_running_loop().create_future()
+        entry.waiters.append(waiter)
+
+        if self._pending_calls >= self.max_batch_calls:
+            self._cancel_timer()
+            self._start(self.flush())
+        elif self._timer is None:
+            self._timer = self._start(self._flush_after_window())
+        await waiter
+
+    def _start(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+        return task
+
+    def _cancel_timer(self):
+        # The timer only clears itself after its sleep, so this never interrupts a send
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.window_seconds)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        """Submit everything pending now, one multicall per max_batch_calls."""
+        pending, self._pending = self._pending, {}
+        self._pending_calls = 0
+
+        batch: List[ContractCall] = []
+        batch_users: List[_PendingUser] = []
+        for user_address, entry in pending.items():
+            calls = entry.calls(user_address)
+            if batch and len(batch) + len(calls) > self.max_batch_calls:
+                await self._send(batch, batch_users)
+                batch, batch_users = [], []
+            batch.extend(calls)
+            batch_users.append(entry)
+        if batch_users:
+            await self._send(batch, batch_users)
+
+    async def _send(self, calls: List[ContractCall], users: List[_PendingUser]):
+        start = time.perf_counter()
+        try:
+            if calls:
+                await self.client.multicall(calls)
+        except Exception as e:
+            STARKNET_MULTICALLS.labels(outcome="failed").inc()
+            logger.warning(f"Starknet multicall of {len(calls)} calls failed: {e}")
+            for entry in users:
+                for waiter in entry.waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            return
+        STARKNET_MULTICALLS.labels(outcome="submitted").inc()
+        STARKNET_BATCH_CALLS.observe(len(calls))
+        STARKNET_FLUSH_SECONDS.observe(time.perf_counter() - start)
+        for entry in users:
+            for waiter in entry.waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    async def close(self):
+        """Flush whatever is pending and wait for in-flight multicalls (at shutdown)."""
+        self._cancel_timer()
+        await self.flush()
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+
+class RecordingStarknetClient:
+    """In-memory multicall target for tests and local runs without a devnet."""
+
+    def __init__(self):
+        self.multicalls: List[List[ContractCall]] = []
+        self.fail_next = 0
+
+    async def multicall(self, calls: List[ContractCall]):
+        if self.fail_next:
+            self.fail_next -= 1
+            raise ConnectionError("devnet unavailable")
+        self.multicalls.append(list(calls))
+        return {"transaction_hash": f"0x{len(self.multicalls):064x}"}
+
+
+onchain_batcher = OnChainBatcher(
+    window_seconds=settings.STARKNET_BATCH_WINDOW_SECONDS,
+    max_batch_calls=settings.STARKNET_MAX_BATCH_CALLS,
+)
@@ -0,0 +1,275 @@
+"""
+Post-Trade Outbox
+Durable queue for trade side effects (XP, streaks, on-chain updates, events).
+execute_trade inserts one row per effect in the same transaction that
+completes the trade, then returns; a pool of workers claims due rows in
+batches and runs the registered handlers with retries and exponential backoff. At most
+max_sessions database sessions are open at once across the workers.
+
+Rows live in the application database (SQLite or Postgres). Workers claim
+with a single UPDATE ... RETURNING over a FOR UPDATE SKIP LOCKED subquery, so
+several workers and instances can share the table. A claim is a lease: a
+worker that dies mid-task leaves a running row that is reclaimed once
+`available_at` passes; only the current lease holder (matching attempts)
+can then mark the row done or failed. Each row has a unique idempotency key. Handlers that
+write to the database run in the same transaction that marks the row done;
+external effects are delivered at least once, and receive the key so
+downstream consumers can deduplicate.
+
+Done and failed rows are kept for POST_TRADE_RETENTION_SECONDS; a periodic
+purge deletes them.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal, PostTradeTask
+from ..core.metrics import POST_TRADE_TASK_LAG_SECONDS, POST_TRADE_TASKS
+
+logger = logging.getLogger(__name__)
+
+# handler(db, payload, idempotency_key)
+TaskHandler = Callable[[AsyncSession, Dict[str, Any], str], Awaitable[None]]
+
+_tasks = PostTradeTask.__table__
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+async def enqueue(db: AsyncSession, tasks: List[Dict[str, Any]]):
+    """Add tasks ({"task_type", "payload", "idempotency_key"}) to the caller's transaction.
+
+    Doesn't commit. Keys that are already queued are skipped.
+    """
+    if not tasks:
+        return
+    now = datetime.utcnow()
+    rows = [{**task, "status": "pending", "attempts": 0, "available_at": now, "created_at": now} for task in tasks]
+    insert = _INSERTS[db.get_bind().dialect.name]
+    await db.execute(insert(_tasks).on_conflict_do_nothing(index_elements=["idempotency_key"]), rows)
+
+
+async def purge_finished_tasks(db: AsyncSession, retention_seconds: Optional[float] = None, batch_size: int = 5000) -> int:
+    """Delete done/failed tasks older than the retention in batches, committing each.
+
+    Returns how many were deleted.
+    """
+    retention_seconds = settings.POST_TRADE_RETENTION_SECONDS if retention_seconds is None else retention_seconds
+    cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+    deleted = 0
+    while True:
+        # A finished row's available_at is its last lease expiry, so the claim
+        # index narrows the scan; completed_at is the exact retention check
+        batch = (
+            select(_tasks.c.id)
+            .where(
+                _tasks.c.status.in_(("done", "failed")),
+                _tasks.c.available_at < cutoff + timedelta(seconds=settings.POST_TRADE_LEASE_SECONDS),
+                _tasks.c.completed_at < cutoff,
+            )
+            .limit(batch_size)
+        )
+        result = await db.execute(delete(_tasks).where(_tasks.c.id.in_(batch)))
+        await db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+async def purge_finished_tasks_periodically(interval: float, batch_size: int = 5000):
+    """Purge finished tasks every `interval` seconds until cancelled."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                deleted = await purge_finished_tasks(db, batch_size=batch_size)
+            if deleted:
+                logger.info(f"Purged {deleted} finished post-trade tasks")
+        except Exception as e:
+            logger.error(f"Post-trade task purge failed: {e}")
+        await asyncio.sleep(interval)
+
+
+class PostTradeOutbox:
+    """Handler registry plus the worker pool draining post_trade_tasks."""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        batch_size: int = 20,
+        poll_interval: float = 0.5,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 8,
+        retry_base_seconds: float = 2.0,
+        max_sessions: int = 5,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.max_sessions = max_sessions
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handlers: Dict[str, TaskHandler] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def register(self, task_type: str, handler: TaskHandler):
+        self._handlers[task_type] = handler
+
+    def notify(self):
+        """Wake idle workers after committing new tasks, instead of waiting out the poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        if self._worker_tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._worker_tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._wakeup = None
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Post-trade worker {index} failed to claim tasks: {e}")
+                processed = 0
+            if processed:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self) -> int:
+        """Claim one batch of due tasks and run them together. Returns how many were claimed."""
+        async with self._session() as db:
+            claimed = await self._claim(db)
+        # Concurrently, so tasks that wait on a batch (on-chain updates) share
+        # it; sessions are capped across all workers by max_sessions
+        await asyncio.gather(*(self._run(task) for task in claimed))
+        return len(claimed)
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[AsyncSession]:
+        """A database session, once fewer than `max_sessions` are open across all workers.
+
+        Keeps a task backlog from exhausting the pool that requests share.
+        """
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.max_sessions), loop
+        async with self._slots:
+            async with AsyncSessionLocal() as db:
+                yield db
+
+    async def _claim(self, db: AsyncSession) -> List[Any]:
+        now = datetime.utcnow()
+        due = (
+            select(_tasks.c.id)
+            .where(_tasks.c.status.in_(("pending", "running")), _tasks.c.available_at <= now)
+            .order_by(_tasks.c.available_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(_tasks)
+            .where(_tasks.c.id.in_(due))
+            .values(
+                status="running",
+                attempts=_tasks.c.attempts + 1,
+                available_at=now + timedelta(seconds=self.lease_seconds),
+            )
+            .returning(
+                _tasks.c.id,
+                _tasks.c.task_type,
+                _tasks.c.payload,
+                _tasks.c.idempotency_key,
+                _tasks.c.attempts,
+                _tasks.c.created_at,
+            )
+        )
+        claimed = result.all()
+        await db.commit()
+        return claimed
+
+    @staticmethod
+    def _held(task):
+        """Matches the row only while `task`'s claim is still its lease."""
+        return and_(_tasks.c.id == task.id, _tasks.c.status == "running", _tasks.c.attempts == task.attempts)
+
+    async def _run(self, task):
+        handler = self._handlers.get(task.task_type)
+        async with self._session() as db:
+            try:
+                if handler is None:
+                    raise LookupError(f"No handler registered for {task.task_type}")
+                await handler(db, task.payload, task.idempotency_key)
+                result = await db.execute(
+                    update(_tasks)
+                    .where(self._held(task))
+                    .values(status="done", completed_at=datetime.utcnow(), last_error=None)
+                )
+                if result.rowcount == 0:
+                    # Lease expired and another worker reclaimed the row; its run decides
+                    await db.rollback()
+                    logger.warning(f"Post-trade task {task.idempotency_key} outlived its lease; result discarded")
+                    POST_TRADE_TASKS.labels(task_type=task.task_type, outcome="lease_lost").inc()
+                    return
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                await self._fail(db, task, e)
+                return
+        POST_TRADE_TASKS.labels(task_type=task.task_type, outcome="done").inc()
+        if task.created_at:
+            lag = (datetime.utcnow() - task.created_at).total_seconds()
+            POST_TRADE_TASK_LAG_SECONDS.labels(task_type=task.task_type).observe(lag)
+
+    async def _fail(self, db: AsyncSession, task, error: Exception):
+        if task.attempts >= self.max_attempts:
+            outcome, values = "failed", {"status": "failed", "completed_at": datetime.utcnow()}
+            logger.error(f"Post-trade task {task.idempotency_key} failed after {task.attempts} attempts: {error}")
+        else:
+            delay = self.retry_base_seconds * 2 ** (task.attempts - 1)
+            outcome, values = "retry", {
+                "status": "pending",
+                "available_at": datetime.utcnow() + timedelta(seconds=delay),
+            }
+            logger.warning(f"Post-trade task {task.idempotency_key} attempt {task.attempts} failed, retrying in {delay:.0f}s: {error}")
+        result = await db.execute(
+            update(_tasks).where(self._held(task)).values(last_error=str(error)[:2000], **values)
+        )
+        await db.commit()
+        if result.rowcount == 0:
+            outcome = "lease_lost"
+        POST_TRADE_TASKS.labels(task_type=task.task_type, outcome=outcome).inc()
+
+
+post_trade_outbox = PostTradeOutbox(
+    workers=settings.POST_TRADE_WORKERS,
+    batch_size=settings.POST_TRADE_BATCH_SIZE,
+    poll_interval=settings.POST_TRADE_POLL_INTERVAL_SECONDS,
+    lease_seconds=settings.POST_TRADE_LEASE_SECONDS,
+    max_attempts=settings.POST_TRADE_MAX_ATTEMPTS,
+    retry_base_seconds=settings.POST_TRADE_RETRY_BASE_SECONDS,
+    max_sessions=settings.POST_TRADE_MAX_SESSIONS or max(1, settings.DB_POOL_SIZE // 2),
+)
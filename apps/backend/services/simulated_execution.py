@@ -0,0 +1,191 @@
+"""
+Simulated Execution
+Engine behind mock trades. Fills are priced off a shared market-data source
+whose prices follow a seeded random walk, and drawn from seeded per-user RNG
+streams, so a soak or load test replays the same fills for the same seed.
+Latency is a configurable profile; the default of zero adds no await at all,
+so mock trading is bounded by the database rather than by a sleep.
+"""
+
+import asyncio
+import math
+import random
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from ..core.config import settings
+
+# Fallback prices for assets the shared source hasn't been fed yet
+REFERENCE_PRICES: Dict[str, float] = {
+    "BTC-USD": 65000.0,
+    "ETH-USD": 3500.0,
+    "SOL-USD": 150.0,
+}
+DEFAULT_PRICE = 100.0
+
+# Namespace for simulated exchange order ids
+SIM_ORDER_NAMESPACE = uuid.UUID("5f0c7c1e-3b6a-4d0e-9a57-2f4b8f1d6c3a")
+
+
+class MarketDataSource:
+    """Last known price per asset, shared by every simulated fill.
+
+    Prices follow a seeded geometric random walk: each `tick()` moves every
+    known asset by one lognormal step, and `run()` ticks on an interval. The
+    same seed and tick count give the same prices. Feeds and test fixtures can
+    still set a price with `update`; the walk continues from it. Reads never
+    touch the network.
+    """
+
+    def __init__(
+        self,
+        reference_prices: Optional[Dict[str, float]] = None,
+        default_price: float = DEFAULT_PRICE,
+        seed: int = 0,
+        volatility: float = 0.0005,
+    ):
+        self.reference_prices = dict(reference_prices or REFERENCE_PRICES)
+        self.default_price = default_price
+        self.volatility = volatility
+        self.reset(seed)
+
+    def reset(self, seed: int):
+        """Back to the reference prices at tick 0 of `seed`'s path."""
+        self._prices: Dict[str, float] = dict(self.reference_prices)
+        self._rng = random.Random(f"{seed}:prices")
+        self.ticks = 0
+
+    def update(self, asset: str, price: float):
+        self._prices[asset] = float(price)
+
+    def price(self, asset: str) -> float:
+        return self._prices.get(asset, self.default_price)
+
+    def tick(self):
+        """Advance every known asset one step along the path."""
+        # Sorted, so the draws map to the same assets on every run
+        for asset in sorted(self._prices):
+            self._prices[asset] *= math.exp(self._rng.gauss(0, self.volatility))
+        self.ticks += 1
+
+    async def run(self, interval: float):
+        """Tick every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            self.tick()
+
+
+class LatencyProfile:
+    """Simulated exchange round trip: `base_ms` plus uniform jitter up to `jitter_ms`."""
+
+    def __init__(self, base_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.base_ms = base_ms
+        self.jitter_ms = jitter_ms
+
+    @property
+    def is_zero(self) -> bool:
+        return self.base_ms <= 0 and self.jitter_ms <= 0
+
+    def sample(self, rng: random.Random) -> float:
+        """Delay in seconds."""
+        return max(0.0, self.base_ms + rng.uniform(0.0, self.jitter_ms)) / 1000
+
+
+class SimulatedFill:
+    """Execution result with the same attributes as an exchange order result."""
+
+    __slots__ = ("price", "profit", "profit_percentage", "timestamp", "order_id")
+
+    def __init__(self, price: float, profit: float, profit_percentage: float, timestamp: datetime, order_id: str):
+        self.price = price
+        self.profit = profit
+        self.profit_percentage = profit_percentage
+        self.timestamp = timestamp
+        self.order_id = order_id
+
+
+class SimulatedExecutionEngine:
+    """Fills mock orders deterministically per (seed, user).
+
+    At most `max_streams` RNG streams are kept, least recently used first out.
+    An evicted user's stream restarts from the seed, so runs that replay fills
+    should stay under the bound.
+    """
+
+    def __init__(
+        self,
+        market_data: MarketDataSource,
+        latency: Optional[LatencyProfile] = None,
+        seed: int = 0,
+        spread_bps: float = 2.0,
+        volatility: float = 0.02,
+        max_streams: int = 10000,
+    ):
+        self.market_data = market_data
+        self.latency = latency or LatencyProfile()
+        self.seed = seed
+        self.spread_bps = spread_bps
+        self.volatility = volatility
+        self.max_streams = max_streams
+        self._streams: "OrderedDict[Tuple[int, str], random.Random]" = OrderedDict()
+
+    def rng(self, user_id: int, stream: str = "fills") -> random.Random:
+        """Independent RNG per user and purpose; latency draws never shift price draws."""
+        key = (user_id, stream)
+        rng = self._streams.get(key)
+        if rng is None:
+            rng = self._streams[key] = random.Random(f"{self.seed}:{user_id}:{stream}")
+            while len(self._streams) > self.max_streams:
+                self._streams.popitem(last=False)
+        else:
+            self._streams.move_to_end(key)
+        return rng
+
+    def reset(self, seed: Optional[int] = None):
+        """Restart every stream and the price path, optionally under a new seed (between soak test runs)."""
+        if seed is not None:
+            self.seed = seed
+        self._streams.clear()
+        self.market_data.reset(self.seed)
+
+    def order_id(self, trade_id: int) -> str:
+        """Exchange order id for a trade; unique per trade row, stable for the same seed."""
+        return f"SIM-{uuid.uuid5(SIM_ORDER_NAMESPACE, f'{self.seed}:{trade_id}')}"
+
+    async def execute(self, user_id: int, asset: str, direction: str, amount: float, trade_id: int) -> SimulatedFill:
+        if not self.latency.is_zero:
+            await asyncio.sleep(self.latency.sample(self.rng(user_id, "latency")))
+
+        base_price = self.market_data.price(asset)
+        spread = base_price * self.spread_bps / 10000
+        executed_price = base_price + spread if direction == "long" else base_price - spread
+
+        market_movement = self.rng(user_id).gauss(0, self.volatility)
+        if direction == "long":
+            exit_price = executed_price * (1 + market_movement)
+        else:
+            exit_price = executed_price * (1 - market_movement)
+
+        profit_percentage = ((exit_price - executed_price) / executed_price) * 100
+        if direction == "short":
+            profit_percentage = -profit_percentage
+
+        return SimulatedFill(
+            price=executed_price,
+            profit=float(amount) * (profit_percentage / 100),
+            profit_percentage=profit_percentage,
+            timestamp=datetime.utcnow(),
+            order_id=self.order_id(trade_id),
+        )
+
+
+market_data = MarketDataSource(seed=settings.SIM_SEED, volatility=settings.SIM_PRICE_VOLATILITY)
+simulated_engine = SimulatedExecutionEngine(
+    market_data,
+    latency=LatencyProfile(settings.SIM_LATENCY_MS, settings.SIM_LATENCY_JITTER_MS),
+    seed=settings.SIM_SEED,
+    spread_bps=settings.SIM_SPREAD_BPS,
+    volatility=settings.SIM_VOLATILITY,
+)
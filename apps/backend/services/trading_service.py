@@ -1,16 +1,21 @@
-from typing import Optional, Dict, Any
-import asyncio
+from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
-import random
 from decimal import Decimal
 
-from repositories.user_repository import UserRepository
-from repositories.trade_repository import TradeRepository
-from external.exchange_client import ExchangeClient
-from external.starknet_client import StarknetClient
-from core.events import EventBus, TradeExecutedEvent
-from models.trade import Trade, TradeStatus
-from schemas.trade import TradeRequest, TradeResult
+from ..repositories.user_repository import UserRepository
+from ..repositories.trade_repository import TradeRepository
+from ..external.exchange_client import ExchangeClient
+from ..external.starknet_client import StarknetClient
+from ..core.events import EventBus, TradeExecutedEvent
+from ..core.metrics import TRADE_PHASE_SECONDS
+from ..models.trade import Trade, TradeStatus
+from ..schemas.trade import TradeRequest, TradeResult
+from .game_stats_service import record_trade_completion
+from .onchain_batcher import onchain_batcher
+from .post_trade_outbox import enqueue, post_trade_outbox
+from .simulated_execution import SimulatedExecutionEngine, simulated_engine
+from .trading_state import TradingState, lock_trading_state, trading_state_cache
+from .xp_ledger import xp_ledger
 
 class TradingService:
     def __init__(
@@ -19,77 +24,113 @@ class TradingService:
         trade_repo: TradeRepository,
         exchange_client: ExchangeClient,
         starknet_client: StarknetClient,
-        event_bus: EventBus
+        event_bus: EventBus,
+        execution_engine: Optional[SimulatedExecutionEngine] = None
     ):
         self.user_repo = user_repo
         self.trade_repo = trade_repo
         self.exchange_client = exchange_client
         self.starknet_client = starknet_client
         self.event_bus = event_bus
+        self.execution_engine = execution_engine or simulated_engine
+        onchain_batcher.bind(starknet_client)
+        # Side effects run on outbox workers, each with its own session
+        post_trade_outbox.register("xp", self._grant_xp)
+        post_trade_outbox.register("daily_streak", self._update_daily_streak)
+        post_trade_outbox.register("blockchain", self._update_blockchain_stats)
+        post_trade_outbox.register("trade_event", self._emit_trade_event)
         
     async def execute_trade(
         self,
         user_id: int,
-        request: TradeRequest
+        request: TradeRequest,
+        client_order_id: Optional[str] = None
     ) -> TradeResult:
-        """Execute a trade with full error handling and rollback"""
+        """Execute a trade with full error handling and rollback
+
+        client_order_id is sent to the exchange as clientOrderId; callers derive
+        it from the request's Idempotency-Key so a retried order is deduplicated.
+        """
+        mode = "mock" if request.is_mock else "real"
+
+        def phase(name: str):
+            return TRADE_PHASE_SECONDS.labels(phase=name, mode=mode).time()
+
         # Validate user and limits
-        user = await self.user_repo.get_by_id(user_id)
-        if not user:
-            raise ValueError("User not found")
-        
-        await self._validate_trade_limits(user, request)
+        with phase("validate"):
+            user = await self.user_repo.get_by_id(user_id)
+            if not user:
+                raise ValueError("User not found")
+            
+            # Fast pre-check on the cached snapshot, which may miss recent trades
+            snapshot = await trading_state_cache.get(self.trade_repo.db, user_id)
+            await self._validate_trade_limits(user, request, snapshot)
         
         # Create pending trade record
-        trade = await self.trade_repo.create({
-            'user_id': user_id,
-            'asset': request.asset,
-            'direction': request.direction,
-            'amount': float(request.amount),
-            'status': TradeStatus.PENDING,
-            'created_at': datetime.utcnow()
-        })
+        with phase("create_record"):
+            # Enforced here: committed counters, under a user row lock held
+            # until the trade row commits. This state serves rewards and achievements
+            state = await lock_trading_state(self.trade_repo.db, user_id)
+            try:
+                await self._validate_trade_limits(user, request, state)
+            except ValueError:
+                await self.trade_repo.db.rollback()
+                raise
+            trading_state_cache.store(state)
+            trade = await self.trade_repo.create({
+                'user_id': user_id,
+                'asset': request.asset,
+                'direction': request.direction,
+                'amount': float(request.amount),
+                'status': TradeStatus.PENDING,
+                'created_at': datetime.utcnow()
+            })
+            trading_state_cache.record_trade(state, trade.created_at)
         
         try:
             # Execute on exchange (or mock)
-            if request.is_mock:
-                exchange_result = await self._execute_mock_trade(request)
-            else:
-                exchange_result = await self.exchange_client.place_order(
-                    symbol=request.asset,
-                    side=request.direction,
-                    amount=request.amount,
-                    leverage=request.leverage
-                )
+            with phase("execute"):
+                if request.is_mock:
+                    exchange_result = await self._execute_mock_trade(user_id, request, trade.id)
+                else:
+                    exchange_result = await self.exchange_client.place_order(
+                        symbol=request.asset,
+                        side=request.direction,
+                        amount=request.amount,
+                        leverage=request.leverage,
+                        client_order_id=client_order_id
+                    )
             
             # Update trade with result
-            trade = await self.trade_repo.update(trade.id, {
-                'status': TradeStatus.COMPLETED,
-                'executed_price': exchange_result.price,
-                'profit_amount': exchange_result.profit,
-                'profit_percentage': exchange_result.profit_percentage,
-                'execution_time': exchange_result.timestamp,
-                'exchange_order_id': exchange_result.order_id
-            })
+            with phase("complete_record"):
+                trade = await self.trade_repo.update(trade.id, {
+                    'status': TradeStatus.COMPLETED,
+                    'executed_price': exchange_result.price,
+                    'profit_amount': exchange_result.profit,
+                    'profit_percentage': exchange_result.profit_percentage,
+                    'execution_time': exchange_result.timestamp,
+                    'exchange_order_id': exchange_result.order_id
+                }, commit=False)
+                await record_trade_completion(
+                    self.trade_repo.db,
+                    user_id,
+                    trade.profit_amount,
+                    trade.execution_time,
+                )
             
             # Calculate rewards
-            rewards = await self._calculate_rewards(user, trade)
-            
-            # Update user stats
-            await self.user_repo.update_xp(user_id, rewards['xp'])
-            await self.user_repo.update_daily_streak(user_id)
-            
-            # Update on-chain if real trade
-            if not request.is_mock:
-                await self._update_blockchain_stats(user_id, trade, rewards)
+            with phase("rewards"):
+                rewards = await self._calculate_rewards(user, trade, state)
             
-            # Emit event
-            await self.event_bus.emit(TradeExecutedEvent(
-                user_id=user_id,
-                trade_id=trade.id,
-                profit=trade.profit_amount,
-                xp_gained=rewards['xp']
-            ))
+            # XP, streak, on-chain and event side effects go to the outbox; the
+            # completed trade, stats counters and tasks commit together
+            with phase("enqueue"):
+                await enqueue(
+                    self.trade_repo.db,
+                    self._post_trade_tasks(user_id, trade, rewards, request.is_mock)
+                )
+                await self.trade_repo.db.commit()
+                post_trade_outbox.notify()
             
             return TradeResult(
                 trade_id=trade.id,
@@ -102,21 +143,17 @@ class TradingService:
             
         except Exception as e:
             # Rollback on failure
+            await self.trade_repo.db.rollback()
             await self.trade_repo.update(trade.id, {
                 'status': TradeStatus.FAILED,
                 'error_message': str(e)
             })
             raise
-    
-    async def _validate_trade_limits(self, user, request):
+
+    async def _validate_trade_limits(self, user, request, state: TradingState):
         """Validate trade against user limits"""
         # Check daily trade limit
-        today_trades = await self.trade_repo.get_user_trades_count(
-            user.id,
-            since=datetime.utcnow() - timedelta(days=1)
-        )
-        
-        if today_trades >= self._get_daily_trade_limit(user.level):
+        if state.daily_count >= self._get_daily_trade_limit(user.level):
             raise ValueError("Daily trade limit exceeded")
         
         # Check position size limit
@@ -125,51 +162,20 @@ class TradingService:
             raise ValueError(f"Position size exceeds limit of {max_position}")
         
         # Check cooldown period
-        last_trade = await self.trade_repo.get_last_user_trade(user.id)
-        if last_trade:
+        if state.last_trade_at:
             cooldown = self._get_trade_cooldown(user.level)
-            time_since_last = datetime.utcnow() - last_trade.created_at
+            time_since_last = datetime.utcnow() - state.last_trade_at
             if time_since_last < cooldown:
                 remaining = cooldown - time_since_last
                 raise ValueError(f"Trade cooldown: {remaining.seconds}s remaining")
     
-    async def _execute_mock_trade(self, request):
-        """Execute a mock trade with realistic simulation"""
-        # Simulate execution delay
-        await asyncio.sleep(random.uniform(0.5, 2.0))
-        
-        # Generate realistic price movement
-        base_price = await self._get_mock_price(request.asset)
-        spread = base_price * 0.0002  # 0.02% spread
-        
-        if request.direction == 'long':
-            executed_price = base_price + spread
-        else:
-            executed_price = base_price - spread
-        
-        # Simulate profit/loss based on market conditions
-        market_movement = random.gauss(0, 0.02)  # 2% std dev
-        
-        if request.direction == 'long':
-            exit_price = executed_price * (1 + market_movement)
-        else:
-            exit_price = executed_price * (1 - market_movement)
-        
-        profit_percentage = ((exit_price - executed_price) / executed_price) * 100
-        if request.direction == 'short':
-            profit_percentage = -profit_percentage
-        
-        profit_amount = float(request.amount) * (profit_percentage / 100)
-        
-        return {
-            'price': executed_price,
-            'profit': profit_amount,
-            'profit_percentage': profit_percentage,
-            'timestamp': datetime.utcnow(),
-            'order_id': f"MOCK-{int(datetime.utcnow().timestamp())}"
-        }
+    async def _execute_mock_trade(self, user_id: int, request, trade_id: int):
+        """Fill a mock trade on the simulated execution engine"""
+        return await self.execution_engine.execute(
+            user_id, request.asset, request.direction, request.amount, trade_id
+        )
     
-    async def _calculate_rewards(self, user, trade) -> Dict[str, Any]:
+    async def _calculate_rewards(self, user, trade, state: TradingState) -> Dict[str, Any]:
         """Calculate XP and other rewards for a trade"""
         base_xp = 10
         
@@ -191,14 +197,15 @@ class TradingService:
         )
         
         # Check for achievements
-        achievements = await self._check_achievements(user, trade)
+        achievements = self._check_achievements(user, trade, state)
         
         # Bonus items (random chance)
         bonus_items = []
-        if random.random() < 0.1:  # 10% chance
+        rng = self.execution_engine.rng(user.id, "rewards")
+        if rng.random() < 0.1:  # 10% chance
             bonus_items.append({
                 'type': 'shield_dust',
-                'amount': random.randint(5, 20)
+                'amount': rng.randint(5, 20)
             })
         
         return {
@@ -212,31 +219,59 @@ class TradingService:
             }
         }
     
-    async def _update_blockchain_stats(self, user_id, trade, rewards):
-        """Update user stats on blockchain"""
-        try:
-            # Update points on leaderboard contract
-            await self.starknet_client.update_user_points(
-                user_address=await self._get_user_starknet_address(user_id),
-                points_delta=rewards['xp']
-            )
-            
-            # Mint achievement NFTs if any
-            for achievement in rewards['achievements']:
-                await self.starknet_client.mint_achievement(
-                    user_address=await self._get_user_starknet_address(user_id),
-                    achievement_id=achievement['id']
-                )
-        except Exception as e:
-            # Log but don't fail the trade
-            print(f"Blockchain update failed: {e}")
+    def _post_trade_tasks(self, user_id, trade, rewards, is_mock) -> List[Dict[str, Any]]:
+        """Outbox tasks for a completed trade, keyed so each effect applies once"""
+        def task(task_type, payload):
+            return {
+                'task_type': task_type,
+                'payload': payload,
+                'idempotency_key': f"trade:{trade.id}:{task_type}"
+            }
+        
+        tasks = [
+            task('xp', {'user_id': user_id, 'xp': rewards['xp']}),
+            task('daily_streak', {'user_id': user_id}),
+            task('trade_event', {
+                'user_id': user_id,
+                'trade_id': trade.id,
+                'profit': float(trade.profit_amount),
+                'xp_gained': rewards['xp']
+            }),
+        ]
+        # Update on-chain if real trade
+        if not is_mock:
+            tasks.append(task('blockchain', {
+                'user_id': user_id,
+                'points': rewards['xp'],
+                'achievement_ids': [a['id'] for a in rewards['achievements']]
+            }))
+        return tasks
+    
+    async def _grant_xp(self, db, payload, idempotency_key):
+        """Commits with the task's completion, so a retry can't grant twice"""
+        await xp_ledger.apply(db, payload['user_id'], payload['xp'], commit=False)
+    
+    async def _update_daily_streak(self, db, payload, idempotency_key):
+        """Safe to repeat: a second update on the same day is a no-op"""
+        await UserRepository(db, self.user_repo.cache).update_daily_streak(payload['user_id'])
     
-    async def _check_achievements(self, user, trade):
+    async def _update_blockchain_stats(self, db, payload, idempotency_key):
+        """Queue points and mints for the next multicall; failures are retried by the outbox"""
+        await onchain_batcher.submit(
+            await self._get_user_starknet_address(payload['user_id']),
+            points_delta=payload['points'],
+            achievement_ids=payload['achievement_ids']
+        )
+    
+    async def _emit_trade_event(self, db, payload, idempotency_key):
+        await self.event_bus.emit(TradeExecutedEvent(**payload))
+    
+    def _check_achievements(self, user, trade, state: TradingState):
         """Check if user unlocked any achievements"""
         achievements = []
         
-        # First trade achievement
-        if await self.trade_repo.get_user_trades_count(user.id) == 1:
+        # First trade achievement (the snapshot already counts this trade)
+        if state.lifetime_count == 1:
             achievements.append({
                 'id': 'first_trade',
                 'name': 'First Steps',
@@ -274,15 +309,6 @@ class TradingService:
         seconds = max(10, 60 - (level * 5))
         return timedelta(seconds=seconds)
     
-    async def _get_mock_price(self, asset: str) -> float:
-        """Get mock price for asset"""
-        prices = {
-            'BTC-USD': 65000.0,
-            'ETH-USD': 3500.0,
-            'SOL-USD': 150.0,
-        }
-        return prices.get(asset, 100.0)
-    
     async def _get_user_starknet_address(self, user_id: int) -> str:
         """Get user's Starknet address"""
         # This would be stored in the database
@@ -0,0 +1,116 @@
+"""
+Trading State
+Per-user snapshot of what trade validation, rewards and achievements need
+from trade history: trades in the last day, last trade time and lifetime
+count. The snapshot is one aggregate query over (user_id, created_at), and
+it's cached in-process for a short TTL. Trades placed through this process
+update the cached snapshot in place, so back-to-back trades skip the query.
+
+A cached snapshot can miss trades from other instances or concurrent
+requests, so it only pre-checks limits. lock_trading_state re-reads the
+counters under the user's row lock right before the trade row is written;
+that check is the one that enforces limits.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.database import Trade, User
+
+DAILY_WINDOW = timedelta(days=1)
+
+
+class TradingState:
+    """A user's trade counters as of `loaded_at`."""
+
+    __slots__ = ("user_id", "daily_count", "lifetime_count", "last_trade_at", "loaded_at")
+
+    def __init__(
+        self,
+        user_id: int,
+        daily_count: int,
+        lifetime_count: int,
+        last_trade_at: Optional[datetime],
+        loaded_at: datetime,
+    ):
+        self.user_id = user_id
+        self.daily_count = daily_count
+        self.lifetime_count = lifetime_count
+        self.last_trade_at = last_trade_at
+        self.loaded_at = loaded_at
+
+    def record_trade(self, created_at: datetime):
+        self.daily_count += 1
+        self.lifetime_count += 1
+        self.last_trade_at = created_at
+
+
+async def load_trading_state(db: AsyncSession, user_id: int) -> TradingState:
+    """All three counters in a single aggregate query."""
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(
+            func.count(case((Trade.created_at >= now - DAILY_WINDOW, Trade.id))).label("daily_count"),
+            func.count(Trade.id).label("lifetime_count"),
+            func.max(Trade.created_at).label("last_trade_at"),
+        ).where(Trade.user_id == user_id)
+    )
+    row = result.one()
+    return TradingState(user_id, row.daily_count, row.lifetime_count, row.last_trade_at, now)
+
+
+async def lock_trading_state(db: AsyncSession, user_id: int) -> TradingState:
+    """Counters as committed, read under a lock on the user's row.
+
+    The SELECT ... FOR UPDATE is held until the caller's transaction ends, so
+    concurrent trades by one user, on any instance, are validated and
+    written one after another.
+    """
+    await db.execute(select(User.id).where(User.id == user_id).with_for_update())
+    return await load_trading_state(db, user_id)
+
+
+class TradingStateCache:
+    """Short-lived in-process snapshots keyed by user id."""
+
+    def __init__(self, ttl_seconds: float = 10.0, max_entries: int = 50000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[int, Tuple[float, TradingState]] = {}
+
+    async def get(self, db: AsyncSession, user_id: int) -> TradingState:
+        entry = self._entries.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        state = await load_trading_state(db, user_id)
+        self._store(state)
+        return state
+
+    def store(self, state: TradingState):
+        """Replace the cached snapshot with a fresher one."""
+        self._store(state)
+
+    def record_trade(self, state: TradingState, created_at: datetime):
+        """Count a newly created trade in the snapshot (and the cache, if it's cached)."""
+        state.record_trade(created_at)
+        if state.user_id not in self._entries:
+            self._store(state)
+
+    def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+    def _store(self, state: TradingState):
+        if len(self._entries) >= self.max_entries:
+            now = time.monotonic()
+            self._entries = {key: entry for key, entry in self._entries.items() if entry[0] > now}
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+        self._entries[state.user_id] = (time.monotonic() + self.ttl_seconds, state)
+
+
+trading_state_cache = TradingStateCache(ttl_seconds=settings.TRADING_STATE_TTL_SECONDS)
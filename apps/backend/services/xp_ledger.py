@@ -0,0 +1,99 @@
+"""
+XP Ledger
+Single entry point for XP grants. Increments are applied in SQL
+(UPDATE ... SET xp = xp + :delta RETURNING xp, level), so concurrent grants
+can't lose updates.
+"""
+
+import logging
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..auth.auth import invalidate_cached_user
+from ..core.database import User, after_commit
+from .leaderboard_service import xp_leaderboard
+
+logger = logging.getLogger(__name__)
+
+XP_PER_LEVEL = 100
+
+_users = User.__table__
+
+
+def level_for_xp(xp: int) -> int:
+    """Level formula, mirrored in SQL by xp_increment_values."""
+    return 1 + (xp or 0) // XP_PER_LEVEL
+
+
+def xp_increment_values(delta) -> Dict[str, Any]:
+    """UPDATE values adding `delta` (a literal or bindparam) to xp and recomputing level in SQL."""
+    new_xp = func.coalesce(_users.c.xp, 0) + delta
+    return {
+        "xp": new_xp,
+        "level": 1 + new_xp // XP_PER_LEVEL,
+        "updated_at": datetime.utcnow(),
+    }
+
+
+class XPLedger:
+    """Applies XP deltas atomically and keeps the XP read models in step."""
+
+    async def apply(self, db: AsyncSession, user_id: int, delta: int, commit: bool = True) -> Tuple[int, int]:
+        """Add `delta` XP to a user in one statement. Returns the new (xp, level).
+
+        With commit=False the caller owns the transaction; the auth cache and
+        leaderboard are refreshed only once it commits, never on a rollback.
+        """
+        row = self._applied(user_id, await db.execute(self._increment(user_id, delta)))
+        refresh = partial(self.refresh_read_models, [(user_id, row.xp, row.level, row.username, row.is_active)])
+        if commit:
+            await db.commit()
+            await refresh()
+        else:
+            after_commit(db, refresh)
+        return row.xp, row.level
+
+    def apply_sync(self, db: Session, user_id: int, delta: int) -> Tuple[int, int]:
+        """`apply` for routes on a sync Session. Never commits: the read models
+        are refreshed once the caller's transaction does."""
+        row = self._applied(user_id, db.execute(self._increment(user_id, delta)))
+        after_commit(db, partial(self.refresh_read_models, [(user_id, row.xp, row.level, row.username, row.is_active)]))
+        return row.xp, row.level
+
+    @staticmethod
+    def _increment(user_id: int, delta: int):
+        return (
+            update(_users)
+            .where(_users.c.id == user_id)
+            .values(**xp_increment_values(delta))
+            .returning(_users.c.xp, _users.c.level, _users.c.username, _users.c.is_active)
+        )
+
+    @staticmethod
+    def _applied(user_id: int, result):
+        row = result.first()
+        if row is None:
+            raise ValueError(f"User {user_id} not found")
+        return row
+
+    async def refresh_read_models(self, rows: List[Tuple[int, int, int, str, bool]]):
+        """Core UPDATEs bypass ORM events; refresh the auth cache and leaderboard explicitly.
+
+        Rows are (user_id, xp, level, username, is_active). Inactive users stay
+        out of the ranking, as in rebuild_leaderboard.
+        """
+        for user_id, xp, level, username, is_active in rows:
+            invalidate_cached_user(user_id)
+            if is_active:
+                await xp_leaderboard.update(user_id, xp, level, username)
+            else:
+                await xp_leaderboard.remove(user_id)
+
+
+# Global ledger instance
+xp_ledger = XPLedger()
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from apps.backend.api.v1.trading import nft_integration
+from apps.backend.core import response_cache as cache_module
+from apps.backend.core.database import Base, User, get_db
+from apps.backend.core.response_cache import MemoryResponseCache
+from apps.backend.models.game_models import Artifact, UserGameStats
+from apps.backend.services import xp_ledger as xp_ledger_module
+from apps.backend.services.leaderboard_service import InMemoryLeaderboard
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(cache_module.response_cache, "backend", MemoryResponseCache())
+    monkeypatch.setattr(xp_ledger_module, "xp_leaderboard", InMemoryLeaderboard())
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    session.add(User(id=1, username="trader", hashed_password="x", level=30))
+    session.add(UserGameStats(user_id=1, total_trades=3, successful_trades=2))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(nft_integration.router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[nft_integration.get_current_user] = lambda: db.get(User, 1)
+    return TestClient(app)
+
+
+class TestNFTIntegration:
+    def test_mint_invalidates_cached_global_stats(self, client, db):
+        assert client.get("/api/v1/nft/stats/global").json()["total_genesis_nfts"] == 0
+
+        # Written behind the cache's back: still served from the cached body
+        db.add(Artifact(user_id=1, artifact_type="genesis_level_milestone", rarity="rare", bonus_percentage=10.0))
+        db.commit()
+        assert client.get("/api/v1/nft/stats/global").json()["total_genesis_nfts"] == 0
+
+        response = client.post(
+            "/api/v1/nft/genesis/mint",
+            json={"achievement_type": "first_trade", "milestone_data": {}},
+        )
+        assert response.status_code == 200, response.text
+        assert client.get("/api/v1/nft/stats/global").json()["total_genesis_nfts"] == 2
+
+    def test_collection_endpoints_serialize_through_model_response(self, client, db):
+        db.add(Artifact(user_id=1, artifact_type="genesis_first_trade", rarity="common", bonus_percentage=5.0))
+        db.commit()
+
+        for path in ("/api/v1/nft/genesis/collection/1", "/api/v1/nft/genesis/collection"):
+            response = client.get(path)
+            assert response.status_code == 200, response.text
+            body = response.json()
+            assert body["total_nfts"] == 1
+            assert body["featured_nft"]["achievement_type"] == "first_trade"
+
+    def test_mint_grants_xp_through_the_ledger(self, client, db):
+        response = client.post(
+            "/api/v1/nft/genesis/mint",
+            json={"achievement_type": "first_trade", "milestone_data": {}},
+        )
+        assert response.status_code == 200, response.text
+        points = response.json()["points_earned"]
+
+        db.expire_all()
+        user = db.get(User, 1)
+        assert (user.xp, user.level) == (points, 1 + points // 100)
+        # The committed grant reached the materialized ranking
+        page, _ = asyncio.run(xp_ledger_module.xp_leaderboard.get_page())
+        assert [(entry["user_id"], entry["xp"]) for entry in page] == [(1, points)]
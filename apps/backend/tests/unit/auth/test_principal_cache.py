@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from apps.backend.auth.principal_cache import user_principal_cache
+from apps.backend.core.database import Base, User
+from apps.backend.models import game_models  # noqa: F401  (maps User's relationships)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, expire_on_commit=False)()
+    db.add(User(id=1, username="trader", hashed_password="x", is_active=True))
+    db.commit()
+    user_principal_cache.clear()
+    yield db
+    user_principal_cache.clear()
+    db.close()
+    engine.dispose()
+
+
+class TestUserPrincipalCache:
+    def test_deactivation_removes_user_after_commit(self, session):
+        async def run():
+            user = session.get(User, 1)
+            user_principal_cache.set("trader", user)
+
+            user.is_active = False
+            session.flush()
+            assert user_principal_cache.get("trader") is None
+
+            # A concurrent request re-caches the still-committed active row
+            stale = User(id=1, username="trader", hashed_password="x", is_active=True)
+            user_principal_cache.set("trader", stale)
+
+            session.commit()
+            await asyncio.sleep(0)
+            return user_principal_cache.get("trader")
+
+        assert asyncio.run(run()) is None
+
+    def test_rollback_keeps_flush_time_eviction_only(self, session):
+        async def run():
+            user = session.get(User, 1)
+            user.level = 5
+            session.flush()
+            session.rollback()
+            user_principal_cache.set("trader", session.get(User, 1))
+            await asyncio.sleep(0)
+            return user_principal_cache.get("trader")
+
+        assert asyncio.run(run()).level == 1
@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from apps.backend.core.database import Base, TradeIdempotencyKey
+from apps.backend.core.idempotency import (
+    REPLAYED_HEADER,
+    client_order_id,
+    idempotency_cache,
+    purge_expired_keys,
+    request_hash,
+    run_idempotent,
+)
+from apps.backend.core.response_cache import MemoryResponseCache
+from apps.backend.models import game_models  # noqa: F401  (maps User's relationships)
+
+
+class Result(BaseModel):
+    trade_id: int
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'idempotency.db'}")
+    idempotency_cache.backend = MemoryResponseCache()
+
+    async def open_session():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        return async_sessionmaker(engine, expire_on_commit=False)()
+
+    session = asyncio.run(open_session())
+    yield session
+    asyncio.run(session.close())
+    asyncio.run(engine.dispose())
+
+
+def submit(db, key, payload, execute):
+    return asyncio.run(run_idempotent(db, 1, key, "/trade/mock", payload, execute))
+
+
+class TestIdempotentTrades:
+    def test_client_order_id_is_stable_per_user_and_key(self):
+        assert client_order_id(1, "abc") == client_order_id(1, "abc")
+        assert client_order_id(1, "abc") != client_order_id(2, "abc")
+        assert request_hash("/trade", {"amount": 1}) != request_hash("/trade/real", {"amount": 1})
+
+    def test_retry_replays_without_executing(self, db):
+        order_ids = []
+
+        async def execute(order_id):
+            order_ids.append(order_id)
+            return Result(trade_id=len(order_ids))
+
+        first = submit(db, "key-1", {"amount": 10}, execute)
+        retry = submit(db, "key-1", {"amount": 10}, execute)
+
+        assert order_ids == [client_order_id(1, "key-1")]
+        assert retry.body == first.body
+        assert retry.headers[REPLAYED_HEADER] == "true"
+
+    def test_key_reuse_with_different_payload_is_rejected(self, db):
+        async def execute(order_id):
+            return Result(trade_id=1)
+
+        submit(db, "key-1", {"amount": 10}, execute)
+        with pytest.raises(HTTPException) as exc:
+            submit(db, "key-1", {"amount": 20}, execute)
+        assert exc.value.status_code == 422
+
+    def test_failed_attempt_releases_key(self, db):
+        async def failing(order_id):
+            raise ValueError("Daily trade limit exceeded")
+
+        async def execute(order_id):
+            return Result(trade_id=7)
+
+        with pytest.raises(ValueError):
+            submit(db, "key-1", {"amount": 10}, failing)
+        assert submit(db, "key-1", {"amount": 10}, execute).body == b'{"trade_id":7}'
+
+    def test_stalled_attempt_is_not_run_again(self, db):
+        # A first attempt whose worker died after claiming the key
+        db.add(TradeIdempotencyKey(
+            user_id=1, idempotency_key="key-1", request_hash=request_hash("/trade/mock", {"amount": 10}),
+            status="in_progress", created_at=datetime.utcnow() - timedelta(minutes=5),
+        ))
+        asyncio.run(db.commit())
+        executed = []
+
+        async def execute(order_id):
+            executed.append(order_id)
+            return Result(trade_id=1)
+
+        with pytest.raises(HTTPException) as exc:
+            submit(db, "key-1", {"amount": 10}, execute)
+        assert exc.value.status_code == 409
+        assert "did not finish" in exc.value.detail
+        assert executed == []
+
+    def test_purge_deletes_only_expired_keys(self, db):
+        now = datetime.utcnow()
+        for i, age in enumerate((timedelta(days=3), timedelta(days=2), timedelta(minutes=5))):
+            db.add(TradeIdempotencyKey(
+                user_id=1, idempotency_key=f"key-{i}", request_hash="h", status="completed", created_at=now - age
+            ))
+        asyncio.run(db.commit())
+
+        assert asyncio.run(purge_expired_keys(db, ttl_seconds=24 * 60 * 60, batch_size=1)) == 2
+        remaining = asyncio.run(db.execute(select(TradeIdempotencyKey.idempotency_key))).scalars().all()
+        assert remaining == ["key-2"]
+
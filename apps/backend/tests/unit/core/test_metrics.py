@@ -0,0 +1,46 @@
+import io
+
+from prometheus_client import CollectorRegistry
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from apps.backend.core.metrics import LoggerStatsCollector, PoolStatsCollector
+from apps.backend.utils.logging import StructuredLogger
+
+
+class TestPoolStatsCollector:
+    def test_reads_pool_counters_at_scrape_time(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=2)
+        registry = CollectorRegistry()
+        registry.register(PoolStatsCollector({"sync": engine}))
+
+        def sample(name):
+            return registry.get_sample_value(name, {"engine": "sync"})
+
+        # Checked out with no request completing in between, as during pool exhaustion
+        first, second = engine.connect(), engine.connect()
+        assert (sample("astratrade_db_pool_checked_out"), sample("astratrade_db_pool_overflow")) == (2, 1)
+        first.close()
+        second.close()
+        assert (sample("astratrade_db_pool_checked_out"), sample("astratrade_db_pool_size")) == (0, 1)
+        engine.dispose()
+
+
+class TestLoggerStatsCollector:
+    def test_exports_dropped_and_sampled_out_records(self):
+        logger = StructuredLogger("metrics-test", sample_rates={"api_call:2xx": 0.0}, stream=io.StringIO())
+        registry = CollectorRegistry()
+        collector = LoggerStatsCollector()
+        collector.register("api", logger)
+        registry.register(collector)
+
+        logger.log_api_call("/trade", "POST", 200, 1.0)
+        logger.queue_handler.dropped += 3
+
+        def sample(name):
+            return registry.get_sample_value(name, {"logger": "api"})
+
+        assert sample("astratrade_log_records_sampled_out_total") == 1
+        assert sample("astratrade_log_records_dropped_total") == 3
+        assert sample("astratrade_log_queue_depth") is not None
+        logger.close()
@@ -0,0 +1,83 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from apps.backend.core.config import settings
+from apps.backend.core.middleware import RequestLoggingMiddleware
+from apps.backend.core.query_budget import (
+    QueryBudgetExceeded,
+    assert_max_queries,
+    query_budget,
+    repeated_statements,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO items (id) VALUES (1), (2), (3)"))
+    yield engine
+    engine.dispose()
+
+
+class TestQueryBudget:
+    def test_within_budget_passes_and_counts(self, engine):
+        with engine.connect() as conn:
+            with assert_max_queries(1) as stats:
+                conn.execute(text("SELECT id FROM items")).all()
+        assert stats.count == 1
+
+    def test_loop_query_exceeds_budget_and_is_reported_as_repeated(self, engine):
+        with engine.connect() as conn:
+            with pytest.raises(QueryBudgetExceeded):
+                with assert_max_queries(2) as stats:
+                    for item_id in (1, 2, 3):
+                        conn.execute(text("SELECT id FROM items WHERE id = :id"), {"id": item_id}).first()
+
+        [(shape, count)] = repeated_statements(stats, threshold=3)
+        assert count == 3
+        assert shape == "SELECT id FROM items WHERE id = ?"
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.api_calls = []
+
+    def log_api_call(self, **fields):
+        self.api_calls.append(fields)
+
+
+class TestQueryBudgetMiddleware:
+    @pytest.fixture
+    def app(self, engine, monkeypatch):
+        monkeypatch.setattr(settings, "QUERY_DETECTOR_ENABLED", True)
+        app = FastAPI()
+        app.state.logger = RecordingLogger()
+        app.add_middleware(RequestLoggingMiddleware, logger=app.state.logger)
+
+        @app.get("/items/{item_id}")
+        @query_budget(1)
+        async def get_item(item_id: int):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT id FROM items WHERE id = :id"), {"id": item_id}).first()
+                conn.execute(text("SELECT count(*) FROM items")).scalar()
+            return {"id": item_id}
+
+        return app
+
+    def test_over_budget_route_fails_in_strict_mode(self, app, monkeypatch):
+        monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", True)
+
+        with pytest.raises(QueryBudgetExceeded, match=r"GET /items/\{item_id\} ran 2 queries, budget is 1"):
+            TestClient(app).get("/items/1")
+
+    def test_over_budget_route_is_only_logged_by_default(self, app, monkeypatch):
+        monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", False)
+
+        assert TestClient(app).get("/items/1").status_code == 200
+        [call] = app.state.logger.api_calls
+        assert call["db_queries"] == 2
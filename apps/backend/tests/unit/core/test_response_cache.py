@@ -0,0 +1,64 @@
+import asyncio
+
+from fastapi import Depends, FastAPI, Query
+from fastapi.testclient import TestClient
+
+from apps.backend.core import response_cache as cache_module
+from apps.backend.core.response_cache import MemoryResponseCache, ResponseCache, cached_response
+
+
+def dependency():
+    return object()
+
+
+class TestMemoryResponseCache:
+    def test_eviction_and_expiry_leave_namespaces(self):
+        cache = MemoryResponseCache(max_entries=2)
+
+        async def run():
+            await cache.set("a", "k1", (b"1", "e1"), ttl=60)
+            await cache.set("b", "k2", (b"2", "e2"), ttl=-1)
+            await cache.set("a", "k3", (b"3", "e3"), ttl=60)
+            assert await cache.get("b", "k2") is None
+
+        asyncio.run(run())
+        assert list(cache._entries) == ["k3"]
+        assert cache._namespaces == {"a": {"k3"}}
+
+
+class TestCachedResponse:
+    def test_key_ignores_undeclared_query_parameters(self, monkeypatch):
+        backend = MemoryResponseCache()
+        monkeypatch.setattr(cache_module, "response_cache", ResponseCache(backend))
+        calls = []
+        app = FastAPI()
+
+        @app.get("/items")
+        @cached_response("items", ttl=60)
+        async def list_items(limit: int = Query(10), dep=Depends(dependency)):
+            calls.append(limit)
+            return {"limit": limit}
+
+        client = TestClient(app)
+        for query in ("", "?junk=1", "?junk=2&other=x", "?limit=10"):
+            assert client.get(f"/items{query}").json() == {"limit": 10}
+        client.get("/items?limit=5")
+
+        assert calls == [10, 5]
+        assert len(backend._entries) == 2
+
+    def test_warm_fills_the_entry_requests_hit(self, monkeypatch):
+        backend = MemoryResponseCache()
+        monkeypatch.setattr(cache_module, "response_cache", ResponseCache(backend))
+        calls = []
+        app = FastAPI()
+
+        @app.get("/items")
+        @cached_response("items", ttl=60)
+        async def list_items(limit: int = Query(10), dep=Depends(dependency)):
+            calls.append(limit)
+            return {"limit": limit}
+
+        asyncio.run(list_items.warm())
+        assert TestClient(app).get("/items").json() == {"limit": 10}
+        assert calls == [10]
@@ -0,0 +1,59 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from apps.backend.core.serialization import ListSerializer
+
+
+class Item(BaseModel):
+    id: int
+    asset: str
+    profit_loss: Optional[float] = 0.0
+    xp_gained: int = 0
+    created_at: datetime
+
+
+class TestListSerializer:
+    def test_matches_response_model_output(self):
+        rows = [
+            SimpleNamespace(id=1, asset="ETH-USD", profit_loss=None, xp_gained=None,
+                            created_at=datetime(2026, 1, 1, 12, 30, 0, 123456)),
+            SimpleNamespace(id=2, asset="BTC-USD", profit_loss=-4.5, xp_gained=12,
+                            created_at=datetime(2026, 1, 2)),
+        ]
+        expected = [
+            {"id": 1, "asset": "ETH-USD", "profit_loss": None, "xp_gained": 0,
+             "created_at": "2026-01-01T12:30:00.123456"},
+            {"id": 2, "asset": "BTC-USD", "profit_loss": -4.5, "xp_gained": 12,
+             "created_at": "2026-01-02T00:00:00"},
+        ]
+        body = ListSerializer(Item).dump_json(rows)
+
+        assert json.loads(body) == expected
+        models = [Item(**{**vars(row), "xp_gained": row.xp_gained or 0}) for row in rows]
+        assert json.loads(TypeAdapter(List[Item]).dump_json(models)) == expected
+
+    def test_ndjson_has_one_object_per_line(self):
+        rows = [SimpleNamespace(id=i, asset="SOL-USD", profit_loss=1.0, xp_gained=1,
+                                created_at=datetime(2026, 1, 1)) for i in range(3)]
+        lines = ListSerializer(Item).dump_ndjson(rows).splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [0, 1, 2]
+
+    def test_output_is_pinned_to_the_model_schema(self):
+        # Extra projected columns are dropped and values are coerced to the field types
+        row = SimpleNamespace(id=3, asset="ETH-USD", profit_loss=Decimal("1.25"), xp_gained=4,
+                              created_at=datetime(2026, 1, 1), hashed_password="secret")
+        assert json.loads(ListSerializer(Item).dump_json([row])) == [
+            {"id": 3, "asset": "ETH-USD", "profit_loss": 1.25, "xp_gained": 4, "created_at": "2026-01-01T00:00:00"}
+        ]
+
+    def test_rows_that_violate_the_model_are_rejected(self):
+        row = SimpleNamespace(id="not-a-number", asset="ETH-USD", profit_loss=None, xp_gained=1,
+                              created_at=datetime(2026, 1, 1))
+        with pytest.raises(ValidationError):
+            ListSerializer(Item).dump_json([row])
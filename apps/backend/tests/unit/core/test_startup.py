@@ -0,0 +1,68 @@
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from apps.backend.core import database, startup
+from apps.backend.core import response_cache as cache_module
+from apps.backend.core.config import Settings
+from apps.backend.core.response_cache import MemoryResponseCache
+from apps.backend.models import game_models  # noqa: F401  (registers tables, as core.main does)
+from apps.backend.services import leaderboard_service
+from apps.backend.services.leaderboard_service import InMemoryLeaderboard
+
+
+@pytest.fixture
+def sqlite_database(tmp_path, monkeypatch):
+    path = tmp_path / "startup.db"
+    engine = create_engine(f"sqlite:///{path}")
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+    async_session = async_sessionmaker(async_engine, expire_on_commit=False)
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_session)
+    monkeypatch.setattr(startup, "engine", engine)
+    monkeypatch.setattr(startup, "AsyncSessionLocal", async_session)
+    monkeypatch.setattr(leaderboard_service, "xp_leaderboard", InMemoryLeaderboard())
+    backend = MemoryResponseCache()
+    monkeypatch.setattr(cache_module.response_cache, "backend", backend)
+    yield backend
+    engine.dispose()
+
+
+class TestStartupPipeline:
+    def test_lifespan_starts_with_default_settings(self, sqlite_database):
+        defaults = Settings.model_fields
+        result = {}
+
+        @asynccontextmanager
+        async def lifespan(app: FastAPI):
+            result["schema"], result["routers"] = await startup.prepare_app(
+                app,
+                startup.StartupTimer(),
+                defaults["OPTIONAL_ROUTERS"].default,
+                defaults["CACHE_WARM_ENDPOINTS"].default,
+            )
+            yield
+
+        app = FastAPI(lifespan=lifespan)
+        with TestClient(app) as client:
+            assert client.get("/api/v1/prestige/badges").status_code == 200
+
+        assert result["schema"] == "create_all"
+        mounted = set(result["routers"])
+        assert mounted <= set(defaults["OPTIONAL_ROUTERS"].default)
+        assert {"prestige", "nft"} <= mounted
+        # Warmers for mounted routers ran; those of skipped routers were dropped
+        assert set(sqlite_database._namespaces) == {"prestige_leaderboard", "prestige_badges"}
+
+    def test_router_that_fails_to_import_is_skipped(self, monkeypatch):
+        monkeypatch.setitem(startup.OPTIONAL_ROUTERS, "broken", "..api.v1.trading.does_not_exist")
+        app = FastAPI()
+
+        assert startup.include_optional_routers(app, ["broken", "prestige"]) == ["prestige"]
+        assert any(route.path.startswith("/api/v1/prestige") for route in app.routes)
@@ -0,0 +1,25 @@
+import pytest
+
+from apps.backend.core import tracing
+
+
+@pytest.fixture(autouse=True)
+def route_rates(monkeypatch):
+    monkeypatch.setattr(tracing.settings, "SENTRY_ROUTE_SAMPLE_RATES", {"/trade": 0.25, "/trade/real": 1.0})
+    monkeypatch.setattr(tracing.settings, "SENTRY_TRACES_SAMPLE_RATE", 0.05)
+
+
+class TestRouteRate:
+    @pytest.mark.parametrize("path, rate", [
+        ("/trade", 0.25),
+        ("/trade/mock", 0.25),
+        ("/trade/real", 1.0),
+        ("/trade/real/123", 1.0),
+        # Share a string prefix with "/trade" but are different routes
+        ("/trades", 0.05),
+        ("/trade-history", 0.05),
+        ("/health", 0.0),
+        ("/healthy", 0.05),
+    ])
+    def test_prefixes_match_whole_path_segments(self, path, rate):
+        assert tracing._route_rate(path) == rate
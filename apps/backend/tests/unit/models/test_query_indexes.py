@@ -0,0 +1,80 @@
+"""
+EXPLAIN-based checks that the hot queries are served by their indexes.
+
+Runs against an in-memory SQLite schema built from the models. Set
+INDEX_TEST_DATABASE_URL to an empty Postgres database to check the same
+plans there.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select, text
+
+from apps.backend.core.database import Base, Trade, TradeIdempotencyKey
+from apps.backend.models.game_models import (
+    Artifact,
+    ConstellationBattleParticipation,
+    ConstellationMembership,
+    UserGameStats,
+    ViralContent,
+)
+
+
+@pytest.fixture(scope="module")
+def conn():
+    engine = create_engine(os.getenv("INDEX_TEST_DATABASE_URL", "sqlite://"))
+    Base.metadata.create_all(engine)
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            # Tables are empty; stop the planner preferring sequential scans
+            connection.execute(text("SET enable_seqscan = off"))
+        yield connection
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def explain(conn, statement) -> str:
+    """The query plan for `statement` as one string, for the connection's dialect."""
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN" if conn.dialect.name == "sqlite" else "EXPLAIN"
+    rows = conn.execute(text(f"{prefix} {compiled}")).all()
+    return "\n".join(str(value) for row in rows for value in row)
+
+
+HOT_QUERIES = {
+    "ix_trades_user_id_created_at": select(Trade.id).where(Trade.user_id == 1).order_by(
+        Trade.created_at.desc(), Trade.id.desc()
+    ).limit(50),
+    "ix_constellation_memberships_active_user_id": select(ConstellationMembership.id).where(
+        ConstellationMembership.user_id == 1, ConstellationMembership.is_active == True
+    ),
+    "ix_constellation_memberships_active_constellation_id": select(ConstellationMembership.id).where(
+        ConstellationMembership.constellation_id == 1, ConstellationMembership.is_active == True
+    ),
+    "ix_constellation_battle_participations_battle_id_constellation_id": select(
+        ConstellationBattleParticipation.id
+    ).where(ConstellationBattleParticipation.battle_id == 1),
+    "ix_user_game_stats_user_id": select(UserGameStats.id).where(UserGameStats.user_id == 1),
+    # The production predicates: per-user collection and global Genesis stats
+    "ix_artifacts_user_id_artifact_type": select(Artifact.id).where(
+        Artifact.user_id == 1, Artifact.artifact_type.like("genesis_%")
+    ),
+    "ix_artifacts_genesis": select(Artifact.artifact_type).where(Artifact.artifact_type.like("genesis_%")),
+    "ix_viral_content_approved_public_created_at": select(ViralContent.id).where(
+        ViralContent.is_public == True,
+        ViralContent.moderation_status == "approved",
+        ViralContent.created_at >= datetime(2026, 1, 1) - timedelta(days=7),
+    ),
+    "ix_trade_idempotency_keys_created_at": select(TradeIdempotencyKey.id).where(
+        TradeIdempotencyKey.created_at < datetime(2026, 1, 1)
+    ).limit(5000),
+}
+
+
+class TestHotQueryIndexes:
+    @pytest.mark.parametrize("index_name", sorted(HOT_QUERIES))
+    def test_query_uses_index(self, conn, index_name):
+        plan = explain(conn, HOT_QUERIES[index_name])
+        assert index_name in plan, plan
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from apps.backend.core.database import Base, DailyReward, Trade, User
+from apps.backend.models import game_models  # noqa: F401  (User's relationships)
+from apps.backend.services import daily_rewards_service
+from apps.backend.services import xp_ledger as xp_ledger_module
+from apps.backend.services.daily_rewards_service import (
+    DailyRewardsInProgress,
+    DailyRewardsJob,
+    calculate_daily_reward,
+    create_daily_rewards_job,
+)
+from apps.backend.services.leaderboard_service import InMemoryLeaderboard
+
+REWARD_DATE = date(2026, 3, 10)
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rewards.db'}")
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    yesterday = datetime(2026, 3, 9, 12, 0)
+
+    async def seed():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with factory() as db:
+            db.add_all([
+                User(id=1, username="active", hashed_password="x", xp=40, daily_streak=2),
+                User(id=2, username="idle", hashed_password="x", xp=10, daily_streak=4),
+                User(id=3, username="inactive", hashed_password="x", xp=0, is_active=False),
+                User(id=4, username="newcomer", hashed_password="x", xp=0, daily_streak=0),
+            ])
+            trades = [(1, yesterday)] * 3 + [(3, yesterday), (4, yesterday), (2, yesterday - timedelta(days=3))]
+            db.add_all(
+                Trade(user_id=user_id, asset="BTC", direction="long", amount=1.0, created_at=created_at)
+                for user_id, created_at in trades
+            )
+            await db.commit()
+
+    asyncio.run(seed())
+    monkeypatch.setattr(daily_rewards_service, "AsyncSessionLocal", factory)
+    monkeypatch.setattr(xp_ledger_module, "xp_leaderboard", InMemoryLeaderboard())
+    yield factory
+    asyncio.run(engine.dispose())
+
+
+async def user_state(factory):
+    async with factory() as db:
+        rows = await db.execute(select(User.id, User.xp, User.level, User.daily_streak).order_by(User.id))
+        return {row.id: (row.xp, row.level, row.daily_streak) for row in rows}
+
+
+class TestDailyRewardsJob:
+    def test_rewards_recent_traders_once_per_day(self, session_factory):
+        active = calculate_daily_reward(trade_count=3, current_streak=2)["xp_awarded"]
+        newcomer = calculate_daily_reward(trade_count=1, current_streak=0)["xp_awarded"]
+
+        async def run():
+            # chunk_size=1 walks the users one chunk at a time
+            first = DailyRewardsJob(reward_date=REWARD_DATE, chunk_size=1)
+            await first.run()
+            after_first = await user_state(session_factory)
+            second = DailyRewardsJob(reward_date=REWARD_DATE, chunk_size=1)
+            await second.run()
+            async with session_factory() as db:
+                rewards = (await db.execute(select(DailyReward.user_id, DailyReward.xp_awarded))).all()
+            return first, second, after_first, await user_state(session_factory), rewards
+
+        first, second, after_first, after_second, rewards = asyncio.run(run())
+
+        assert (first.status, first.rewards_awarded, first.chunks_completed) == ("completed", 2, 2)
+        assert first.total_xp_awarded == active + newcomer
+        assert after_first == {
+            1: (40 + active, 1 + (40 + active) // 100, 3),
+            2: (10, 1, 4),
+            3: (0, 1, 0),
+            4: (newcomer, 1 + newcomer // 100, 1),
+        }
+        assert sorted(rewards) == [(1, active), (4, newcomer)]
+
+        # A rerun for the same date awards nothing and leaves XP and streaks alone
+        assert (second.status, second.rewards_awarded, second.total_xp_awarded) == ("completed", 0, 0)
+        assert after_second == after_first
+
+    def test_second_job_is_refused_while_one_is_active(self, monkeypatch):
+        monkeypatch.setattr(daily_rewards_service, "_active_job", None)
+        monkeypatch.setattr(daily_rewards_service, "daily_reward_jobs", daily_rewards_service.create_job_registry())
+        job = create_daily_rewards_job(reward_date=REWARD_DATE)
+
+        with pytest.raises(DailyRewardsInProgress):
+            create_daily_rewards_job(reward_date=REWARD_DATE)
+        job.status = "completed"
+        assert create_daily_rewards_job(reward_date=REWARD_DATE) is not job
@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from apps.backend.core.database import Base
+from apps.backend.models.game_models import UserGameStats
+from apps.backend.services import game_stats_service
+from apps.backend.services.game_stats_service import (
+    ReconciliationInProgress,
+    create_reconciliation_job,
+    fold_trades,
+    initial_stats,
+    record_trade_completion,
+    trade_stats_values,
+)
+
+PROFITS = [12.5, 3.0, -4.0, 8.0, 1.0, 2.0, 0.0, -9.5, 30.0]
+
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        yield connection
+    engine.dispose()
+
+
+class TestGameStatsCounters:
+    def test_fold_trades(self):
+        stats = fold_trades(PROFITS)
+
+        assert stats["total_trades"] == 9
+        assert stats["successful_trades"] == 6
+        assert stats["total_profit_loss"] == pytest.approx(43.0)
+        assert stats["best_trade_profit"] == 30.0
+        assert stats["worst_trade_loss"] == -9.5
+        assert stats["best_streak"] == 3
+        assert stats["current_streak"] == 1
+
+    def test_incremental_updates_match_bulk_recompute(self, conn):
+        table = UserGameStats.__table__
+        start = datetime(2026, 1, 1)
+        conn.execute(insert(table).values(**initial_stats(1, PROFITS[0], start)))
+        for i, profit in enumerate(PROFITS[1:], start=1):
+            conn.execute(
+                update(table)
+                .where(table.c.user_id == 1)
+                .values(**trade_stats_values(profit, start + timedelta(minutes=i)))
+            )
+
+        row = conn.execute(select(table).where(table.c.user_id == 1)).mappings().one()
+        for key, value in fold_trades(PROFITS).items():
+            assert row[key] == pytest.approx(value), key
+        assert row["last_trade_date"] == start + timedelta(minutes=len(PROFITS) - 1)
+
+    def test_record_trade_completion_upserts_one_row(self, tmp_path):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+        start = datetime(2026, 1, 1)
+
+        async def run():
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with async_sessionmaker(engine)() as db:
+                for i, profit in enumerate(PROFITS):
+                    await record_trade_completion(db, 1, profit, start + timedelta(minutes=i))
+                await db.commit()
+                rows = (await db.execute(select(UserGameStats.__table__))).mappings().all()
+            await engine.dispose()
+            return rows
+
+        rows = asyncio.run(run())
+        assert len(rows) == 1
+        for key, value in fold_trades(PROFITS).items():
+            assert rows[0][key] == pytest.approx(value), key
+
+
+class TestReconciliationJobs:
+    def test_second_job_is_refused_while_one_is_active(self, monkeypatch):
+        monkeypatch.setattr(game_stats_service, "_active_job", None)
+        job = create_reconciliation_job(register=False)
+
+        with pytest.raises(ReconciliationInProgress):
+            create_reconciliation_job(register=False)
+        job.status = "completed"
+        assert create_reconciliation_job(register=False) is not job
+
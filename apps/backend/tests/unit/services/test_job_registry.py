@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from apps.backend.services.job_registry import JobRegistry
+
+
+class Job:
+    def __init__(self, job_id, finished_minutes_ago=None):
+        self.job_id = job_id
+        self.finished_at = None
+        if finished_minutes_ago is not None:
+            self.finished_at = datetime.utcnow() - timedelta(minutes=finished_minutes_ago)
+
+
+class TestJobRegistry:
+    def test_finished_jobs_expire_after_ttl(self):
+        jobs = JobRegistry(ttl_seconds=600, max_finished=10)
+        jobs.add(Job("old", finished_minutes_ago=30))
+        jobs.add(Job("recent", finished_minutes_ago=1))
+        jobs.add(Job("running"))
+        jobs.add(Job("new"))
+        assert set(jobs) == {"recent", "running", "new"}
+
+    def test_finished_jobs_are_capped_oldest_first(self):
+        jobs = JobRegistry(ttl_seconds=3600, max_finished=2)
+        for minutes in (5, 4, 3, 2):
+            jobs.add(Job(f"done-{minutes}", finished_minutes_ago=minutes))
+        jobs.add(Job("running"))
+        assert set(jobs) == {"done-3", "done-2", "running"}
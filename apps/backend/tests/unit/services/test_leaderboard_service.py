@@ -0,0 +1,126 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from apps.backend.core.database import Base, User
+from apps.backend.models import game_models  # noqa: F401  (User's relationships)
+from apps.backend.services import leaderboard_service
+from apps.backend.services.leaderboard_service import (
+    InMemoryLeaderboard,
+    _score,
+    _xp_from_score,
+    rebuild_leaderboard,
+)
+
+
+def _rows():
+    return [
+        {"user_id": 1, "username": "alice", "xp": 300, "level": 4},
+        {"user_id": 2, "username": "bob", "xp": 500, "level": 6},
+        {"user_id": 3, "username": "carol", "xp": 300, "level": 4},
+    ]
+
+
+class TestInMemoryLeaderboard:
+    def test_rank_orders_by_xp_then_user_id(self):
+        board = InMemoryLeaderboard()
+        asyncio.run(board.load(_rows()))
+        assert asyncio.run(board.get_rank(2)) == 1
+        assert asyncio.run(board.get_rank(1)) == 2
+        assert asyncio.run(board.get_rank(3)) == 3
+        assert asyncio.run(board.get_rank(99)) is None
+
+    def test_update_moves_user(self):
+        board = InMemoryLeaderboard()
+        asyncio.run(board.load(_rows()))
+        asyncio.run(board.update(3, 900, 10))
+        assert asyncio.run(board.get_rank(3)) == 1
+        assert asyncio.run(board.get_rank(2)) == 2
+        assert asyncio.run(board.size()) == 3
+
+    def test_cursor_pagination(self):
+        board = InMemoryLeaderboard()
+        asyncio.run(board.load(_rows()))
+        first, cursor = asyncio.run(board.get_page(limit=2))
+        assert [entry["user_id"] for entry in first] == [2, 1]
+        second, next_cursor = asyncio.run(board.get_page(limit=2, cursor=cursor))
+        assert [entry["user_id"] for entry in second] == [3]
+        assert second[0]["rank"] == 3
+        assert next_cursor is None
+
+    def test_deactivation_removes_user_after_commit(self, tmp_path, monkeypatch):
+        board = InMemoryLeaderboard()
+        monkeypatch.setattr(leaderboard_service, "xp_leaderboard", board)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'board.db'}")
+
+        async def run():
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            await board.load(_rows())
+            async with async_sessionmaker(engine)() as db:
+                db.add(User(id=1, username="alice", hashed_password="x", xp=300, level=4))
+                await db.commit()
+                user = await db.get(User, 1)
+                user.is_active = False
+                await db.flush()
+                ranked_before_commit = await board.get_rank(1)
+                await db.commit()
+            await asyncio.sleep(0)
+            await engine.dispose()
+            return ranked_before_commit, await board.get_rank(1)
+
+        assert asyncio.run(run()) == (2, None)
+
+
+class TestRebuildLeaderboard:
+    def rebuild(self, tmp_path, board, **kwargs):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rebuild.db'}")
+
+        async def run():
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with async_sessionmaker(engine)() as db:
+                db.add_all([
+                    User(id=1, username="alice", hashed_password="x", xp=300, level=4),
+                    User(id=2, username="bob", hashed_password="x", xp=500, level=6),
+                ])
+                await db.commit()
+                loaded = await rebuild_leaderboard(db, board, **kwargs)
+            await engine.dispose()
+            return loaded
+
+        return asyncio.run(run())
+
+    def test_startup_keeps_an_already_loaded_ranking(self, tmp_path):
+        board = InMemoryLeaderboard()
+        asyncio.run(board.load(_rows()))
+
+        assert self.rebuild(tmp_path, board, only_if_missing=True) is None
+        assert asyncio.run(board.size()) == 3
+
+    def test_snapshot_is_reloaded_when_the_ranking_changes_meanwhile(self, tmp_path):
+        board = InMemoryLeaderboard()
+        read_version = board.version
+        versions = []
+
+        async def version():
+            current = await read_version()
+            if not versions:
+                # Another request updates a user between version read and load
+                await board.update(2, 500, 6, "bob")
+            versions.append(current)
+            return current
+
+        board.version = version
+        assert self.rebuild(tmp_path, board) == 2
+        assert versions == [0, 1]
+        assert asyncio.run(board.get_rank(2)) == 1
+
+
+class TestRedisScores:
+    def test_scores_order_like_in_memory_ranking(self):
+        entries = [(300, 1), (500, 2), (300, 3), (0, 10), (0, 9), (120000, 67000000)]
+        by_score = sorted(entries, key=lambda entry: _score(*entry))
+        assert by_score == sorted(entries, key=lambda entry: (-entry[0], entry[1]))
+        assert [_xp_from_score(float(_score(*entry))) for entry in entries] == [xp for xp, _ in entries]
+
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from apps.backend.services.onchain_batcher import OnChainBatcher, RecordingStarknetClient
+
+
+class TestOnChainBatcher:
+    def test_window_coalesces_points_and_mints(self):
+        client = RecordingStarknetClient()
+        batcher = OnChainBatcher(client, window_seconds=0.01)
+
+        async def run():
+            await asyncio.gather(
+                batcher.submit("0xa", points_delta=10, achievement_ids=["first_trade"]),
+                batcher.submit("0xa", points_delta=15, achievement_ids=["first_trade"]),
+                batcher.submit("0xb", points_delta=5),
+            )
+
+        asyncio.run(run())
+        assert client.multicalls == [[
+            ("update_user_points", "0xa", 25),
+            ("mint_achievement", "0xa", "first_trade"),
+            ("update_user_points", "0xb", 5),
+        ]]
+
+    def test_size_limit_flushes_without_splitting_users(self):
+        client = RecordingStarknetClient()
+        batcher = OnChainBatcher(client, window_seconds=60, max_batch_calls=3)
+
+        async def run():
+            await asyncio.gather(
+                batcher.submit("0xa", points_delta=1, achievement_ids=["profit_100"]),
+                batcher.submit("0xb", points_delta=2, achievement_ids=["streak_7"]),
+            )
+
+        asyncio.run(asyncio.wait_for(run(), timeout=5))
+        assert [len(calls) for calls in client.multicalls] == [2, 2]
+
+    def test_failed_multicall_raises_to_submitters(self):
+        client = RecordingStarknetClient()
+        client.fail_next = 1
+        batcher = OnChainBatcher(client, window_seconds=0.01)
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(batcher.submit("0xa", points_delta=10))
+        assert client.multicalls == []
@@ -0,0 +1,165 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from apps.backend.core.database import Base, PostTradeTask
+from apps.backend.models import game_models  # noqa: F401  (maps User's relationships)
+from apps.backend.services.post_trade_outbox import PostTradeOutbox, enqueue, purge_finished_tasks
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'outbox.db'}")
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    with patch("apps.backend.services.post_trade_outbox.AsyncSessionLocal", factory):
+        yield factory
+    asyncio.run(engine.dispose())
+
+
+def task(key, task_type="xp"):
+    return {"task_type": task_type, "payload": {"user_id": 1, "xp": 10}, "idempotency_key": key}
+
+
+async def statuses(factory):
+    async with factory() as db:
+        rows = await db.execute(select(PostTradeTask.idempotency_key, PostTradeTask.status, PostTradeTask.attempts))
+        return {row.idempotency_key: (row.status, row.attempts) for row in rows}
+
+
+class TestPostTradeOutbox:
+    def test_duplicate_keys_enqueue_once(self, session_factory):
+        async def run():
+            async with session_factory() as db:
+                await enqueue(db, [task("trade:1:xp")])
+                await enqueue(db, [task("trade:1:xp"), task("trade:2:xp")])
+                await db.commit()
+            return await statuses(session_factory)
+
+        assert asyncio.run(run()) == {"trade:1:xp": ("pending", 0), "trade:2:xp": ("pending", 0)}
+
+    def test_handler_runs_and_marks_done(self, session_factory):
+        seen = []
+        outbox = PostTradeOutbox()
+
+        async def handler(db, payload, key):
+            seen.append((key, payload["xp"]))
+
+        outbox.register("xp", handler)
+
+        async def run():
+            async with session_factory() as db:
+                await enqueue(db, [task("trade:1:xp")])
+                await db.commit()
+            claimed = await outbox.run_once()
+            return claimed, await outbox.run_once(), await statuses(session_factory)
+
+        assert asyncio.run(run()) == (1, 0, {"trade:1:xp": ("done", 1)})
+        assert seen == [("trade:1:xp", 10)]
+
+    def test_failures_retry_with_backoff_then_fail(self, session_factory):
+        outbox = PostTradeOutbox(max_attempts=2, retry_base_seconds=0)
+
+        async def handler(db, payload, key):
+            raise RuntimeError("starknet unavailable")
+
+        outbox.register("xp", handler)
+
+        async def run():
+            async with session_factory() as db:
+                await enqueue(db, [task("trade:1:xp")])
+                await db.commit()
+            await outbox.run_once()
+            after_first = await statuses(session_factory)
+            await outbox.run_once()
+            return after_first, await statuses(session_factory)
+
+        after_first, after_second = asyncio.run(run())
+        assert after_first == {"trade:1:xp": ("pending", 1)}
+        assert after_second == {"trade:1:xp": ("failed", 2)}
+
+    def test_only_the_lease_holder_completes_a_task(self, session_factory):
+        # Zero lease: the row is due again while the first handler still runs
+        slow, fast = PostTradeOutbox(lease_seconds=0), PostTradeOutbox(lease_seconds=0)
+        seen = []
+
+        async def slow_handler(db, payload, key):
+            seen.append("slow")
+            await fast.run_once()
+
+        async def fast_handler(db, payload, key):
+            seen.append("fast")
+            raise RuntimeError("starknet unavailable")
+
+        slow.register("xp", slow_handler)
+        fast.register("xp", fast_handler)
+
+        async def run():
+            async with session_factory() as db:
+                await enqueue(db, [task("trade:1:xp")])
+                await db.commit()
+            await slow.run_once()
+            return await statuses(session_factory)
+
+        # The reclaiming worker's retry stands; the stale holder didn't mark it done
+        assert asyncio.run(run()) == {"trade:1:xp": ("pending", 2)}
+        assert seen == ["slow", "fast"]
+
+    def test_tasks_share_at_most_max_sessions(self, session_factory):
+        outbox = PostTradeOutbox(batch_size=10, max_sessions=2)
+        running, peak = [], []
+
+        async def handler(db, payload, key):
+            running.append(key)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(key)
+
+        outbox.register("xp", handler)
+
+        async def run():
+            async with session_factory() as db:
+                await enqueue(db, [task(f"trade:{i}:xp") for i in range(6)])
+                await db.commit()
+            claimed = await outbox.run_once()
+            return claimed, await statuses(session_factory)
+
+        claimed, after = asyncio.run(run())
+        assert claimed == 6
+        assert max(peak) == 2
+        assert {status for status, _ in after.values()} == {"done"}
+
+    def test_purge_deletes_only_old_finished_tasks(self, session_factory):
+        now = datetime.utcnow()
+        rows = {
+            "old-done": ("done", timedelta(days=8)),
+            "old-failed": ("failed", timedelta(days=9)),
+            "recent-done": ("done", timedelta(hours=1)),
+            "old-pending": ("pending", None),
+        }
+
+        async def run():
+            async with session_factory() as db:
+                for key, (status, age) in rows.items():
+                    finished_at = now - age if age else None
+                    await db.execute(insert(PostTradeTask.__table__).values(
+                        idempotency_key=key, task_type="xp", payload={}, status=status, attempts=1,
+                        available_at=(finished_at or now - timedelta(days=10)) + timedelta(seconds=30),
+                        created_at=now - timedelta(days=10), completed_at=finished_at,
+                    ))
+                await db.commit()
+                deleted = await purge_finished_tasks(db, retention_seconds=7 * 24 * 60 * 60, batch_size=1)
+            return deleted, await statuses(session_factory)
+
+        deleted, remaining = asyncio.run(run())
+        assert deleted == 2
+        assert set(remaining) == {"recent-done", "old-pending"}
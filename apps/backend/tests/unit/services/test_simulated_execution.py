@@ -0,0 +1,65 @@
+import asyncio
+from unittest.mock import patch
+
+from apps.backend.services.simulated_execution import (
+    LatencyProfile,
+    MarketDataSource,
+    SimulatedExecutionEngine,
+)
+
+
+def fills(engine, user_id, count=5):
+    async def run():
+        return [await engine.execute(user_id, "ETH-USD", "long", 100, trade_id) for trade_id in range(count)]
+
+    return [(fill.price, fill.profit, fill.order_id) for fill in asyncio.run(run())]
+
+
+class TestSimulatedExecutionEngine:
+    def test_same_seed_replays_fills(self):
+        first = fills(SimulatedExecutionEngine(MarketDataSource(), seed=7), user_id=1)
+        second = fills(SimulatedExecutionEngine(MarketDataSource(), seed=7), user_id=1)
+        assert first == second
+
+    def test_users_have_independent_streams(self):
+        engine = SimulatedExecutionEngine(MarketDataSource(), seed=7)
+        alone = fills(SimulatedExecutionEngine(MarketDataSource(), seed=7), user_id=1)
+        fills(engine, user_id=2)
+        assert fills(engine, user_id=1) == alone
+
+    def test_prices_come_from_market_data(self):
+        market_data = MarketDataSource()
+        market_data.update("ETH-USD", 2000.0)
+        engine = SimulatedExecutionEngine(market_data, spread_bps=0)
+        assert fills(engine, user_id=1, count=1)[0][0] == 2000.0
+
+    def test_zero_latency_never_sleeps(self):
+        engine = SimulatedExecutionEngine(MarketDataSource(), latency=LatencyProfile(0, 0))
+        with patch("asyncio.sleep") as sleep:
+            fills(engine, user_id=1)
+        sleep.assert_not_called()
+
+    def test_price_path_replays_per_seed(self):
+        def path(seed):
+            market_data = MarketDataSource(seed=seed)
+            prices = []
+            for _ in range(20):
+                market_data.tick()
+                prices.append(market_data.price("BTC-USD"))
+            return prices
+
+        assert path(7) == path(7)
+        assert path(7) != path(8)
+        assert len(set(path(7))) == 20
+
+    def test_order_ids_are_unique_per_trade_and_seed(self):
+        engine = SimulatedExecutionEngine(MarketDataSource(), seed=7)
+        assert engine.order_id(1) == SimulatedExecutionEngine(MarketDataSource(), seed=7).order_id(1)
+        assert engine.order_id(1) != engine.order_id(2)
+        assert engine.order_id(1) != SimulatedExecutionEngine(MarketDataSource(), seed=8).order_id(1)
+
+    def test_streams_are_bounded(self):
+        engine = SimulatedExecutionEngine(MarketDataSource(), max_streams=3)
+        for user_id in range(10):
+            fills(engine, user_id, count=1)
+        assert list(engine._streams) == [(7, "fills"), (8, "fills"), (9, "fills")]
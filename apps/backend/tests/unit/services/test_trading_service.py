@@ -0,0 +1,241 @@
+import asyncio
+import enum
+import importlib
+import sys
+import types
+from dataclasses import dataclass
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+from unittest.mock import patch
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from apps.backend.core.database import Base, PostTradeTask, Trade, User
+from apps.backend.models import game_models  # noqa: F401  (maps User's relationships)
+from apps.backend.models.game_models import UserGameStats
+from apps.backend.services import xp_ledger as xp_ledger_module
+from apps.backend.services.leaderboard_service import InMemoryLeaderboard
+from apps.backend.services.trading_state import TradingStateCache
+
+
+# The service's repositories, clients, event bus and trade schemas aren't in
+# this tree yet. These stand-ins carry only what execute_trade touches; the
+# outbox, XP ledger, game stats, trading state and simulated engine are real.
+class TradeStatus(str, enum.Enum):
+    PENDING = "pending"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class TradeRequest(BaseModel):
+    asset: str
+    direction: str
+    amount: float
+    leverage: int = 1
+    is_mock: bool = True
+
+
+class TradeResult(BaseModel):
+    trade_id: int
+    status: str
+    executed_price: float
+    profit_amount: float
+    profit_percentage: float
+    rewards: Dict[str, Any]
+
+
+@dataclass
+class TradeExecutedEvent:
+    user_id: int
+    trade_id: int
+    profit: float
+    xp_gained: int
+
+
+class EventBus:
+    def __init__(self):
+        self.events = []
+
+    async def emit(self, event):
+        self.events.append(event)
+
+
+class UserRepository:
+    streak_updates = []
+
+    def __init__(self, db, cache=None):
+        self.db = db
+        self.cache = cache
+
+    async def get_by_id(self, user_id: int):
+        user = await self.db.get(User, user_id)
+        if user is None:
+            return None
+        return SimpleNamespace(id=user.id, level=user.level, current_streak=user.daily_streak)
+
+    async def update_daily_streak(self, user_id: int):
+        self.streak_updates.append(user_id)
+
+
+class TradeRepository:
+    def __init__(self, db):
+        self.db = db
+
+    async def create(self, data: Dict[str, Any]) -> Trade:
+        trade = Trade(**data)
+        self.db.add(trade)
+        await self.db.commit()
+        return trade
+
+    async def update(self, trade_id: int, data: Dict[str, Any], commit: bool = True) -> Trade:
+        trade = await self.db.get(Trade, trade_id)
+        for key, value in data.items():
+            setattr(trade, key, value)
+        if commit:
+            await self.db.commit()
+        return trade
+
+
+class ExchangeClient:
+    def __init__(self, error: Optional[Exception] = None):
+        self.error = error
+
+    async def place_order(self, **order):
+        raise self.error
+
+
+def _module(name: str, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+MISSING_MODULES = {
+    "apps.backend.repositories.user_repository": {"UserRepository": UserRepository},
+    "apps.backend.repositories.trade_repository": {"TradeRepository": TradeRepository},
+    "apps.backend.external.exchange_client": {"ExchangeClient": ExchangeClient},
+    "apps.backend.external.starknet_client": {"StarknetClient": object},
+    "apps.backend.core.events": {"EventBus": EventBus, "TradeExecutedEvent": TradeExecutedEvent},
+    "apps.backend.models.trade": {"Trade": Trade, "TradeStatus": TradeStatus},
+    "apps.backend.schemas.trade": {"TradeRequest": TradeRequest, "TradeResult": TradeResult},
+}
+
+
+@pytest.fixture
+def trading(monkeypatch):
+    for name, attrs in MISSING_MODULES.items():
+        monkeypatch.setitem(sys.modules, name, _module(name, **attrs))
+    sys.modules.pop("apps.backend.services.trading_service", None)
+    module = importlib.import_module("apps.backend.services.trading_service")
+    monkeypatch.setattr(module, "trading_state_cache", TradingStateCache())
+    yield module
+    sys.modules.pop("apps.backend.services.trading_service", None)
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'trading.db'}")
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(xp_ledger_module, "xp_leaderboard", InMemoryLeaderboard())
+    with patch("apps.backend.services.post_trade_outbox.AsyncSessionLocal", factory):
+        yield factory
+    asyncio.run(engine.dispose())
+
+
+def make_service(trading, db, exchange_client=None):
+    UserRepository.streak_updates = []
+    return trading.TradingService(
+        user_repo=UserRepository(db),
+        trade_repo=TradeRepository(db),
+        exchange_client=exchange_client or ExchangeClient(),
+        starknet_client=None,
+        event_bus=EventBus(),
+    )
+
+
+class TestExecuteTrade:
+    def test_mock_trade_completes_and_its_side_effects_run_once(self, trading, session_factory):
+        async def run():
+            async with session_factory() as db:
+                db.add(User(id=1, username="trader", hashed_password="x", xp=0, level=1))
+                await db.commit()
+                service = make_service(trading, db)
+                result = await service.execute_trade(1, TradeRequest(asset="BTC-USD", direction="long", amount=50))
+
+            # Side effects were only queued; workers apply them
+            async with session_factory() as db:
+                user = await db.get(User, 1)
+                queued = (await db.execute(select(PostTradeTask.task_type, PostTradeTask.status))).all()
+                assert user.xp == 0
+                assert sorted(queued) == [("daily_streak", "pending"), ("trade_event", "pending"), ("xp", "pending")]
+
+            assert await trading.post_trade_outbox.run_once() == 3
+            assert await trading.post_trade_outbox.run_once() == 0
+
+            async with session_factory() as db:
+                trade = (await db.execute(select(Trade))).scalar_one()
+                stats = (await db.execute(select(UserGameStats))).scalar_one()
+                user = await db.get(User, 1)
+                statuses = set((await db.execute(select(PostTradeTask.status))).scalars())
+            return result, service, trade, stats, user, statuses
+
+        result, service, trade, stats, user, statuses = asyncio.run(run())
+        assert result.status == "success"
+        assert result.rewards["achievements"][0]["id"] == "first_trade"
+        assert (trade.id, trade.status) == (result.trade_id, "completed")
+        assert (stats.total_trades, stats.total_profit_loss) == (1, pytest.approx(result.profit_amount))
+        assert (user.xp, statuses) == (result.rewards["xp"], {"done"})
+        assert UserRepository.streak_updates == [1]
+        assert [event.trade_id for event in service.event_bus.events] == [result.trade_id]
+
+    def test_failed_order_marks_trade_failed_and_queues_nothing(self, trading, session_factory):
+        exchange = ExchangeClient(error=RuntimeError("exchange down"))
+
+        async def run():
+            async with session_factory() as db:
+                db.add(User(id=1, username="trader", hashed_password="x", xp=0, level=1))
+                await db.commit()
+                service = make_service(trading, db, exchange)
+                with pytest.raises(RuntimeError, match="exchange down"):
+                    await service.execute_trade(
+                        1, TradeRequest(asset="BTC-USD", direction="long", amount=50, is_mock=False)
+                    )
+
+            async with session_factory() as db:
+                trade = (await db.execute(select(Trade))).scalar_one()
+                tasks = (await db.execute(select(PostTradeTask))).scalars().all()
+                stats = (await db.execute(select(UserGameStats))).scalars().all()
+            return trade, tasks, stats
+
+        trade, tasks, stats = asyncio.run(run())
+        assert trade.status == "failed"
+        assert (tasks, stats) == ([], [])
+
+    def test_limits_are_enforced_on_committed_trades_not_the_cached_snapshot(self, trading, session_factory):
+        async def run():
+            async with session_factory() as db:
+                db.add(User(id=1, username="trader", hashed_password="x", xp=0, level=1))
+                await db.commit()
+                service = make_service(trading, db)
+                # Cached before another instance placed a trade for this user
+                await trading.trading_state_cache.get(db, 1)
+                db.add(Trade(user_id=1, asset="BTC-USD", direction="long", amount=10, created_at=datetime.utcnow()))
+                await db.commit()
+
+                with pytest.raises(ValueError, match="Trade cooldown"):
+                    await service.execute_trade(1, TradeRequest(asset="BTC-USD", direction="long", amount=50))
+
+            async with session_factory() as db:
+                return (await db.execute(select(func.count(Trade.id)))).scalar_one()
+
+        assert asyncio.run(run()) == 1
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from apps.backend.core.database import Base, Trade
+from apps.backend.models import game_models  # noqa: F401  (maps User's relationships)
+from apps.backend.services.trading_state import (
+    TradingState,
+    TradingStateCache,
+    load_trading_state,
+    lock_trading_state,
+)
+
+
+def snapshot(user_id=1):
+    return TradingState(user_id, daily_count=2, lifetime_count=9, last_trade_at=None, loaded_at=datetime.utcnow())
+
+
+class TestTradingStateCache:
+    def test_snapshot_loaded_once_per_ttl(self):
+        cache = TradingStateCache(ttl_seconds=60)
+        with patch(
+            "apps.backend.services.trading_state.load_trading_state",
+            AsyncMock(return_value=snapshot()),
+        ) as load:
+            first = asyncio.run(cache.get(None, 1))
+            second = asyncio.run(cache.get(None, 1))
+        assert first is second
+        assert load.await_count == 1
+
+    def test_recorded_trade_updates_cached_snapshot(self):
+        cache = TradingStateCache(ttl_seconds=60)
+        created_at = datetime.utcnow()
+        with patch(
+            "apps.backend.services.trading_state.load_trading_state",
+            AsyncMock(return_value=snapshot()),
+        ) as load:
+            state = asyncio.run(cache.get(None, 1))
+            cache.record_trade(state, created_at)
+            state = asyncio.run(cache.get(None, 1))
+        assert (state.daily_count, state.lifetime_count, state.last_trade_at) == (3, 10, created_at)
+        assert load.await_count == 1
+
+    def test_expired_snapshot_is_reloaded(self):
+        cache = TradingStateCache(ttl_seconds=0)
+        with patch(
+            "apps.backend.services.trading_state.load_trading_state",
+            AsyncMock(side_effect=lambda db, user_id: snapshot(user_id)),
+        ) as load:
+            asyncio.run(cache.get(None, 1))
+            asyncio.run(cache.get(None, 1))
+        assert load.await_count == 2
+
+
+class TestLoadTradingState:
+    def test_counts_daily_and_lifetime_trades_in_one_query(self, tmp_path):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'state.db'}")
+        now = datetime.utcnow()
+        ages = (timedelta(days=3), timedelta(hours=20), timedelta(minutes=5))
+
+        async def run():
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with async_sessionmaker(engine)() as db:
+                for age in ages:
+                    db.add(Trade(user_id=1, asset="BTC-USD", direction="long", amount=10, created_at=now - age))
+                db.add(Trade(user_id=2, asset="BTC-USD", direction="long", amount=10, created_at=now))
+                await db.commit()
+                loaded = await load_trading_state(db, 1)
+                locked = await lock_trading_state(db, 1)
+                empty = await load_trading_state(db, 3)
+            await engine.dispose()
+            return loaded, locked, empty
+
+        loaded, locked, empty = asyncio.run(run())
+        for state in (loaded, locked):
+            assert (state.daily_count, state.lifetime_count, state.last_trade_at) == (2, 3, now - ages[-1])
+        assert (empty.daily_count, empty.lifetime_count, empty.last_trade_at) == (0, 0, None)
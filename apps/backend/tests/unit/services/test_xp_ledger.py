@@ -0,0 +1,57 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from apps.backend.core.database import Base, User
+from apps.backend.models import game_models  # noqa: F401  (User's relationships)
+from apps.backend.services import xp_ledger as xp_ledger_module
+from apps.backend.services.leaderboard_service import InMemoryLeaderboard
+from apps.backend.services.xp_ledger import xp_ledger
+
+
+class TestXPLedger:
+    def test_uncommitted_apply_refreshes_only_after_commit(self, tmp_path, monkeypatch):
+        board = InMemoryLeaderboard()
+        monkeypatch.setattr(xp_ledger_module, "xp_leaderboard", board)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'xp.db'}")
+
+        async def run():
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with async_sessionmaker(engine)() as db:
+                db.add(User(id=1, username="alice", hashed_password="x", xp=0, level=1))
+                await db.commit()
+
+                await xp_ledger.apply(db, 1, 150, commit=False)
+                await db.rollback()
+                await asyncio.sleep(0)
+                after_rollback = await board.get_rank(1)
+
+                totals = await xp_ledger.apply(db, 1, 150, commit=False)
+                before_commit = await board.get_rank(1)
+                await db.commit()
+                await asyncio.sleep(0)
+            await engine.dispose()
+            return after_rollback, totals, before_commit, await board.get_page()
+
+        after_rollback, totals, before_commit, (page, _) = asyncio.run(run())
+        assert (after_rollback, totals, before_commit) == (None, (150, 2), None)
+        assert [(entry["user_id"], entry["xp"], entry["level"]) for entry in page] == [(1, 150, 2)]
+
+    def test_grant_to_inactive_user_keeps_them_unranked(self, tmp_path, monkeypatch):
+        board = InMemoryLeaderboard()
+        monkeypatch.setattr(xp_ledger_module, "xp_leaderboard", board)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'xp.db'}")
+
+        async def run():
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            await board.update(1, 100, 2, "alice")
+            async with async_sessionmaker(engine)() as db:
+                db.add(User(id=1, username="alice", hashed_password="x", xp=100, level=2, is_active=False))
+                await db.commit()
+                totals = await xp_ledger.apply(db, 1, 50)
+            await engine.dispose()
+            return totals, await board.get_rank(1)
+
+        assert asyncio.run(run()) == ((150, 2), None)
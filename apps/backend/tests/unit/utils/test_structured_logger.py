@@ -0,0 +1,39 @@
+import io
+import json
+
+from apps.backend.utils.logging import StructuredLogger
+
+
+class TestStructuredLogger:
+    def test_records_are_written_by_listener_as_json(self):
+        stream = io.StringIO()
+        logger = StructuredLogger("test-structured-json", stream=stream)
+        logger.log_api_call(endpoint="/health", method="GET", status_code=200, duration_ms=1.5)
+        logger.close()
+
+        payload = json.loads(stream.getvalue().split(" - ", 3)[3])
+        assert payload["event"] == "api_call"
+        assert payload["status_code"] == 200
+        assert "timestamp" in payload
+
+    def test_sampling_skips_successes_but_keeps_errors(self):
+        stream = io.StringIO()
+        logger = StructuredLogger(
+            "test-structured-sampling", sample_rates={"api_call:2xx": 0.0}, stream=stream
+        )
+        for _ in range(10):
+            logger.log_api_call(endpoint="/trade", method="POST", status_code=200, duration_ms=1.0)
+        logger.log_api_call(endpoint="/trade", method="POST", status_code=500, duration_ms=1.0)
+        logger.close()
+
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 1
+        assert '"status_code":500' in lines[0].replace(" ", "")
+        assert logger.stats()["sampled_out"] == 10
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        logger = StructuredLogger("test-structured-drops", queue_size=1, stream=io.StringIO())
+        logger.close()  # stop the listener so the queue cannot drain
+        for _ in range(5):
+            logger.info("burst")
+        assert logger.stats()["dropped"] >= 4
@@ -1,51 +1,134 @@
+import atexit
 import logging
 import json
+import queue
+import random
+import sys
 from datetime import datetime
-from typing import Dict, Any, Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, Optional, TextIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    """Serialize a log payload, preferring orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(data, default=str).decode()
+    return json.dumps(data, default=str, separators=(",", ":"))
+
+
+class StructuredFormatter(logging.Formatter):
+    """Encodes dict log messages as JSON; runs on the listener thread"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if isinstance(record.msg, dict):
+            record.msg = _dumps({
+                "timestamp": datetime.utcfromtimestamp(record.created).isoformat(),
+                **record.msg
+            })
+            record.args = None
+        return super().format(record)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Non-blocking queue handler that drops records when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Records stay in-process, so defer all formatting to the listener
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
 
 class StructuredLogger:
-    """Structured logging for FastAPI applications"""
-    
-    def __init__(self, service_name: str):
+    """Structured logging for FastAPI applications
+
+    Records are handed to a bounded queue and formatted/written by a
+    background listener, so logging never blocks the event loop. Events can
+    be sampled via `sample_rates`, keyed by event name or, for API calls, by
+    status class (e.g. {"api_call:2xx": 0.01}). Errors are never sampled.
+    """
+
+    def __init__(
+        self,
+        service_name: str,
+        sample_rates: Optional[Dict[str, float]] = None,
+        queue_size: int = 10000,
+        stream: Optional[TextIO] = None,
+    ):
         self.service_name = service_name
+        self.sample_rates = dict(sample_rates or {})
+        self.sampled_out = 0
         self.logger = logging.getLogger(service_name)
-        
+        self._listener: Optional[QueueListener] = None
+
         # Configure logging
         if not self.logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter(
+            handler = logging.StreamHandler(stream or sys.stderr)
+            formatter = StructuredFormatter(
                 '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
             )
             handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
+            self.queue_handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size))
+            self.logger.addHandler(self.queue_handler)
             self.logger.setLevel(logging.INFO)
-    
+            self._listener = QueueListener(
+                self.queue_handler.queue, handler, respect_handler_level=True
+            )
+            self._listener.start()
+            atexit.register(self.close)
+        else:
+            self.queue_handler = next(
+                (h for h in self.logger.handlers if isinstance(h, BoundedQueueHandler)), None
+            )
+
+    def _sample_rate(self, event: str, status_code: Optional[int]) -> float:
+        if status_code is not None:
+            rate = self.sample_rates.get(f"{event}:{status_code // 100}xx")
+            if rate is not None:
+                return rate
+        return self.sample_rates.get(event, 1.0)
+
     def log_structured(self, level: str, event: str, message: str, **kwargs):
         """Log structured data"""
-        log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+        levelno = logging.getLevelName(level.upper())
+        if not isinstance(levelno, int):
+            levelno = logging.INFO
+        if not self.logger.isEnabledFor(levelno):
+            return
+
+        if levelno < logging.ERROR and self.sample_rates:
+            rate = self._sample_rate(event, kwargs.get("status_code"))
+            if rate < 1.0 and random.random() >= rate:
+                self.sampled_out += 1
+                return
+            if rate < 1.0:
+                kwargs["sample_rate"] = rate
+
+        # The dict is JSON-encoded by StructuredFormatter on the listener thread
+        self.logger.log(levelno, {
             "service": self.service_name,
             "event": event,
             "message": message,
             **kwargs
-        }
-        
-        log_message = json.dumps(log_data)
-        
-        if level.upper() == "ERROR":
-            self.logger.error(log_message)
-        elif level.upper() == "WARNING":
-            self.logger.warning(log_message)
-        elif level.upper() == "DEBUG":
-            self.logger.debug(log_message)
-        else:
-            self.logger.info(log_message)
-    
+        })
+
     def log_api_call(self, endpoint: str, method: str, status_code: int, duration_ms: float, **kwargs):
         """Log API call information"""
         self.log_structured(
-            level="INFO",
+            level="ERROR" if status_code >= 500 else "INFO",
             event="api_call",
             message=f"{method} {endpoint} - {status_code}",
             endpoint=endpoint,
@@ -54,19 +137,34 @@ class StructuredLogger:
             duration_ms=duration_ms,
             **kwargs
         )
-    
+
+    def stats(self) -> Dict[str, int]:
+        """Queue depth and counts of records dropped or sampled out"""
+        handler = self.queue_handler
+        return {
+            "queued": handler.queue.qsize() if handler else 0,
+            "dropped": handler.dropped if handler else 0,
+            "sampled_out": self.sampled_out,
+        }
+
+    def close(self):
+        """Flush queued records and stop the background listener"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
     def error(self, message: str, **kwargs):
         """Log error message"""
         self.log_structured("ERROR", "error", message, **kwargs)
-    
+
     def info(self, message: str, **kwargs):
         """Log info message"""
         self.log_structured("INFO", "info", message, **kwargs)
-    
+
     def warning(self, message: str, **kwargs):
         """Log warning message"""
         self.log_structured("WARNING", "warning", message, **kwargs)
-    
+
     def debug(self, message: str, **kwargs):
         """Log debug message"""
-        self.log_structured("DEBUG", "debug", message, **kwargs)
\ No newline at end of file
+        self.log_structured("DEBUG", "debug", message, **kwargs)
@@ -0,0 +1,34 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_keyset_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor"""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_keyset_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_keyset_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def encode_id_cursor(row_id: int) -> str:
+    """Encode an id-only keyset position as an opaque cursor"""
+    return base64.urlsafe_b64encode(str(row_id).encode()).decode().rstrip("=")
+
+
+def decode_id_cursor(cursor: str) -> int:
+    """Decode a cursor produced by encode_id_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid pagination cursor")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Middleware overhead benchmark
+
+Compares per-request overhead of the previous two stacked
+@app.middleware("http") functions (BaseHTTPMiddleware) against the single
+pure-ASGI RequestLoggingMiddleware. Requests are driven straight through the
+ASGI interface so no network or server cost is included.
+
+Usage:
+    python scripts/benchmarks/bench_middleware.py [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "apps", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from core.middleware import RequestLoggingMiddleware  # noqa: E402
+from utils.logging import StructuredLogger  # noqa: E402
+
+
+def build_logger() -> StructuredLogger:
+    # Drop terminal I/O so only middleware overhead is measured
+    return StructuredLogger("bench", stream=open(os.devnull, "w"))
+
+
+async def homepage(request):
+    return PlainTextResponse("ok")
+
+
+def build_plain_app() -> Starlette:
+    return Starlette(routes=[Route("/", homepage)])
+
+
+def build_legacy_app(logger: StructuredLogger) -> Starlette:
+    """The two BaseHTTPMiddleware layers previously declared in core/main.py."""
+    app = build_plain_app()
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        logger.log_api_call(
+            endpoint=str(request.url.path),
+            method=request.method,
+            status_code=response.status_code,
+            duration_ms=(time.time() - start_time) * 1000,
+        )
+        return response
+
+    @app.middleware("http")
+    async def security_headers_middleware(request: Request, call_next):
+        response = await call_next(request)
+        response.headers["Strict-Transport-Security"] = "max-age=63072000; includeSubDomains; preload"
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Referrer-Policy"] = "same-origin"
+        response.headers["Permissions-Policy"] = "geolocation=(), microphone=()"
+        return response
+
+    return app
+
+
+def build_asgi_app(logger: StructuredLogger) -> Starlette:
+    app = build_plain_app()
+    app.add_middleware(RequestLoggingMiddleware, logger=logger)
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    """Send `requests` GET / calls through the ASGI app; returns seconds elapsed."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+
+    def make_channel():
+        """receive/send for one request: the body once, then http.disconnect.
+
+        Like a server, the disconnect is only delivered after the response
+        finished; BaseHTTPMiddleware drops the body on an early disconnect.
+        """
+        messages = iter([{"type": "http.request", "body": b"", "more_body": False}])
+        response_done = asyncio.Event()
+
+        async def receive():
+            message = next(messages, None)
+            if message is not None:
+                return message
+            await response_done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_done.set()
+
+        return receive, send
+
+    # Warm up routing and lazy initialization
+    for _ in range(200):
+        await app(dict(scope), *make_channel())
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), *make_channel())
+    return time.perf_counter() - start
+
+
+async def main(requests: int):
+    logger = build_logger()
+    results = {
+        "no middleware": await drive(build_plain_app(), requests),
+        "2x BaseHTTPMiddleware (before)": await drive(build_legacy_app(logger), requests),
+        "pure ASGI middleware (after)": await drive(build_asgi_app(logger), requests),
+    }
+
+    baseline = results["no middleware"] / requests * 1e6
+    print(f"{requests} requests per variant")
+    for name, elapsed in results.items():
+        per_request = elapsed / requests * 1e6
+        print(f"  {name:<34} {per_request:8.1f} us/req  (+{per_request - baseline:6.1f} us overhead)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))